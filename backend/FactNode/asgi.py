@@ -5,12 +5,32 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Requests are routed with settings.ASGI_ROOT_URLCONF instead of ROOT_URLCONF, so the
+read-heavy endpoints are served by native async views (see FactNode/urls_asgi.py).
+Set ASGI_ROOT_URLCONF = ROOT_URLCONF to serve every view like WSGI does.
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'FactNode.settings')
 
-application = get_asgi_application()
+
+class FactNodeASGIRequest(ASGIRequest):
+    @property
+    def urlconf(self):
+        # Read by BaseHandler.resolve_request, like a urlconf set by a middleware
+        return settings.ASGI_ROOT_URLCONF
+
+
+class FactNodeASGIHandler(ASGIHandler):
+    request_class = FactNodeASGIRequest
+
+
+# What get_asgi_application() does, with our handler
+django.setup(set_prefix=False)
+application = FactNodeASGIHandler()
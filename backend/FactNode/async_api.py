@@ -0,0 +1,129 @@
+"""
+Native async read endpoints, served under ASGI (see asgi.py and urls_asgi.py).
+
+DRF views are synchronous: under ASGI Django runs each of them in a thread for the whole
+request. AsyncReadView handles GET on the event loop instead and only leaves it for the
+database (Django's async ORM) and the cache. Everything else is delegated to the DRF view
+that serves the same URL under WSGI, so both servers expose exactly the same API:
+- other methods (POST, PATCH, DELETE, ...) and the browsable API (text/html, ?format=),
+- authentication is the same JWT check (JWTAuthentication), and errors have DRF's shape.
+
+Independent queries of one request are started together with asyncio.gather() through
+fetch(). With Django's database backends every async ORM call of a request runs on that
+request's own sync thread, so by default they still execute one after another on a single
+connection; the event loop is simply never blocked. ASYNC_READ_PARALLEL_QUERIES = True
+gives each gathered query a worker thread and its own connection so they really overlap:
+use it with pooled connections (e.g. the PostgreSQL "pool" option), as every query then
+checks a connection out and returns it.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.urls import resolve
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+def _run_on_own_connection(function, *args):
+    try:
+        return function(*args)
+    finally:
+        # This worker thread's connection goes back to the pool
+        connections.close_all()
+
+
+async def fetch(function, *args):
+    """
+    Runs one synchronous ORM call, e.g. `await fetch(list, queryset)`, off the event loop.
+    Meant for asyncio.gather(); see ASYNC_READ_PARALLEL_QUERIES above.
+    """
+    if getattr(settings, 'ASYNC_READ_PARALLEL_QUERIES', False):
+        return await sync_to_async(_run_on_own_connection, thread_sensitive=False)(function, *args)
+    return await sync_to_async(function)(*args)
+
+
+async def authenticate(request):
+    """
+    The same JWT authentication as the DRF views. Requests without a token never leave
+    the event loop; with one, the user is loaded by JWTAuthentication itself.
+    """
+    authenticator = JWTAuthentication()
+    if authenticator.get_header(request) is None:
+        return AnonymousUser()
+    result = await sync_to_async(authenticator.authenticate)(request)
+    return result[0] if result else AnonymousUser()
+
+
+def render(data, status_code=status.HTTP_200_OK, headers=None):
+    """JSON exactly as DRF's JSONRenderer writes it."""
+    response = HttpResponse(
+        JSONRenderer().render(data) if data is not None else b'',
+        status=status_code,
+        content_type='application/json',
+        headers=headers,
+    )
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def error_response(exc):
+    """The response DRF's exception handler gives for an APIException."""
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = JWTAuthentication().authenticate_header(None)
+    return render(data, exc.status_code, headers)
+
+
+class AsyncReadView(View):
+    """
+    Subclasses implement `async def read(self, request, *args, **kwargs)`, where request is
+    a DRF Request (query_params, user, build_absolute_uri) wrapping the Django one.
+    """
+    requires_authentication = False
+    # Where delegate() finds the DRF view for the same URL
+    sync_urlconf = 'FactNode.urls'
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token authentication, no cookies: exempt from CSRF like DRF's APIView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def get(self, request, *args, **kwargs):
+        if not self.wants_json(request):
+            return await self.delegate(request, *args, **kwargs)
+        try:
+            user = await authenticate(request)
+            if self.requires_authentication and not user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            api_request = Request(request)
+            api_request.user = user
+            return await self.read(api_request, *args, **kwargs)
+        except Http404 as exc:
+            return error_response(exceptions.NotFound(*exc.args))
+        except exceptions.APIException as exc:
+            return error_response(exc)
+
+    async def post(self, request, *args, **kwargs):
+        return await self.delegate(request, *args, **kwargs)
+
+    put = patch = delete = options = post
+
+    def wants_json(self, request):
+        # The browsable API (and ?format=) is rendered by DRF
+        return 'format' not in request.GET and 'text/html' not in request.headers.get('Accept', '')
+
+    async def delegate(self, request, *args, **kwargs):
+        """Runs the DRF view that serves this URL under WSGI, in a thread."""
+        match = resolve(request.path_info, urlconf=self.sync_urlconf)
+        return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+    async def read(self, request, *args, **kwargs):
+        raise NotImplementedError
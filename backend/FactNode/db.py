@@ -0,0 +1,37 @@
+"""
+Database helpers shared by the apps.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def write_transaction(using=DEFAULT_DB_ALIAS):
+    """
+    transaction.atomic() for blocks that read rows with select_for_update() and then
+    write them.
+
+    SQLite has no row locks (select_for_update() is a no-op), and a transaction that
+    starts reading and upgrades to writing fails at once with "database is locked" if
+    another connection is writing. On SQLite this block therefore starts with
+    BEGIN IMMEDIATE: it takes the write lock up front, and concurrent workers wait for it
+    (up to the connection's timeout). Other atomic blocks, read-only ones included, keep
+    the default deferred BEGIN. Nested in an outer transaction, or on other backends, this
+    is plain atomic().
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    # Connecting resets transaction_mode from the settings, so connect first
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        connection.transaction_mode = previous
@@ -0,0 +1,293 @@
+"""
+Responsive image derivatives for uploaded media (Fact.image, Profile.avatar).
+
+Uploads are stored as-is; resizing never runs on the request path. After the upload
+commits, the derivatives are generated either:
+- in-process, by a small thread pool (IMAGE_DERIVATIVES_DISPATCH = 'thread'), or
+- by a worker: `manage.py generate_image_derivatives --loop` (IMAGE_DERIVATIVES_DISPATCH = 'worker').
+The same command backfills existing media, in parallel.
+
+Every size in IMAGE_DERIVATIVE_SIZES (thumbnail, feed width, full) is written as WebP
+and JPEG under derivatives/, never upscaled. EXIF is dropped after applying its
+orientation, so no camera or GPS metadata is served. The result is stored on the row in
+`<field>_derivatives`:
+
+    {"source": "fact_images/x.jpg",
+     "variants": {"thumb": {"width": 320, "height": 213, "webp": "derivatives/...", "jpeg": "..."}, ...}}
+
+"source" ties the derivatives to one upload: the row is only updated if the field still
+holds that file, and serializers ignore derivatives of a replaced image. An upload that
+cannot be rendered (missing from storage, not a decodable image) is recorded as
+{"source": ..., "failed": true}, so it leaves the stale set until it is replaced or --force
+retries it.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.db.models.fields.json import KT
+from django.dispatch import Signal
+from django.utils import timezone
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# Sent after a row's derivatives were stored (sender = model class, instance_id, field)
+derivatives_ready = Signal()
+
+DEFAULT_SIZES = {
+    'image': {'thumb': 320, 'feed': 800, 'full': 1600},
+    'avatar': {'thumb': 64, 'feed': 160, 'full': 512},
+}
+FORMATS = {'webp': ('WEBP', '.webp'), 'jpeg': ('JPEG', '.jpg')}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class UnreadableImage(Exception):
+    """The upload is not an image Pillow can decode (corrupt, truncated, unsupported)."""
+
+
+def derivatives_field(field_name):
+    return f'{field_name}_derivatives'
+
+
+def get_sizes(field_name):
+    return getattr(settings, 'IMAGE_DERIVATIVE_SIZES', DEFAULT_SIZES)[field_name]
+
+
+def _default_name(model, field_name):
+    # The shared default image (e.g. avatars/default.png) is a static asset, not an upload
+    field = model._meta.get_field(field_name)
+    return field.default if field.has_default() else ''
+
+
+def needs_derivatives(instance, field_name):
+    """True if the field holds an upload whose derivatives are missing or stale."""
+    field_file = getattr(instance, field_name)
+    if not field_file or field_file.name == _default_name(type(instance), field_name):
+        return False
+    return (getattr(instance, derivatives_field(field_name)) or {}).get('source') != field_file.name
+
+
+def uploads_queryset(model, field_name):
+    """Rows whose field holds an upload."""
+    return (
+        model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        .exclude(**{field_name: _default_name(model, field_name)})
+    )
+
+
+def stale_queryset(model, field_name):
+    """Rows with an upload but no current derivatives (what the backfill and the worker walk)."""
+    return uploads_queryset(model, field_name).annotate(
+        derived_from=KT(f'{derivatives_field(field_name)}__source')
+    ).filter(Q(derived_from__isnull=True) | ~Q(derived_from=F(field_name)))
+
+
+# --- Rendering ---
+
+def _derivative_name(source, label, extension):
+    # The hash of the full source name keeps x.jpg and x.png (same stem) apart
+    path = PurePosixPath(source)
+    digest = hashlib.sha1(source.encode()).hexdigest()[:8]
+    return str(PurePosixPath('derivatives') / path.parent / f'{path.stem}-{digest}-{label}{extension}')
+
+
+def _flatten(image):
+    """JPEG has no alpha channel: composite transparent images onto white."""
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_derivatives(source_file, source_name, sizes, storage):
+    """
+    Writes every size/format of one image to storage and returns the "variants" dict.
+    Nothing is copied from the original but the pixels (and the ICC colour profile).
+    """
+    quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+    try:
+        with Image.open(source_file) as original:
+            icc_profile = original.info.get('icc_profile')
+            image = ImageOps.exif_transpose(original)
+            image = image.convert('RGBA') if image.mode not in ('RGB', 'RGBA') else image
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as error:
+        # Pillow reports undecodable data with any of these
+        raise UnreadableImage(f'{source_name}: {error}') from error
+
+    variants = {}
+    for label, max_width in sizes.items():
+        width = min(max_width, image.width)
+        height = max(round(image.height * width / image.width), 1)
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+
+        variant = {'width': width, 'height': height}
+        for format_name, (pil_format, extension) in FORMATS.items():
+            rendered = resized if pil_format == 'WEBP' else _flatten(resized)
+            buffer = BytesIO()
+            options = {'quality': quality, 'optimize': True} if pil_format == 'JPEG' else {'quality': quality, 'method': 4}
+            if icc_profile:
+                options['icc_profile'] = icc_profile
+            rendered.save(buffer, pil_format, **options)
+
+            name = _derivative_name(source_name, label, extension)
+            # Regenerating (--force) replaces the files instead of adding name_<random> copies
+            storage.delete(name)
+            variant[format_name] = storage.save(name, ContentFile(buffer.getvalue()))
+        variants[label] = variant
+    return variants
+
+
+def _delete_variants(storage, data):
+    for variant in (data or {}).get('variants', {}).values():
+        for format_name in FORMATS:
+            if variant.get(format_name):
+                storage.delete(variant[format_name])
+
+
+def generate_derivatives(model, pk, field_name, force=False):
+    """
+    Renders the derivatives of one row and stores them if the upload is still current.
+    Returns True if the row was updated, None if the upload cannot be rendered (recorded as
+    failed on the row). force=True re-renders current derivatives too (e.g. after changing
+    IMAGE_DERIVATIVE_SIZES).
+    """
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return False
+    if not needs_derivatives(instance, field_name) and not (force and getattr(instance, field_name)):
+        return False
+    field_file = getattr(instance, field_name)
+    source_name = field_file.name
+    storage = field_file.storage
+    previous = getattr(instance, derivatives_field(field_name))
+
+    try:
+        with storage.open(source_name, 'rb') as source_file:
+            variants = render_derivatives(source_file, source_name, get_sizes(field_name), storage)
+    except FileNotFoundError:
+        logger.warning("Image %s of %s %s is missing from storage", source_name, model.__name__, pk)
+        _record_failure(model, pk, field_name, field_file, previous)
+        return None
+    except UnreadableImage:
+        logger.exception("Image %s of %s %s cannot be decoded", source_name, model.__name__, pk)
+        _record_failure(model, pk, field_name, field_file, previous)
+        return None
+
+    values = {derivatives_field(field_name): {'source': source_name, 'variants': variants}}
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        # Clients see new URLs in the payload (and a new ETag)
+        values['updated_at'] = timezone.now()
+    # Conditional UPDATE: if the image was replaced meanwhile, these derivatives are orphans
+    updated = model.objects.filter(pk=pk, **{field_name: source_name}).update(**values)
+    if not updated:
+        _delete_variants(storage, values[derivatives_field(field_name)])
+        return False
+
+    if previous and previous.get('source') != source_name:
+        _delete_variants(storage, previous)
+    derivatives_ready.send(sender=model, instance_id=pk, field=field_name)
+    return True
+
+
+def _record_failure(model, pk, field_name, field_file, previous):
+    """Marks the upload as failed so the backfill and the worker stop retrying it."""
+    failure = {derivatives_field(field_name): {'source': field_file.name, 'failed': True}}
+    updated = model.objects.filter(pk=pk, **{field_name: field_file.name}).update(**failure)
+    if updated and previous and previous.get('source') != field_file.name:
+        _delete_variants(field_file.storage, previous)
+
+
+# --- Dispatch ---
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'IMAGE_DERIVATIVES_WORKERS', 2),
+                    thread_name_prefix='image-derivatives',
+                )
+    return _executor
+
+
+def try_generate(model_label, pk, field_name, force=False):
+    """generate_derivatives() that never raises: True/False/None = generated/skipped/failed."""
+    try:
+        return generate_derivatives(apps.get_model(model_label), pk, field_name, force=force)
+    except Exception:
+        # Corrupt or unsupported uploads must not stop a backfill
+        logger.exception("Generating image derivatives for %s %s failed", model_label, pk)
+        return None
+
+
+def _generate_in_background(model_label, pk, field_name):
+    try:
+        try_generate(model_label, pk, field_name)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(instance, field_name):
+    """
+    Called from post_save receivers. A no-op unless the field holds a new upload;
+    in 'worker' mode the stale row is picked up by the worker instead.
+    """
+    if not needs_derivatives(instance, field_name):
+        return
+    if getattr(settings, 'IMAGE_DERIVATIVES_DISPATCH', 'thread') != 'thread':
+        return
+    task = (instance._meta.label, instance.pk, field_name)
+    transaction.on_commit(lambda: _get_executor().submit(_generate_in_background, *task))
+
+
+# --- Serialization ---
+
+class ImageDerivativesField(serializers.ReadOnlyField):
+    """
+    Absolute derivative URLs and dimensions, keyed by size:
+    {"thumb": {"width": 320, "height": 213, "webp": "https://...", "jpeg": "https://..."}, ...}
+    Empty until the derivatives of the current upload exist (clients fall back to the original).
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs.setdefault('source', '*')
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        data = getattr(instance, derivatives_field(self.image_field)) or {}
+        field_file = getattr(instance, self.image_field)
+        if not field_file or data.get('source') != field_file.name:
+            return {}
+
+        request = self.context.get('request')
+        storage = field_file.storage
+
+        def url(name):
+            location = storage.url(name)
+            return request.build_absolute_uri(location) if request else location
+
+        return {
+            label: {
+                'width': variant['width'],
+                'height': variant['height'],
+                **{format_name: url(variant[format_name]) for format_name in FORMATS},
+            }
+            for label, variant in data.get('variants', {}).items()
+        }
@@ -0,0 +1,256 @@
+"""
+Opt-in, sampled per-request performance instrumentation.
+
+For a sampled request (PERF_SAMPLE_RATE, 0.0 = off) the middleware records:
+- query count and total DB time, via an execute_wrapper on every database connection,
+- the PERF_SLOW_QUERIES slowest queries, each with the project frame that issued it
+  (e.g. "facts/serializers.py:57 in get_user_vote" or a signal receiver),
+- serialization time without DB time: building serializer .data, for serializers that use
+  ProfiledSerializerMixin (FactSerializer, CommentSerializer, ...),
+- view time without DB and serialization time ("app": permissions, Python logic),
+- render time (DRF's JSON encoding of the response), total time and response size.
+
+These are exposed as a Server-Timing header (visible in the browser dev tools) and one
+JSON log line per request on the "factnode.perf" logger. Requests that are not sampled
+only pay for one random() call (and one context variable lookup per query).
+
+Connections are per thread, and under ASGI a request's queries do not run on the thread
+that runs this middleware: sync views and sync_to_async() calls use worker threads. So
+the wrapper is installed once on every connection, on the request's own thread (via
+request_started) and on any connection opened later, and finds the profile of the
+current request in a context variable, which follows the request into those threads.
+"""
+import heapq
+import json
+import logging
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('factnode.perf')
+
+# Frames from these directories are never reported as the origin of a query
+_LIBRARY_MARKERS = ('site-packages', 'dist-packages')
+
+# The RequestProfile of the request being handled, if it is sampled
+_current_profile = ContextVar('factnode_perf_profile', default=None)
+
+
+class RequestProfile:
+    """Measurements of one request; also the execute_wrapper installed on each connection."""
+
+    def __init__(self, slow_queries):
+        self.started = time.perf_counter()
+        self.slow_queries = slow_queries
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self._serializing = 0
+        self.render_started = None
+        self.render_time = 0.0
+        self._slowest = []  # min-heap of (duration, sequence, sql, origin)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.query_count += 1
+            self.db_time += duration
+            if self.slow_queries:
+                entry = (duration, self.query_count, sql, _query_origin())
+                if len(self._slowest) < self.slow_queries:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+
+    @contextmanager
+    def serializing(self):
+        """Times a serializer's output; nested serializers are counted once, by the outermost."""
+        self._serializing += 1
+        started, db_time = time.perf_counter(), self.db_time
+        try:
+            yield
+        finally:
+            self._serializing -= 1
+            if not self._serializing:
+                # Queries issued while serializing (SerializerMethodFields) stay in db time
+                self.serialize_time += time.perf_counter() - started - (self.db_time - db_time)
+
+    def start_render(self, response):
+        self.render_started = time.perf_counter()
+        response.add_post_render_callback(self._rendered)
+        return response
+
+    def _rendered(self, response):
+        self.render_time = time.perf_counter() - self.render_started
+
+    def finish(self, request, response):
+        total = time.perf_counter() - self.started
+        app = max(total - self.db_time - self.serialize_time - self.render_time, 0.0)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': _ms(total),
+            'db_ms': _ms(self.db_time),
+            'app_ms': _ms(app),
+            'serialize_ms': _ms(self.serialize_time),
+            'render_ms': _ms(self.render_time),
+            'queries': self.query_count,
+            'response_bytes': _response_size(response),
+            'slow_queries': [
+                {'ms': _ms(duration), 'origin': origin, 'sql': sql[:500]}
+                for duration, _, sql, origin in sorted(self._slowest, reverse=True)
+            ],
+        }
+        logger.info(json.dumps(record))
+
+        if getattr(settings, 'PERF_SERVER_TIMING', True):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={record["db_ms"]};desc="{self.query_count} queries"',
+                f'app;dur={record["app_ms"]}',
+                f'serialize;dur={record["serialize_ms"]}',
+                f'render;dur={record["render_ms"]}',
+                f'total;dur={record["total_ms"]}',
+            ])
+        return record
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _response_size(response):
+    if getattr(response, 'streaming', False):
+        return None
+    return len(response.content)
+
+
+def _query_origin():
+    """The innermost project frame on the stack, e.g. 'facts/views.py:71 in get_queryset'."""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(base_dir)
+            and filename != __file__
+            and not any(marker in filename for marker in _LIBRARY_MARKERS)
+        ):
+            return f'{Path(filename).relative_to(base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def _profiled_execute(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def _install(wrappers):
+    for connection in wrappers:
+        if _profiled_execute not in connection.execute_wrappers:
+            # Outermost, so that execute_wrapper() blocks still pop their own wrapper
+            connection.execute_wrappers.insert(0, _profiled_execute)
+
+
+def _profiling_enabled():
+    return getattr(settings, 'PERF_SAMPLE_RATE', 0.0) > 0
+
+
+@receiver(request_started)
+def _install_on_request_thread(**kwargs):
+    # Under ASGI, sync receivers run on the thread that runs the request's sync code
+    if _profiling_enabled():
+        _install(connections.all())
+
+
+@receiver(connection_created)
+def _install_on_new_connection(connection, **kwargs):
+    # Connections of other threads, e.g. ASYNC_READ_PARALLEL_QUERIES workers
+    if _profiling_enabled():
+        _install([connection])
+
+
+class ProfiledSerializerMixin:
+    """
+    Reports the time spent turning instances into data to the request's profile.
+    Put it first in the bases of serializers that build response bodies; it also covers
+    many=True, where the list calls this once per item.
+    """
+
+    def to_representation(self, instance):
+        request = self.context.get('request')
+        profile = getattr(request, '_perf_profile', None)
+        if profile is None:
+            return super().to_representation(instance)
+        with profile.serializing():
+            return super().to_representation(instance)
+
+
+class RequestPerformanceMiddleware:
+    """
+    Put it first in MIDDLEWARE so that the whole stack is timed. Tune with
+    PERF_SAMPLE_RATE (0.0 - 1.0), PERF_SLOW_QUERIES and PERF_SERVER_TIMING.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = getattr(settings, 'PERF_SAMPLE_RATE', 0.0)
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def _instrument(self, request):
+        profile = RequestProfile(getattr(settings, 'PERF_SLOW_QUERIES', 5))
+        _install(connections.all())
+        request._perf_profile = profile
+        return profile, _current_profile.set(profile)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        profile, token = self._instrument(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        profile.finish(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        profile, token = self._instrument(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        profile.finish(request, response)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook; time the rendering
+        profile = getattr(request, '_perf_profile', None)
+        return profile.start_render(response) if profile else response
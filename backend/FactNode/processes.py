@@ -0,0 +1,23 @@
+"""
+Process pools for the parallel maintenance commands (reconcile_counters,
+generate_image_derivatives).
+
+Workers started with spawn or forkserver (macOS, Windows, and Linux from Python 3.14)
+begin as fresh interpreters. The initializer sets Django up before the first task is
+unpickled, since task functions live in modules that import models.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connections
+
+
+def _setup_worker():
+    # DJANGO_SETTINGS_MODULE is inherited through the environment
+    django.setup()
+
+
+def process_pool(workers):
+    # Forked children must open their own connections instead of sharing the parent's socket
+    connections.close_all()
+    return ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker)
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so it times everything below it (no-op unless PERF_SAMPLE_RATE > 0)
+    'FactNode.middleware.RequestPerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -60,6 +62,8 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'FactNode.urls'
+# Under ASGI (see asgi.py): the feed, fact detail, categories and notifications are served by async views
+ASGI_ROOT_URLCONF = 'FactNode.urls_asgi'
 
 TEMPLATES = [
     {
@@ -86,6 +90,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Seconds a connection waits for the write lock. Blocks that lock rows before writing
+            # (outbox drain, reconcile_counters --workers, ...) take it up front (FactNode/db.py)
+            'timeout': 20,
+        },
     }
 }
 
@@ -128,6 +137,76 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 STATIC_URL = 'static/'
 
+# --- CACHING ---
+# Local memory for development. In production set REDIS_URL so every worker
+# shares the same cache (and the same feed generation counters).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'factnode',
+        }
+    }
+
+# Anonymous feed/category responses (see facts/cache.py)
+FEED_CACHE_ALIAS = 'default'
+FEED_CACHE_TIMEOUT = 60 * 5  # Seconds; invalidation is generation-based, this just bounds memory
+
+# Buffered Fact.views_count (see facts/view_counter.py)
+VIEW_COUNT_FLUSH_INTERVAL = 10  # Seconds between bulk flushes (None disables the background flusher)
+VIEW_COUNT_DEDUP_WINDOW = 60 * 30  # Repeat views by the same viewer within this window count once
+
+# Async read views under ASGI (see FactNode/async_api.py)
+# True: queries gathered by one request run on separate connections (use with connection pooling)
+ASYNC_READ_PARALLEL_QUERIES = False
+
+# Notification outbox (see notifications/outbox.py)
+# 'thread': drain in-process after each commit; 'worker': only `manage.py process_notification_outbox` delivers
+NOTIFICATION_OUTBOX_DISPATCH = 'thread'
+NOTIFICATION_OUTBOX_WORKERS = 2
+NOTIFICATION_OUTBOX_BATCH_SIZE = 500
+# Seconds the unread badge is cached (see notifications/counters.py). Invalidation is immediate
+# with a shared cache (REDIS_URL); without one, this bounds how stale other processes can be.
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 30
+
+# Threaded comments (see facts/comments.py)
+COMMENT_MAX_DEPTH = 8  # Deeper replies continue the thread at this depth
+COMMENT_REPLY_PREVIEW = 3  # Replies loaded per thread on comment list pages (?replies= overrides, max 20)
+
+# Responsive image derivatives (see FactNode/images.py)
+# 'thread': resize in-process after each upload commits; 'worker': only `manage.py generate_image_derivatives --loop` does
+IMAGE_DERIVATIVES_DISPATCH = 'thread'
+IMAGE_DERIVATIVES_WORKERS = 2
+IMAGE_DERIVATIVE_QUALITY = 80
+IMAGE_DERIVATIVE_SIZES = {  # Max widths in pixels, per image field; never upscaled
+    'image': {'thumb': 320, 'feed': 800, 'full': 1600},
+    'avatar': {'thumb': 64, 'feed': 160, 'full': 512},
+}
+
+# Per-request performance instrumentation (see FactNode/middleware.py)
+PERF_SAMPLE_RATE = float(os.environ.get('PERF_SAMPLE_RATE', 0.0))  # Share of requests to profile, 0.0 = off
+PERF_SLOW_QUERIES = 5  # Slowest queries (with their origin) logged per profiled request
+PERF_SERVER_TIMING = True  # Add a Server-Timing header to profiled responses
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per profiled request
+        'factnode.perf': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 REST_FRAMEWORK = {
     # Use standard permission: Read-only for guests, Full access for logged-in users
     'DEFAULT_PERMISSION_CLASSES': [
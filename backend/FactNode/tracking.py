@@ -0,0 +1,98 @@
+"""
+Dirty-field tracking, so signal receivers never re-read a row to find out what a save changed.
+
+TrackedFieldsMixin snapshots the `tracked_fields` of an instance when it is loaded
+(from_db), and again after every save() and refresh_from_db(). Receivers can then ask,
+without a query:
+- instance.changed_fields: tracked fields whose value differs from the stored row
+  (every tracked field on a new instance),
+- instance.previous(name): the stored value (None on a new instance).
+Together with saves_any(update_fields, fields), a receiver returns before doing any work
+when a save cannot have affected it (e.g. a counter-only save with update_fields).
+"""
+from django.db import models
+from django.db.models.expressions import Combinable
+from django.db.models.fields.files import FieldFile
+
+_MISSING = object()
+
+
+def saves_any(update_fields, fields):
+    """False if the save was limited (update_fields) to columns other than `fields`."""
+    return update_fields is None or not set(fields).isdisjoint(update_fields)
+
+
+class TrackedFieldsMixin(models.Model):
+    """
+    Put it before models.Model in the bases and list the field names to watch in
+    `tracked_fields` (foreign keys by field name, e.g. 'author').
+    """
+    tracked_fields = ()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot(cls.tracked_fields)
+        return instance
+
+    def _current(self, name):
+        value = self.__dict__.get(self._meta.get_field(name).attname, _MISSING)
+        if isinstance(value, FieldFile):
+            # The file object is mutated in place by .save(); compare names
+            return value.name
+        return value
+
+    def _snapshot(self, names):
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for name in names:
+            value = self._current(name)
+            if value is _MISSING or isinstance(value, Combinable):
+                # Deferred, or an F() expression: the stored value is unknown until reloaded
+                loaded.pop(name, None)
+            else:
+                loaded[name] = value
+
+    @property
+    def changed_fields(self):
+        loaded = self.__dict__.get('_loaded_values', {})
+        changed = set()
+        for name in self.tracked_fields:
+            value = self._current(name)
+            if value is _MISSING:
+                continue  # Deferred and never assigned: cannot have changed
+            if loaded.get(name, _MISSING) is _MISSING or value != loaded[name]:
+                changed.add(name)
+        return changed
+
+    def previous(self, name):
+        """The value the database row holds for a tracked field (None if unknown or unsaved)."""
+        return self.__dict__.get('_loaded_values', {}).get(name)
+
+    def sync_field(self, name, value):
+        """
+        Sets a field to the value its row now holds (e.g. returned by an UPDATE ... RETURNING),
+        without marking it as changed.
+        """
+        setattr(self, name, value)
+        self._snapshot([name] if name in self.tracked_fields else [])
+
+    def _tracked_in(self, fields):
+        """Tracked fields named (by name or attname) in an update_fields / fields list."""
+        if fields is None:
+            return self.tracked_fields
+        return [
+            name for name in self.tracked_fields
+            if saves_any(fields, [name, self._meta.get_field(name).attname])
+        ]
+
+    def save(self, *args, **kwargs):
+        # post_save receivers run inside super().save(), so they still see the old snapshot
+        super().save(*args, **kwargs)
+        self._snapshot(self._tracked_in(kwargs.get('update_fields')))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._snapshot(self._tracked_in(fields))
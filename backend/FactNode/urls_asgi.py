@@ -0,0 +1,18 @@
+"""
+URL configuration used under ASGI (settings.ASGI_ROOT_URLCONF, see asgi.py).
+
+The read-heavy GET endpoints are served by native async views (FactNode/async_api.py);
+everything else, including other methods on these same URLs, falls through to the
+regular urlpatterns and their DRF views.
+"""
+from django.urls import path
+from facts.async_views import CategoryListView, FactDetailView, FactListView
+from notifications.async_views import NotificationListView
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path('api/facts/feed/', FactListView.as_view(), name='async-fact-list'),
+    path('api/facts/feed/<int:pk>/', FactDetailView.as_view(), name='async-fact-detail'),
+    path('api/facts/categories/', CategoryListView.as_view(), name='async-category-list'),
+    path('api/notifications/', NotificationListView.as_view(), name='async-notification-list'),
+] + sync_urlpatterns
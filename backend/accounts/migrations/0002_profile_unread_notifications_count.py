@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 12:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread_counts(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    Notification = apps.get_model('notifications', 'Notification')
+    unread = Notification.objects.filter(is_read=False).values('recipient_id').annotate(total=Count('id'))
+    for row in unread.iterator():
+        Profile.objects.filter(user_id=row['recipient_id']).update(unread_notifications_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='unread_notifications_count',
+            field=models.PositiveIntegerField(default=0, help_text='Kept exact by notifications.counters; backs the unread badge.'),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
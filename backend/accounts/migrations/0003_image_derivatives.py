@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_profile_unread_notifications_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
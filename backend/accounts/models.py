@@ -3,6 +3,9 @@ from django.contrib.auth.models import AbstractUser
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
+from FactNode.images import schedule_derivatives
+from FactNode.tracking import TrackedFieldsMixin, saves_any
+from . import ranks
 
 
 class CustomUser(AbstractUser):
@@ -24,13 +27,19 @@ class CustomUser(AbstractUser):
         return self.username
 
 
-class Profile(models.Model):
+class Profile(TrackedFieldsMixin, models.Model):
     """
     User Profile model containing public information and platform-specific data.
     Separating Profile from User adheres to the 'Separation of Concerns' principle:
     - User model handles authentication (auth).
     - Profile model handles user persona and application logic (reputation, bio, etc.).
     """
+    # Everything a client or a receiver can change (see FactNode/tracking.py)
+    tracked_fields = (
+        'avatar', 'bio', 'location', 'website', 'reputation_score',
+        'facts_posted_count', 'facts_approved_count', 'unread_notifications_count',
+    )
+
     user = models.OneToOneField(
         CustomUser,
         on_delete=models.CASCADE,
@@ -44,6 +53,8 @@ class Profile(models.Model):
         blank=True,
         help_text="User's profile picture."
     )
+    # Resized WebP/JPEG copies of `avatar`, written off the request path (see FactNode/images.py)
+    avatar_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     bio = models.TextField(
         max_length=500,
         blank=True,
@@ -60,6 +71,10 @@ class Profile(models.Model):
     # Statistics (Cached counts for performance optimization)
     facts_posted_count = models.PositiveIntegerField(default=0)
     facts_approved_count = models.PositiveIntegerField(default=0)
+    unread_notifications_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Kept exact by notifications.counters; backs the unread badge."
+    )
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -73,18 +88,14 @@ class Profile(models.Model):
         """
         Returns the user's rank title based on their reputation score.
         Useful for displaying badges or titles in the frontend.
+        Thresholds live in accounts/ranks.py.
         """
-        score = self.reputation_score
-        if score < 10:
-            return "Novice"
-        elif score < 50:
-            return "Curious Mind"
-        elif score < 200:
-            return "Researcher"
-        elif score < 1000:
-            return "Scholar"
-        else:
-            return "Professor"
+        return ranks.rank_title(self.reputation_score)
+
+
+def edited_fields(profile):
+    """update_fields for saving a loaded profile without overwriting columns it did not change."""
+    return [*profile.changed_fields, 'updated_at']
 
 
 # --- SIGNALS (Automation) ---
@@ -96,9 +107,23 @@ def create_user_profile(sender, instance, created, **kwargs):
         Profile.objects.get_or_create(user=instance)
 
 @receiver(post_save, sender=CustomUser)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, **kwargs):
     """
     Signal receiver that saves the Profile instance whenever the User is saved.
     Ensures the relationship remains consistent.
+    Only a profile that was loaded through this user and then modified is saved, so
+    routine user saves (e.g. last_login on every login) cost no profile queries.
+    """
+    if created or not CustomUser.profile.is_cached(instance):
+        return
+    if instance.profile.changed_fields:
+        instance.profile.save(update_fields=edited_fields(instance.profile))
+
+
+@receiver(post_save, sender=Profile)
+def schedule_avatar_derivatives(sender, instance, update_fields=None, **kwargs):
+    """
+    New avatars are resized after commit, off the request path (see FactNode/images.py).
     """
-    instance.profile.save()
\ No newline at end of file
+    if saves_any(update_fields, ['avatar']):
+        schedule_derivatives(instance, 'avatar')
@@ -0,0 +1,34 @@
+"""
+Reputation ranks: one table shared by Profile.rank_title, rank-up detection
+(reputation/ledger.py) and the moderation permission.
+"""
+import bisect
+
+# (minimum reputation, title), ascending. Scores below the second threshold are Novices.
+RANKS = (
+    (0, "Novice"),
+    (10, "Curious Mind"),
+    (50, "Researcher"),
+    (200, "Scholar"),
+    (1000, "Professor"),
+)
+
+_THRESHOLDS = [minimum for minimum, _ in RANKS[1:]]
+
+
+def rank_index(score):
+    """Position of the score's rank in RANKS (0 = Novice)."""
+    return bisect.bisect_right(_THRESHOLDS, score)
+
+
+def rank_title(score):
+    return RANKS[rank_index(score)][1]
+
+
+def rank_threshold(title):
+    """Reputation needed to reach a rank."""
+    return next(minimum for minimum, name in RANKS if name == title)
+
+
+# Researchers and above can moderate (facts/permissions.py)
+MODERATOR_MIN_REPUTATION = rank_threshold("Researcher")
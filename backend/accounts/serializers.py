@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Profile
+from FactNode.images import ImageDerivativesField
+from FactNode.middleware import ProfiledSerializerMixin
+from .models import Profile, edited_fields
 
 User = get_user_model()
 
@@ -23,22 +25,33 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         )
         return user
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     Serializer to view and update the user's profile.
     Includes read-only fields for reputation statistics.
     """
     username = serializers.CharField(source='user.username', read_only=True)
     rank_title = serializers.CharField(read_only=True)
+    avatar_derivatives = ImageDerivativesField('avatar')
 
     class Meta:
         model = Profile
         fields = [
-            'username', 'bio', 'location', 'website', 'avatar',
+            'username', 'bio', 'location', 'website', 'avatar', 'avatar_derivatives',
             'reputation_score', 'rank_title',
             'facts_posted_count', 'facts_approved_count'
         ]
         read_only_fields = [
             'reputation_score', 'rank_title',
             'facts_posted_count', 'facts_approved_count'
-        ]
\ No newline at end of file
+        ]
+
+    def update(self, instance, validated_data):
+        """
+        Saves only the edited fields: the counters are changed concurrently by atomic
+        UPDATEs, and a full save would write this instance's (possibly stale) values back.
+        """
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=edited_fields(instance))
+        return instance
\ No newline at end of file
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from .models import Category, Fact, FactSource
 from .choices import FactStatus
+from .moderation import bulk_moderate
 
 
 class FactSourceInline(admin.TabularInline):
@@ -46,12 +47,12 @@ class FactAdmin(admin.ModelAdmin):
 
     @admin.action(description='Mark selected facts as Approved')
     def approve_facts(self, request, queryset):
-        """Bulk action to approve facts."""
-        updated_count = queryset.update(status=FactStatus.APPROVED)
+        """Bulk action to approve facts (same path as the moderation API, so counters stay in sync)."""
+        updated_count = bulk_moderate(queryset, FactStatus.APPROVED, moderator=request.user)
         self.message_user(request, f"{updated_count} facts were successfully approved.")
 
     @admin.action(description='Mark selected facts as Rejected')
     def reject_facts(self, request, queryset):
         """Bulk action to reject facts."""
-        updated_count = queryset.update(status=FactStatus.REJECTED)
+        updated_count = bulk_moderate(queryset, FactStatus.REJECTED, moderator=request.user)
         self.message_user(request, f"{updated_count} facts were rejected.")
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+Async versions of the read-heavy fact endpoints, served under ASGI (see FactNode/async_api.py):
+- GET /api/facts/feed/            FactViewSet.list
+- GET /api/facts/feed/<id>/       FactViewSet.retrieve
+- GET /api/facts/categories/      CategoryViewSet.list
+
+They give the same payloads, ETags and anonymous cache entries as the DRF views (the
+querysets, filters, paginator, serializers and validators are shared), but the queries
+that do not depend on each other are started together: the page rows, the user's votes
+and bookmarks on that page (IN the page's id subquery, so they need not wait for the rows)
+and the category generation for the ETag.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.utils.cache import patch_vary_headers
+from FactNode.async_api import AsyncReadView, fetch, render
+from reputation.models import Vote
+from .cache import (
+    CATEGORY_SCOPE, FEED_SCOPE, aget_generation, etag_matches, lookup_page, make_etag, store_page,
+)
+from .conditional import detail_etag, fact_state, page_etag, validator_values
+from .models import Bookmark, Category
+from .pagination import KeysetPagination
+from .serializers import CategorySerializer, FactSerializer
+from .view_counter import record_view
+from .views import FactViewSet, unpublished_facts, visible_facts
+
+
+def not_modified(etag):
+    response = render(None, 304, {'ETag': etag})
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def with_etag(response, etag):
+    if etag:
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def cached_response(request, cached):
+    """A hit of the anonymous list cache (AnonymousListCacheMixin)."""
+    etag = cached['etag']
+    if etag and etag_matches(request, etag):
+        response = not_modified(etag)
+    else:
+        response = with_etag(render(cached['data']), etag)
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+async def user_state(user, fact_ids):
+    """The serializer context entries for the user's votes and bookmarks on these facts."""
+    if not user.is_authenticated:
+        return {}
+    user_votes, bookmarked_ids = await asyncio.gather(
+        fetch(dict, Vote.objects.filter(user=user, fact_id__in=fact_ids).values_list('fact_id', 'vote_type')),
+        fetch(set, Bookmark.objects.filter(user=user, fact_id__in=fact_ids).values_list('fact_id', flat=True)),
+    )
+    return {'user_votes': user_votes, 'bookmarked_ids': bookmarked_ids}
+
+
+class FactListView(AsyncReadView):
+    """The feed: keyset-paginated, filtered, cached for anonymous users."""
+
+    async def read(self, request):
+        if request.user.is_authenticated:
+            return await self.page(request)
+
+        key, cached = await sync_to_async(lookup_page)(FEED_SCOPE, request)
+        if cached is not None:
+            return cached_response(request, cached)
+        response = await self.page(request)
+        if response.status_code == 200:
+            await sync_to_async(store_page)(key, response.data, response.get('ETag'))
+        response['X-Cache'] = 'MISS'
+        return response
+
+    async def page(self, request):
+        user = request.user
+        include_own = user.is_authenticated and await unpublished_facts(user).aexists()
+        # The viewset's filter backends (?category__slug=, ?search=, ?ordering=) build the queryset
+        view = FactViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+        queryset = view.filter_queryset(visible_facts(user, include_own))
+
+        paginator = KeysetPagination()
+        page_queryset = paginator.get_page_queryset(queryset, request)
+        size = paginator.page_size + 1
+
+        if request.headers.get('If-None-Match'):
+            rows, generation = await asyncio.gather(
+                fetch(list, validator_values(page_queryset, user)[:size]),
+                aget_generation(CATEGORY_SCOPE),
+            )
+            etag = page_etag(user, generation, rows[:paginator.page_size], len(rows) > paginator.page_size)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+        rows, state, generation = await asyncio.gather(
+            fetch(list, page_queryset[:size]),
+            user_state(user, page_queryset.values('pk')[:size]),
+            aget_generation(CATEGORY_SCOPE),
+        )
+        page = paginator.set_page(rows)
+        serializer = FactSerializer(page, many=True, context={'request': request, 'view': view, 'format': None, **state})
+        data = {'next': paginator.get_next_link(), 'results': serializer.data}
+
+        states = [fact_state(fact, item, user) for fact, item in zip(page, serializer.data)]
+        response = with_etag(render(data), page_etag(user, generation, states, paginator.has_next))
+        response.data = data
+        return response
+
+
+class FactDetailView(AsyncReadView):
+    """One fact; counts the view like FactViewSet.retrieve."""
+
+    async def read(self, request, pk):
+        user = request.user
+        queryset = visible_facts(user, include_own=user.is_authenticated).filter(pk=pk)
+
+        if request.headers.get('If-None-Match'):
+            state, generation = await asyncio.gather(
+                fetch(validator_values(queryset, user).first),
+                aget_generation(CATEGORY_SCOPE),
+            )
+            if state is not None:
+                etag = detail_etag(user, generation, state)
+                if etag_matches(request, etag):
+                    # Still a view, even if the client renders it from its own cache
+                    await sync_to_async(record_view)(request, state[0])
+                    return not_modified(etag)
+
+        fact, state, generation = await asyncio.gather(
+            fetch(queryset.first),
+            user_state(user, [pk]),
+            aget_generation(CATEGORY_SCOPE),
+        )
+        if fact is None:
+            raise Http404("No Fact matches the given query.")
+        # Buffered: no database write on the request path
+        await sync_to_async(record_view)(request, fact.pk)
+
+        data = FactSerializer(fact, context={'request': request, 'format': None, **state}).data
+        return with_etag(render(data), detail_etag(user, generation, fact_state(fact, data, user)))
+
+
+class CategoryListView(AsyncReadView):
+    """Categories, with the generation ETag and the anonymous cache of CategoryViewSet."""
+
+    async def read(self, request):
+        etag = make_etag(CATEGORY_SCOPE, await aget_generation(CATEGORY_SCOPE))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        key = None
+        if not request.user.is_authenticated:
+            key, cached = await sync_to_async(lookup_page)(CATEGORY_SCOPE, request)
+            if cached is not None:
+                return with_etag(cached_response(request, cached), etag)
+
+        categories = await fetch(list, Category.objects.all())
+        data = CategorySerializer(categories, many=True).data
+        response = with_etag(render(data), etag)
+        if key is not None:
+            await sync_to_async(store_page)(key, data, None)
+            response['X-Cache'] = 'MISS'
+        return response
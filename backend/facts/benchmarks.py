@@ -0,0 +1,350 @@
+"""
+Reproducible benchmarks for the API hot paths (run with `manage.py run_benchmarks`).
+
+1. seed_database() fills an empty database with a deterministic data set (fixed random
+   seed, configurable sizes) with the bulk generator from facts/fake_data.py.
+2. run_suite() sends every benchmark case through the full Django/DRF stack with the
+   test client, and reports latency percentiles (p50 / p95 / p99), queries per request
+   and peak Python memory per request.
+
+Timed iterations are not instrumented. Queries and memory are measured on one extra,
+separate request per case, so the instrumentation does not skew the latencies.
+
+3. run_concurrency() (`manage.py run_concurrency_benchmark`) compares the servers instead of
+   the endpoints: many concurrent clients, each slow to read its responses, against
+   - 'wsgi': WSGIHandler in a fixed pool of threads, like a threaded WSGI server. A worker
+     stays busy until its client has read the whole response,
+   - 'asgi-sync': the ASGI handler with the regular urlconf (every DRF view in a thread),
+   - 'asgi-async': the ASGI handler with ASGI_ROOT_URLCONF (FactNode/asgi.py), where the
+     feed, fact detail, categories and notifications are native async views.
+   The handlers are called directly (no sockets), so only Django and the database are measured.
+"""
+import asyncio
+import math
+import platform
+import subprocess
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from FactNode.asgi import FactNodeASGIHandler
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import Profile
+from reputation.choices import VoteType
+from .choices import FactStatus
+from .fake_data import FakeDataGenerator, WORDS
+from .models import Category, Fact
+
+User = get_user_model()
+
+DEFAULT_SIZES = {
+    'users': 200,
+    'categories': 12,
+    'facts': 5000,
+    'votes': 20000,
+    'bookmarks': 2000,
+    'notifications': 5000,
+}
+
+# The first generated user, given enough reputation to moderate
+BENCHMARK_PREFIX = 'bench'
+BENCHMARK_USER = f'{BENCHMARK_PREFIX}0'
+
+
+def seed_database(sizes=None, seed=0, zipf=1.1):
+    """
+    Inserts the benchmark data set (see facts/fake_data.py). The same sizes and seed
+    always give the same rows.
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    FakeDataGenerator(sizes, seed=seed, zipf=zipf, prefix=BENCHMARK_PREFIX, batch_size=1000).run()
+
+    # Whatever the generated votes gave them, the benchmark user must be able to moderate
+    Profile.objects.filter(user__username=BENCHMARK_USER).update(reputation_score=500)
+    return sizes
+
+
+# --- Benchmark cases ---
+
+class BenchmarkCase:
+    """
+    One endpoint to time. `path` may be a callable taking the iteration number,
+    so write benchmarks can target a different fact on every request.
+    """
+
+    def __init__(self, name, path, method='get', data=None, authenticated=True):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.authenticated = authenticated
+
+    def request(self, client, iteration):
+        path = self.path(iteration) if callable(self.path) else self.path
+        data = self.data(iteration) if callable(self.data) else self.data
+        if self.method == 'post':
+            return client.post(path, data, format='json')
+        return client.get(path, data)
+
+
+def default_cases():
+    approved = list(
+        Fact.objects.filter(status=FactStatus.APPROVED).order_by('-hot_score').values_list('id', flat=True)[:100]
+    )
+    category = Category.objects.order_by('pk').values_list('slug', flat=True).first()
+    term = WORDS[0]
+
+    def fact_path(suffix=''):
+        return lambda i: f'/api/facts/feed/{approved[i % len(approved)]}/{suffix}'
+
+    return [
+        BenchmarkCase('feed_list', '/api/facts/feed/'),
+        BenchmarkCase('feed_list_anonymous', '/api/facts/feed/', authenticated=False),
+        BenchmarkCase('feed_search', f'/api/facts/feed/?search={term}'),
+        BenchmarkCase('feed_filter_category', f'/api/facts/feed/?category__slug={category}'),
+        BenchmarkCase('feed_order_hot', '/api/facts/feed/?ordering=-hot_score'),
+        BenchmarkCase('feed_order_top', '/api/facts/feed/?ordering=-upvotes_count'),
+        BenchmarkCase('fact_detail', fact_path()),
+        BenchmarkCase(
+            'cast_vote',
+            lambda i: f'/api/reputation/votes/{approved[i % len(approved)]}/cast_vote/',
+            method='post',
+            # Alternating directions: a mix of new votes and flips
+            data=lambda i: {'vote_type': VoteType.UPVOTE if (i // len(approved)) % 2 == 0 else VoteType.DOWNVOTE},
+        ),
+        BenchmarkCase('bookmark_toggle', fact_path('bookmark/'), method='post'),
+        BenchmarkCase('moderation_queue', '/api/facts/moderation/'),
+        BenchmarkCase('notifications_list', '/api/notifications/'),
+    ]
+
+
+# --- Measurement ---
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def run_case(case, user, iterations, warmup):
+    client = APIClient()
+    if case.authenticated:
+        # A real token, so every request pays for authentication like it does in production
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    for i in range(warmup):
+        case.request(client, i)
+
+    timings = []
+    status_codes = set()
+    for i in range(warmup, warmup + iterations):
+        start = time.perf_counter()
+        response = case.request(client, i)
+        timings.append((time.perf_counter() - start) * 1000)
+        status_codes.add(response.status_code)
+    timings.sort()
+
+    # One instrumented request for queries, memory and payload size
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as ctx:
+            response = case.request(client, warmup + iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'iterations': iterations,
+        'status_codes': sorted(status_codes),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'queries_per_request': len(ctx.captured_queries),
+        'peak_memory_kib': round(peak / 1024, 1),
+        'response_bytes': len(response.content),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(cases=None, iterations=200, warmup=20, only=None, sizes=None, seed=None):
+    """
+    Runs the cases against the current database and returns a JSON-serializable report.
+    """
+    user = User.objects.get(username=BENCHMARK_USER)
+    cases = cases if cases is not None else default_cases()
+    results = {
+        case.name: run_case(case, user, iterations, warmup)
+        for case in cases
+        if not only or case.name in only
+    }
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'sizes': sizes,
+            'seed': seed,
+            'iterations': iterations,
+            'warmup': warmup,
+        },
+        'results': results,
+    }
+
+
+# --- Concurrency: WSGI vs ASGI ---
+
+SERVER_MODES = ('wsgi', 'asgi-sync', 'asgi-async')
+
+
+def concurrency_paths():
+    """The endpoints that have an async view, the same set for every mode."""
+    approved = list(
+        Fact.objects.filter(status=FactStatus.APPROVED).order_by('-hot_score').values_list('id', flat=True)[:20]
+    )
+    return [
+        '/api/facts/feed/',
+        *[f'/api/facts/feed/{pk}/' for pk in approved[:4]],
+        '/api/facts/categories/',
+        '/api/notifications/',
+    ]
+
+
+def _serve_wsgi(handler, environ, client_delay):
+    """One request on a worker thread, which is held while the slow client reads."""
+    status = []
+    response = handler(dict(environ), lambda code, headers, exc_info=None: status.append(code))
+    try:
+        for _ in response:
+            pass
+        time.sleep(client_delay)
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+def _asgi_scope(path, token):
+    scope = AsyncRequestFactory().get(path).scope
+    scope['headers'] = [*scope['headers'], (b'authorization', token.encode())]
+    return scope
+
+
+async def _serve_asgi(application, scope, client_delay):
+    status = []
+    request_sent = asyncio.Event()
+
+    async def receive():
+        if not request_sent.is_set():
+            request_sent.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; the handler cancels this once it has responded
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif not message.get('more_body'):
+            await asyncio.sleep(client_delay)
+
+    await application(dict(scope), receive, send)
+    return status[0]
+
+
+async def _load(serve, requests, clients, per_client):
+    """`clients` concurrent clients sending `per_client` requests each, one after another."""
+    timings, status_codes = [], {}
+
+    async def client(number):
+        for i in range(per_client):
+            start = time.perf_counter()
+            code = await serve(requests[(number + i) % len(requests)])
+            timings.append((time.perf_counter() - start) * 1000)
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(number) for number in range(clients)])
+    return time.perf_counter() - start, sorted(timings), status_codes
+
+
+def run_mode(mode, paths, token, clients, per_client, client_delay, threads):
+    if mode == 'wsgi':
+        handler = WSGIHandler()
+        environs = [RequestFactory(HTTP_AUTHORIZATION=token).get(path).environ for path in paths]
+        pool = ThreadPoolExecutor(max_workers=threads)
+
+        async def serve(environ):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, _serve_wsgi, handler, environ, client_delay)
+
+        try:
+            elapsed, timings, status_codes = asyncio.run(_load(serve, environs, clients, per_client))
+        finally:
+            pool.shutdown()
+    else:
+        application = FactNodeASGIHandler()
+        scopes = [_asgi_scope(path, token) for path in paths]
+        urlconf = settings.ROOT_URLCONF if mode == 'asgi-sync' else settings.ASGI_ROOT_URLCONF
+
+        async def serve(scope):
+            return await _serve_asgi(application, scope, client_delay)
+
+        with override_settings(ASGI_ROOT_URLCONF=urlconf):
+            elapsed, timings, status_codes = asyncio.run(_load(serve, scopes, clients, per_client))
+
+    return {
+        'requests': len(timings),
+        'status_codes': {str(code): count for code, count in sorted(status_codes.items())},
+        'throughput_rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def run_concurrency(modes=SERVER_MODES, clients=100, per_client=5, client_delay=0.05, threads=8):
+    """
+    Runs the same load against every mode and returns a JSON-serializable report.
+    `client_delay` is the seconds a client takes to read each response.
+    """
+    user = User.objects.get(username=BENCHMARK_USER)
+    token = f'Bearer {AccessToken.for_user(user)}'
+    paths = concurrency_paths()
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'clients': clients,
+            'requests_per_client': per_client,
+            'client_delay_s': client_delay,
+            'wsgi_threads': threads,
+            'paths': paths,
+        },
+        'results': {
+            mode: run_mode(mode, paths, token, clients, per_client, client_delay, threads)
+            for mode in modes
+        },
+    }
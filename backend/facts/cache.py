@@ -0,0 +1,169 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+# Each scope has its own generation counter. Bumping it makes every key built
+# with the old generation unreachable, so nothing has to be scanned or deleted:
+# stale pages simply age out of the backend.
+FEED_SCOPE = 'feed'
+CATEGORY_SCOPE = 'categories'
+
+
+def get_cache():
+    return caches[getattr(settings, 'FEED_CACHE_ALIAS', 'default')]
+
+
+def _generation_key(scope):
+    return f'factnode:{scope}:generation'
+
+
+def get_generation(scope):
+    cache = get_cache()
+    generation = cache.get(_generation_key(scope))
+    if generation is None:
+        # add() is a no-op if another worker initialised the counter first
+        cache.add(_generation_key(scope), 1, timeout=None)
+        generation = cache.get(_generation_key(scope), 1)
+    return generation
+
+
+async def aget_generation(scope):
+    """get_generation() for async views (facts/async_views.py)."""
+    cache = get_cache()
+    generation = await cache.aget(_generation_key(scope))
+    if generation is None:
+        await cache.aadd(_generation_key(scope), 1, timeout=None)
+        generation = await cache.aget(_generation_key(scope), 1)
+    return generation
+
+
+def bump_generation(scope):
+    """
+    Invalidates every cached response for the scope. Called from signal receivers.
+    """
+    cache = get_cache()
+    try:
+        cache.incr(_generation_key(scope))
+    except ValueError:
+        # Counter was evicted (or never created): start a fresh one
+        cache.set(_generation_key(scope), 1, timeout=None)
+
+
+def build_key(scope, request):
+    """
+    Key = scope + generation + hash of the host and every query parameter
+    (filters, search, ordering and cursor).
+    """
+    params = sorted(
+        (name, sorted(values)) for name, values in request.query_params.lists()
+    )
+    raw = f'{request.get_host()}{request.path}?{params}'
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    # "page": entries are {'data', 'etag'} dicts (older entries held the bare data)
+    return f'factnode:{scope}:{get_generation(scope)}:page:{digest}'
+
+
+def lookup_page(scope, request):
+    """(key, cached entry or None) of an anonymous list request; counts the hit or miss."""
+    key = build_key(scope, request)
+    cached = get_cache().get(key)
+    record(scope, hit=cached is not None)
+    return key, cached
+
+
+def store_page(key, data, etag):
+    get_cache().set(key, {'data': data, 'etag': etag}, getattr(settings, 'FEED_CACHE_TIMEOUT', 300))
+
+
+def record(scope, hit):
+    cache = get_cache()
+    key = f'factnode:{scope}:{"hits" if hit else "misses"}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_stats():
+    cache = get_cache()
+    stats = {}
+    for scope in (FEED_SCOPE, CATEGORY_SCOPE):
+        hits = cache.get(f'factnode:{scope}:hits', 0)
+        misses = cache.get(f'factnode:{scope}:misses', 0)
+        total = hits + misses
+        stats[scope] = {
+            'generation': get_generation(scope),
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else None,
+        }
+    return stats
+
+
+# --- Conditional GET helpers (see conditional.py) ---
+
+def make_etag(*parts):
+    """Weak ETag: it identifies the data of a representation, not its exact bytes."""
+    return 'W/"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    tags = parse_etags(header)
+    # Weak comparison (RFC 9110 13.1.2): W/ prefixes are ignored
+    return '*' in tags or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in tags]
+
+
+def not_modified(etag):
+    response = Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    # Per-user fields (votes, bookmarks, own drafts) depend on the token
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def set_etag(response, etag):
+    if response.status_code == status.HTTP_200_OK:
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class AnonymousListCacheMixin:
+    """
+    Serves list() for anonymous users from the cache.
+    Authenticated users see per-user fields (votes, bookmarks, own drafts),
+    so they always go to the database.
+    The ETag of the page is cached with it, so a matching If-None-Match on a hit is
+    answered with 304 without touching the database.
+    """
+    cache_scope = FEED_SCOPE
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        key, cached = lookup_page(self.cache_scope, request)
+        if cached is not None:
+            etag = cached['etag']
+            if etag and etag_matches(request, etag):
+                response = not_modified(etag)
+            else:
+                response = Response(cached['data'])
+                if etag:
+                    set_etag(response, etag)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            store_page(key, response.data, response.get('ETag'))
+        response['X-Cache'] = 'MISS'
+        return response
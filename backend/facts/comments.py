@@ -0,0 +1,79 @@
+"""
+Threaded comments, stored as a materialized path (Comment.root, path and depth).
+
+A path is the comment's ancestors' ids plus its own, as fixed-width base-36 segments, so
+sorting a thread by path gives display order (depth first, replies oldest first). Reads
+never recurse level by level:
+- a whole thread or subtree is ONE query, `root_id = X AND path LIKE 'prefix%' ORDER BY path`,
+  an index range scan on comment_thread_path_idx;
+- a comment section page is one keyset-paginated query for the top-level comments of
+  the fact (comment_fact_created_idx), plus ONE query for the first N replies of every
+  thread on the page: ROW_NUMBER() OVER (PARTITION BY root_id ORDER BY path) <= N.
+build_tree() then nests the flat, path-ordered rows in Python.
+"""
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from .models import Comment
+
+
+def subtree(comment):
+    """The comment and all of its replies, in display order."""
+    return (
+        Comment.objects.filter(root_id=comment.root_id, path__startswith=comment.path)
+        .select_related('author')
+        .order_by('path')
+    )
+
+
+def build_tree(comments):
+    """
+    Nests path-ordered comments through `thread_children`; returns the ones whose parent
+    is not in the list. Any prefix of a thread in path order contains every ancestor of
+    its rows, so truncated previews nest correctly too.
+    """
+    nodes = {}
+    top = []
+    for comment in comments:
+        comment.thread_children = []
+        nodes[comment.pk] = comment
+        parent = nodes.get(comment.parent_id)
+        if parent is not None:
+            parent.thread_children.append(comment)
+        else:
+            top.append(comment)
+    return top
+
+
+def attach_reply_previews(roots, limit):
+    """
+    Loads the first `limit` replies of every thread in `roots` with a single query and
+    sets `thread_children` (nested) and `more_replies` (replies not loaded) on each root.
+    """
+    by_id = {root.pk: root for root in roots}
+    for root in roots:
+        root.thread_children = []
+        root.more_replies = 0
+    if not by_id:
+        return roots
+
+    replies = (
+        Comment.objects.filter(root_id__in=by_id, depth__gt=0)
+        .annotate(
+            position=Window(RowNumber(), partition_by=F('root_id'), order_by=F('path').asc()),
+            thread_size=Window(Count('id'), partition_by=F('root_id')),
+        )
+        .filter(position__lte=max(limit, 1))
+        .select_related('author')
+        .order_by('path')
+    )
+    threads = {}
+    for reply in replies:
+        threads.setdefault(reply.root_id, []).append(reply)
+
+    for root_id, rows in threads.items():
+        root = by_id[root_id]
+        shown = rows[:limit]
+        # Nest under the root: previews are a prefix of the thread in path order
+        root.thread_children = build_tree([root] + shown)[0].thread_children
+        root.more_replies = rows[0].thread_size - len(shown)
+    return roots
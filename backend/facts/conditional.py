@@ -0,0 +1,135 @@
+"""
+Conditional GET (ETag / If-None-Match) for facts and categories.
+
+Validators are built from a few narrow columns, never from the serialized payload, so a
+matching request is answered with 304 before serialization and, where possible, before
+the full rows are loaded:
+- categories: the CATEGORY_SCOPE generation counter (no database access at all),
+- fact detail: one narrow query (updated_at, net score, status, author, plus the
+  user's vote and bookmark for authenticated users),
+- feed pages: the same columns for the rows of the page, read by a narrow "probe"
+  query. The probe only runs when the client sent If-None-Match; otherwise the ETag
+  comes from the page that is loaded anyway.
+Anonymous feed pages keep their ETag next to the cached payload (see cache.py), so
+revalidating them is a single cache lookup.
+
+Vote and comment counters change with a plain UPDATE that does not touch updated_at,
+which is why the validators carry net_score and comments_count, and there is no
+Last-Modified header (it would give stale 304s after votes).
+"""
+from django.db.models import Exists, OuterRef, Subquery
+from rest_framework.response import Response
+from reputation.models import Vote
+from .cache import CATEGORY_SCOPE, get_generation, make_etag, etag_matches, not_modified, set_etag
+from .models import Bookmark
+from .view_counter import record_view
+
+# Columns that, together with the user's own vote/bookmark, determine a serialized fact
+VALIDATOR_FIELDS = (
+    'id', 'updated_at', 'net_score', 'comments_count', 'status', 'author__username', 'author__is_verified'
+)
+
+
+def validator_values(queryset, user):
+    """values_list() of the validator columns (plus the user's vote and bookmark)."""
+    if not user.is_authenticated:
+        return queryset.values_list(*VALIDATOR_FIELDS)
+    return queryset.annotate(
+        etag_vote=Subquery(Vote.objects.filter(user=user, fact=OuterRef('pk')).values('vote_type')[:1]),
+        etag_bookmarked=Exists(Bookmark.objects.filter(user=user, fact=OuterRef('pk'))),
+    ).values_list(*VALIDATOR_FIELDS, 'etag_vote', 'etag_bookmarked')
+
+
+def fact_state(fact, data, user):
+    """The same tuple as a validator_values() row, from a loaded fact and its serialized data."""
+    # str(): a freshly saved instance may still hold the choices enum instead of its value
+    row = (
+        fact.pk, fact.updated_at, fact.net_score, fact.comments_count, str(fact.status),
+        fact.author.username, fact.author.is_verified,
+    )
+    if user.is_authenticated:
+        vote = data['user_vote']
+        row += (str(vote) if vote is not None else None, bool(data['is_bookmarked']))
+    return row
+
+
+def page_etag(user, category_generation, rows, has_next):
+    # Category names/icons are part of every row's payload
+    return make_etag('feed', user_key(user), category_generation, has_next, rows)
+
+
+def detail_etag(user, category_generation, state):
+    return make_etag('fact', user_key(user), category_generation, state)
+
+
+def user_key(user):
+    return user.pk if user.is_authenticated else None
+
+
+class ConditionalFactMixin:
+    """
+    ETag support for FactViewSet.list() (keyset-paginated feed) and retrieve().
+    """
+
+    def page_etag(self, rows, has_next):
+        return page_etag(self.request.user, get_generation(CATEGORY_SCOPE), rows, has_next)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+
+        if request.headers.get('If-None-Match'):
+            page_size = paginator.page_size
+            rows = list(validator_values(paginator.get_page_queryset(queryset, request), request.user)[:page_size + 1])
+            etag = self.page_etag(rows[:page_size], len(rows) > page_size)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        rows = [fact_state(fact, data, request.user) for fact, data in zip(page, serializer.data)]
+        return set_etag(response, self.page_etag(rows, paginator.has_next))
+
+    def detail_etag(self, state):
+        return detail_etag(self.request.user, get_generation(CATEGORY_SCOPE), state)
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.headers.get('If-None-Match'):
+            lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+            state = validator_values(self.get_queryset().filter(**lookup), request.user).first()
+            if state is not None:
+                etag = self.detail_etag(state)
+                if etag_matches(request, etag):
+                    # Still a view, even if the client renders it from its own cache
+                    record_view(request, state[0])
+                    return not_modified(etag)
+
+        instance = self.get_object()
+        # Buffered: no database write on the request path
+        record_view(request, instance.pk)
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        return set_etag(response, self.detail_etag(fact_state(instance, serializer.data, request.user)))
+
+
+class GenerationETagMixin:
+    """
+    ETag = the cache generation of `cache_scope`, so revalidation never touches the database.
+    Used for categories, which are bumped by the Category signal receivers.
+    """
+
+    def generation_etag(self):
+        return make_etag(self.cache_scope, get_generation(self.cache_scope))
+
+    def list(self, request, *args, **kwargs):
+        etag = self.generation_etag()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return set_etag(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        etag = self.generation_etag()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return set_etag(super().retrieve(request, *args, **kwargs), etag)
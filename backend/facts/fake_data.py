@@ -0,0 +1,291 @@
+"""
+Streaming synthetic data generator (`manage.py generate_fake_data`, also used to seed the benchmarks).
+
+Built for millions of rows:
+- Rows are produced by generators and inserted with one bulk_create per batch, so only
+  one batch of model instances is alive at a time. Across batches the generator keeps
+  only compact id arrays (8 bytes per row).
+- bulk_create sends no pre_save/post_save signals, so none of the receivers in
+  facts/signals.py, reputation/signals.py or accounts/models.py run per row.
+- Instead, finalize() sets every denormalized value in aggregate passes: it runs
+  reconcile_counters and rebuild_search_index, and uses one UPDATE for the unread
+  notification counters.
+- Votes, bookmarks and notification targets follow a Zipf distribution over the approved
+  facts, so a few hot facts collect most of the activity (exponent 0 = uniform).
+"""
+import bisect
+import random
+from array import array
+from io import StringIO
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from accounts.models import Profile
+from notifications.choices import NotificationType
+from notifications.models import Notification
+from reputation.choices import VoteType, ReputationAction
+from reputation.models import Vote, ReputationLog
+from reputation.ledger import VOTE_REPUTATION
+from . import ranking
+from .cache import bump_generation, FEED_SCOPE
+from .choices import FactStatus
+from .models import Bookmark, Category, Fact
+
+User = get_user_model()
+
+DEFAULT_SIZES = {
+    'users': 1000,
+    'categories': 12,
+    'facts': 20000,
+    'votes': 200000,
+    'bookmarks': 20000,
+    'notifications': 50000,
+}
+
+WORDS = (
+    'ocean light planet brain octopus honey volcano galaxy neuron glacier desert atom '
+    'comet forest river bacteria whale lightning diamond moon crystal storm gravity '
+    'ancient island tree mountain signal memory spider battery magnet orbit fossil'
+).split()
+
+# Status mix of generated facts: mostly live, with a moderation backlog
+STATUS_WEIGHTS = {FactStatus.APPROVED: 80, FactStatus.PENDING: 15, FactStatus.REJECTED: 5}
+UPVOTE_RATIO = 0.8
+READ_RATIO = 0.5
+
+
+class ZipfSampler:
+    """
+    Draws ranks 0..n-1 with P(rank) proportional to 1 / (rank + 1) ** exponent.
+    Uses a cumulative weight table (8 bytes per rank) and a binary search per draw.
+    """
+
+    def __init__(self, n, exponent, rng):
+        self.n = n
+        self.rng = rng
+        self.cumulative = None
+        if exponent and n:
+            self.cumulative = array('d')
+            total = 0.0
+            for rank in range(n):
+                total += 1 / (rank + 1) ** exponent
+                self.cumulative.append(total)
+
+    def sample(self):
+        if self.cumulative is None:
+            return self.rng.randrange(self.n)
+        point = self.rng.random() * self.cumulative[-1]
+        return min(bisect.bisect_left(self.cumulative, point), self.n - 1)
+
+    def distinct(self, k):
+        """k different ranks (for one user's votes or bookmarks)."""
+        k = min(k, self.n)
+        chosen = set()
+        attempts = 0
+        while len(chosen) < k and attempts < 10 * k + 100:
+            chosen.add(self.sample())
+            attempts += 1
+        # Very skewed and k close to n: top up with the least popular ranks left
+        rank = self.n - 1
+        while len(chosen) < k:
+            chosen.add(rank)
+            rank -= 1
+        return chosen
+
+
+def insert_in_batches(model, objects, batch_size, on_batch=None):
+    """
+    Consumes a generator of unsaved instances, one bulk INSERT per batch.
+    on_batch(batch) runs after each insert (primary keys are set by then).
+    """
+    total = 0
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return total
+        model.objects.bulk_create(batch)
+        if on_batch:
+            on_batch(batch)
+        total += len(batch)
+
+
+def _split(total, parts):
+    """Splits `total` into `parts` integers that differ by at most one."""
+    base, extra = divmod(total, parts) if parts else (0, 0)
+    return (base + (1 if index < extra else 0) for index in range(parts))
+
+
+class FakeDataGenerator:
+    """
+    Generates one data set. The same sizes, seed and zipf exponent give the same rows
+    (apart from timestamps and primary key values).
+    """
+
+    def __init__(self, sizes=None, seed=0, zipf=1.1, prefix='fake', batch_size=5000, stdout=None):
+        self.sizes = {**DEFAULT_SIZES, **(sizes or {})}
+        self.rng = random.Random(seed)
+        self.zipf = zipf
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.stdout = stdout
+
+        self.user_ids = array('q')
+        self.category_ids = array('q')
+        # Approved facts, in popularity order once shuffled
+        self.fact_ids = array('q')
+        self.fact_authors = array('q')
+
+    def log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize()
+
+    # --- Row generators ---
+
+    def users(self):
+        password = make_password(None)  # Unusable: generated accounts cannot log in
+        for index in range(self.sizes['users']):
+            yield User(
+                username=f'{self.prefix}{index}',
+                email=f'{self.prefix}{index}@example.com',
+                password=password,
+                is_verified=True,
+            )
+
+    def categories(self):
+        for index in range(self.sizes['categories']):
+            yield Category(name=f'{self.prefix.title()} category {index}', slug=f'{self.prefix}-category-{index}')
+
+    def facts(self):
+        if not self.user_ids or not self.category_ids:
+            return
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        # Time term of the hot score; votes are added by the final reconcile pass
+        hot_score = ranking.hot_score(0, 0, timezone.now())
+        for index in range(self.sizes['facts']):
+            yield Fact(
+                title=self.sentence(6),
+                slug=f'{self.prefix}-fact-{index}',
+                content=self.sentence(60),
+                author_id=self.rng.choice(self.user_ids),
+                category_id=self.rng.choice(self.category_ids),
+                status=self.rng.choices(statuses, weights)[0],
+                hot_score=hot_score,
+            )
+
+    def _per_user(self, total):
+        """(user_id, ranks of the facts they act on), one user at a time."""
+        if not self.fact_ids:
+            return
+        sampler = ZipfSampler(len(self.fact_ids), self.zipf, self.rng)
+        for user_id, count in zip(self.user_ids, _split(total, len(self.user_ids))):
+            yield user_id, sorted(sampler.distinct(count))
+
+    def votes(self):
+        for user_id, ranks in self._per_user(self.sizes['votes']):
+            for rank in ranks:
+                vote = Vote(
+                    user_id=user_id,
+                    fact_id=self.fact_ids[rank],
+                    vote_type=VoteType.UPVOTE if self.rng.random() < UPVOTE_RATIO else VoteType.DOWNVOTE,
+                )
+                vote.author_id = self.fact_authors[rank]
+                yield vote
+
+    def bookmarks(self):
+        for user_id, ranks in self._per_user(self.sizes['bookmarks']):
+            for rank in ranks:
+                yield Bookmark(user_id=user_id, fact_id=self.fact_ids[rank])
+
+    def notifications(self):
+        if not self.fact_ids or not self.user_ids:
+            return
+        fact_type = ContentType.objects.get_for_model(Fact)
+        sampler = ZipfSampler(len(self.fact_ids), self.zipf, self.rng)
+        for _ in range(self.sizes['notifications']):
+            yield Notification(
+                recipient_id=self.rng.choice(self.user_ids),
+                type=NotificationType.FACT_APPROVED,
+                title="Fact Approved!",
+                message=self.sentence(12),
+                content_type=fact_type,
+                object_id=self.fact_ids[sampler.sample()],
+                is_read=self.rng.random() < READ_RATIO,
+            )
+
+    # --- Batch callbacks ---
+
+    def _users_inserted(self, batch):
+        Profile.objects.bulk_create([Profile(user_id=user.pk) for user in batch])
+        self.user_ids.extend(user.pk for user in batch)
+
+    def _facts_inserted(self, batch):
+        for fact in batch:
+            if fact.status == FactStatus.APPROVED:
+                self.fact_ids.append(fact.pk)
+                self.fact_authors.append(fact.author_id)
+
+    def _votes_inserted(self, batch):
+        # The audit trail that Profile.reputation_score is recomputed from
+        ReputationLog.objects.bulk_create([
+            ReputationLog(
+                user_id=vote.author_id,
+                action=ReputationAction.VOTE_RECEIVED,
+                score_change=VOTE_REPUTATION[vote.vote_type],
+                related_fact_id=vote.fact_id,
+            )
+            for vote in batch if vote.author_id != vote.user_id
+        ])
+
+    def _shuffle_popularity(self):
+        """Popularity rank -> fact, so the hot facts are spread over time and authors."""
+        order = array('q', range(len(self.fact_ids)))
+        self.rng.shuffle(order)
+        self.fact_ids = array('q', (self.fact_ids[index] for index in order))
+        self.fact_authors = array('q', (self.fact_authors[index] for index in order))
+
+    # --- Driver ---
+
+    def run(self, workers=1):
+        batch_size = self.batch_size
+        steps = [
+            ('users', User, self.users, self._users_inserted),
+            ('categories', Category, self.categories, lambda batch: self.category_ids.extend(c.pk for c in batch)),
+            ('facts', Fact, self.facts, self._facts_inserted),
+            ('votes', Vote, self.votes, self._votes_inserted),
+            ('bookmarks', Bookmark, self.bookmarks, None),
+            ('notifications', Notification, self.notifications, None),
+        ]
+        counts = {}
+        for name, model, rows, on_batch in steps:
+            if name == 'votes':
+                self._shuffle_popularity()
+            counts[name] = insert_in_batches(model, rows(), batch_size, on_batch)
+            self.log(f"  {name}: {counts[name]}")
+
+        self.finalize(workers)
+        return counts
+
+    def finalize(self, workers=1):
+        """Aggregate passes that make every denormalized value match the inserted rows."""
+        self.log("  recomputing counters, scores, the search index and leaderboards...")
+        call_command('reconcile_counters', workers=workers, stdout=StringIO())
+        call_command('rebuild_search_index', stdout=StringIO())
+        call_command('rebuild_leaderboards', stdout=StringIO())
+
+        unread = (
+            Notification.objects.filter(recipient_id=OuterRef('user_id'), is_read=False)
+            .values('recipient_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        Profile.objects.update(unread_notifications_count=Coalesce(Subquery(unread), 0))
+        bump_generation(FEED_SCOPE)
@@ -0,0 +1,60 @@
+import django_filters
+from django.contrib.auth import get_user_model
+from django.db.models import Subquery
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+from .models import Category, Fact
+from .search import get_search_backend
+
+
+class FactFilter(django_filters.FilterSet):
+    """
+    Same ?category__slug= and ?author__username= parameters as a plain filterset_fields list.
+    The slug or username is resolved in an uncorrelated subquery instead of a JOIN, so
+    `category_id = (SELECT ...)` can seek straight into fact_live_category_idx
+    (and author_id into fact_author_created_idx).
+    """
+    category__slug = django_filters.CharFilter(method='filter_category')
+    author__username = django_filters.CharFilter(method='filter_author')
+
+    class Meta:
+        model = Fact
+        fields = ['category__slug', 'author__username']
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(category_id=Subquery(Category.objects.filter(slug=value).values('id')[:1]))
+
+    def filter_author(self, queryset, name, value):
+        users = get_user_model().objects.filter(username=value).values('id')[:1]
+        return queryset.filter(author_id=Subquery(users))
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for DRF's SearchFilter (same ?search= parameter).
+    Uses the database's full-text index instead of LIKE '%term%', and orders
+    results by relevance unless the client asked for an explicit ?ordering=.
+    """
+    search_param = api_settings.SEARCH_PARAM
+    ordering_param = api_settings.ORDERING_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+
+        queryset = get_search_backend().search(queryset, term)
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            queryset = queryset.order_by('-search_rank')
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.search_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Full-text search on title and content (ranked).',
+                'schema': {'type': 'string'},
+            },
+        ]
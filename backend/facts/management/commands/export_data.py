@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from facts import export
+
+
+class Command(BaseCommand):
+    """
+    Dumps facts, sources, votes and reputation logs to NDJSON or CSV files, streaming
+    (see facts/export.py): memory use does not depend on the table sizes.
+
+        python manage.py export_data --format csv --gzip --output-dir dumps/
+        python manage.py export_data votes --since 2025-06-01T00:00:00Z
+    """
+    help = 'Stream full (or incremental, with --since) table dumps to NDJSON or CSV files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('datasets', nargs='*', help=f"Datasets to export: {', '.join(export.DATASETS)} (default: all).")
+        parser.add_argument('--format', choices=export.FORMATS, default='ndjson')
+        parser.add_argument('--since', help='Only rows changed at or after this ISO date/datetime.')
+        parser.add_argument('--gzip', action='store_true', help='Compress the files (.gz).')
+        parser.add_argument('--chunk-size', type=int, default=export.DEFAULT_CHUNK_SIZE, help='Rows per database fetch.')
+        parser.add_argument('--output-dir', default='.', help='Where to write <dataset>.<format>[.gz].')
+
+    def handle(self, *args, **options):
+        unknown = set(options['datasets']) - set(export.DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown datasets: {', '.join(sorted(unknown))}")
+
+        since = None
+        if options['since']:
+            since = export.parse_since(options['since'])
+            if since is None:
+                raise CommandError(f"Invalid --since {options['since']!r}: expected an ISO 8601 date or datetime.")
+
+        output_dir = Path(options['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for dataset in options['datasets'] or export.DATASETS:
+            path = output_dir / export.file_name(dataset, options['format'], options['gzip'])
+            with path.open('wb') as output:
+                for block in export.stream(dataset, options['format'], since, options['gzip'], options['chunk_size']):
+                    output.write(block)
+            self.stdout.write(f"{dataset}: {path} ({path.stat().st_size} bytes)")
+        self.stdout.write(self.style.SUCCESS("Export finished."))
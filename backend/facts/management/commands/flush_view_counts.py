@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from facts.view_counter import flush_view_counts, get_buffer
+
+
+class Command(BaseCommand):
+    """
+    Forces a flush of buffered fact views into Fact.views_count.
+    This needs the Redis buffer, which holds the views recorded by every worker.
+    The in-process (development) buffer lives in each server process and is
+    flushed there every VIEW_COUNT_FLUSH_INTERVAL seconds; this command's own,
+    empty buffer would flush nothing, so it stops with an error instead.
+    """
+    help = 'Write buffered fact view counts to the database now.'
+
+    def handle(self, *args, **options):
+        if not get_buffer().shared:
+            raise CommandError(
+                "Views are buffered in each server process (no Redis cache): "
+                "they are flushed by the server itself, there is nothing to flush from here."
+            )
+        updated = flush_view_counts()
+        self.stdout.write(self.style.SUCCESS(f"Flushed view counts for {updated} facts."))
@@ -0,0 +1,89 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from accounts.models import Profile
+from facts.models import Fact
+from FactNode.images import try_generate, stale_queryset, uploads_queryset
+from FactNode.processes import process_pool
+
+TARGETS = {
+    'facts': (Fact, 'image'),
+    'avatars': (Profile, 'avatar'),
+}
+
+
+def process_chunk(job):
+    """Renders one chunk of rows (module level so a process pool can pickle it)."""
+    model_label, field_name, pks, force = job
+    outcomes = Counter()
+    for pk in pks:
+        result = try_generate(model_label, pk, field_name, force=force)
+        outcomes['failed' if result is None else 'generated' if result else 'skipped'] += 1
+    return outcomes
+
+
+class Command(BaseCommand):
+    """
+    Generates the responsive derivatives (see FactNode/images.py) of Fact.image and
+    Profile.avatar.
+
+    Without options it backfills every upload that has no current derivatives. Rows are
+    split into chunks of --chunk-size and rendered by --workers processes (resizing and
+    encoding are CPU bound). With --loop it keeps polling for new uploads: that is the
+    worker for IMAGE_DERIVATIVES_DISPATCH = 'worker'. It only polls again right away
+    after generating something; uploads that cannot be rendered are marked as failed
+    and not retried. --force re-renders everything, failed uploads included, e.g. after
+    changing IMAGE_DERIVATIVE_SIZES.
+    """
+    help = 'Generate resized WebP/JPEG derivatives of uploaded images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Processes to spread chunks over.')
+        parser.add_argument('--chunk-size', type=int, default=50)
+        parser.add_argument('--force', action='store_true', help='Re-render current derivatives too.')
+        parser.add_argument('--only', choices=sorted(TARGETS), help='Process a single target.')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new uploads.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls with --loop.')
+
+    def handle(self, *args, **options):
+        names = [options['only']] if options['only'] else list(TARGETS)
+
+        while True:
+            generated = 0
+            for name in names:
+                model, field_name = TARGETS[name]
+                queryset = uploads_queryset(model, field_name) if options['force'] else stale_queryset(model, field_name)
+                pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+                size = options['chunk_size']
+                jobs = [
+                    (model._meta.label, field_name, pks[start:start + size], options['force'])
+                    for start in range(0, len(pks), size)
+                ]
+                outcomes = self.run_jobs(jobs, options['workers'])
+                generated += outcomes['generated']
+
+                if pks or not options['loop']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"{name}: {outcomes['generated']} generated, {outcomes['skipped']} skipped, "
+                        f"{outcomes['failed']} failed across {len(jobs)} chunks."
+                    ))
+
+            # --force is a one-off re-render; the loop only picks up new uploads
+            options['force'] = False
+            if not options['loop']:
+                break
+            if not generated:
+                time.sleep(options['interval'])
+
+    def run_jobs(self, jobs, workers):
+        outcomes = Counter()
+        if workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                outcomes.update(process_chunk(job))
+            return outcomes
+
+        with process_pool(workers) as pool:
+            for chunk_outcomes in pool.map(process_chunk, jobs):
+                outcomes.update(chunk_outcomes)
+        return outcomes
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from facts.cache import bump_generation, FEED_SCOPE
+from facts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full-text index from scratch.
+    Needed after bulk loads that bypass the Fact signals (e.g. queryset.update or raw SQL).
+    """
+    help = 'Rebuild the full-text search index for facts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        indexed = get_search_backend().rebuild(chunk_size=options['chunk_size'])
+        # Cached ?search= pages may now be stale
+        bump_generation(FEED_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt: {indexed} facts indexed."))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from facts.cache import bump_generation, FEED_SCOPE
+from facts.models import Fact
+from facts.ranking import RANKING_FIELDS, apply_scores
+
+
+class Command(BaseCommand):
+    """
+    Recomputes net / hot / controversy scores from the vote counters.
+
+    Votes keep the scores up to date incrementally, so this is meant for a
+    periodic cron run (repairs float drift and rows written by bulk tools that
+    bypass signals) and for backfills after the formula in facts/ranking.py changes.
+    Works through the table in id-ordered chunks and only writes changed rows.
+    """
+    help = 'Recompute stored ranking scores (hot / top / controversial) for facts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        updated = 0
+
+        while True:
+            facts = list(
+                Fact.objects.filter(pk__gt=last_id)
+                .order_by('pk')
+                .only('id', 'created_at', 'upvotes_count', 'downvotes_count', *RANKING_FIELDS)[:chunk_size]
+            )
+            if not facts:
+                break
+            last_id = facts[-1].pk
+
+            changed = [fact for fact in facts if apply_scores(fact)]
+            if changed:
+                Fact.objects.bulk_update(changed, RANKING_FIELDS)
+                updated += len(changed)
+
+        if updated:
+            bump_generation(FEED_SCOPE)
+        self.stdout.write(self.style.SUCCESS(f"Rankings refreshed: {updated} facts updated."))
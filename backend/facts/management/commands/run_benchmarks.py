@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from facts.benchmarks import DEFAULT_SIZES, default_cases, run_suite, seed_database
+from facts.models import Fact
+
+
+class Command(BaseCommand):
+    """
+    Seeds a throwaway database and benchmarks the API hot paths.
+
+    Like `manage.py test`, it runs against a separate test database (never the real one),
+    so results only depend on --seed and the size options. The JSON report can be diffed
+    between commits, or compared directly with --compare:
+
+        python manage.py run_benchmarks --facts 20000 --output before.json
+        git checkout my-branch
+        python manage.py run_benchmarks --facts 20000 --compare before.json
+    """
+    help = 'Benchmark the main API endpoints against a seeded, reproducible database.'
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=default, help=f'Rows to seed (default {default}).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the data set.')
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--only', nargs='+', metavar='CASE', help='Run only these cases.')
+        parser.add_argument('--output', default='benchmark-results.json', help='Where to write the JSON report.')
+        parser.add_argument('--compare', metavar='JSON', help='Earlier report to print p95 / query deltas against.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep (and reuse) the seeded test database.')
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] for name in DEFAULT_SIZES}
+        baseline = self.load_report(options['compare']) if options['compare'] else None
+
+        # DEBUG off (no query log), background flushers and outbox threads off: only the request is timed
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(NOTIFICATION_OUTBOX_DISPATCH='worker', VIEW_COUNT_FLUSH_INTERVAL=0):
+                if not Fact.objects.exists():
+                    self.stdout.write(f"Seeding {sizes} (seed {options['seed']})...")
+                    seed_database(sizes, seed=options['seed'])
+
+                cases = default_cases()
+                unknown = set(options['only'] or []) - {case.name for case in cases}
+                if unknown:
+                    raise CommandError(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+                report = run_suite(
+                    cases, iterations=options['iterations'], warmup=options['warmup'],
+                    only=options['only'], sizes=sizes, seed=options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.print_report(report, baseline)
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def load_report(self, path):
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+
+    def print_report(self, report, baseline=None):
+        previous = (baseline or {}).get('results', {})
+        self.stdout.write(f"{'case':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'peak KiB':>10}")
+        for name, row in report['results'].items():
+            line = (
+                f"{name:<24}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}"
+                f"{row['queries_per_request']:>9}{row['peak_memory_kib']:>10.1f}"
+            )
+            if name in previous:
+                old = previous[name]
+                change = (row['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+                line += f"   p95 {change:+.1f}%  queries {row['queries_per_request'] - old['queries_per_request']:+d}"
+            self.stdout.write(line)
@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from facts.benchmarks import DEFAULT_SIZES, SERVER_MODES, run_concurrency, seed_database
+from facts.models import Fact
+
+
+class Command(BaseCommand):
+    """
+    Throughput and latency of WSGI vs ASGI (sync DRF views, async read views) under many
+    concurrent slow clients, against the same seeded test database as run_benchmarks:
+
+        python manage.py run_concurrency_benchmark --clients 200 --client-delay 0.1
+    """
+    help = 'Compare WSGI and ASGI throughput under many concurrent slow clients.'
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=default, help=f'Rows to seed (default {default}).')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the data set.')
+        parser.add_argument('--modes', nargs='+', choices=SERVER_MODES, default=list(SERVER_MODES))
+        parser.add_argument('--clients', type=int, default=100, help='Concurrent clients.')
+        parser.add_argument('--requests', type=int, default=5, help='Requests sent by each client.')
+        parser.add_argument('--client-delay', type=float, default=0.05, help='Seconds a client takes to read a response.')
+        parser.add_argument('--threads', type=int, default=8, help='Worker threads of the WSGI server.')
+        parser.add_argument('--output', default='concurrency-results.json', help='Where to write the JSON report.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep (and reuse) the seeded test database.')
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] for name in DEFAULT_SIZES}
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(NOTIFICATION_OUTBOX_DISPATCH='worker', VIEW_COUNT_FLUSH_INTERVAL=0):
+                if not Fact.objects.exists():
+                    self.stdout.write(f"Seeding {sizes} (seed {options['seed']})...")
+                    seed_database(sizes, seed=options['seed'])
+
+                report = run_concurrency(
+                    options['modes'], clients=options['clients'], per_client=options['requests'],
+                    client_delay=options['client_delay'], threads=options['threads'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.stdout.write(f"{'mode':<14}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  status codes")
+        for mode, row in report['results'].items():
+            self.stdout.write(
+                f"{mode:<14}{row['throughput_rps']:>10.1f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+                f"{row['p99_ms']:>10.2f}  {row['status_codes']}"
+            )
+        Path(options['output']).write_text(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
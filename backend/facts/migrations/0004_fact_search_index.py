@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS facts_fact_fts "
+            "USING fts5(title, content, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO facts_fact_fts (rowid, title, content) SELECT id, title, content FROM facts_fact"
+        )
+    elif vendor == 'postgresql':
+        # Generated column: PostgreSQL keeps it in sync on every INSERT/UPDATE
+        schema_editor.execute(
+            "ALTER TABLE facts_fact ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+            ") STORED"
+        )
+        schema_editor.execute(
+            "CREATE INDEX facts_fact_search_gin ON facts_fact USING GIN (search_vector)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS facts_fact_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS facts_fact_search_gin")
+        schema_editor.execute("ALTER TABLE facts_fact DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facts', '0003_comment_bookmark'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
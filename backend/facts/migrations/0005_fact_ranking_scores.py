@@ -0,0 +1,80 @@
+# Generated by Django 6.0 on 2026-10-18 12:05
+
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+# The formulas of facts/ranking.py when this migration was written, frozen here so
+# later changes to that module do not change what this migration does
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+HOT_DECAY_SECONDS = 45000
+RANKING_FIELDS = ['net_score', 'hot_score', 'controversy_score']
+
+
+def hot_score(upvotes, downvotes, created_at):
+    net = upvotes - downvotes
+    vote_term = math.copysign(math.log10(max(abs(net), 1)), net) if net else 0.0
+    return vote_term + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
+def controversy_score(upvotes, downvotes):
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    return (upvotes + downvotes) ** (min(upvotes, downvotes) / max(upvotes, downvotes))
+
+
+def backfill_rankings(apps, schema_editor):
+    Fact = apps.get_model('facts', 'Fact')
+    batch = []
+    fields = ['id', 'created_at', 'upvotes_count', 'downvotes_count', *RANKING_FIELDS]
+    for fact in Fact.objects.only(*fields).iterator(chunk_size=2000):
+        fact.net_score = fact.upvotes_count - fact.downvotes_count
+        fact.hot_score = hot_score(fact.upvotes_count, fact.downvotes_count, fact.created_at)
+        fact.controversy_score = controversy_score(fact.upvotes_count, fact.downvotes_count)
+        batch.append(fact)
+        if len(batch) >= 2000:
+            Fact.objects.bulk_update(batch, RANKING_FIELDS)
+            batch = []
+    if batch:
+        Fact.objects.bulk_update(batch, RANKING_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facts', '0004_fact_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fact',
+            name='controversy_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fact',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='fact',
+            name='net_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(fields=['status', '-net_score'], name='fact_status_net_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(fields=['status', '-hot_score'], name='fact_status_hot_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(fields=['status', '-controversy_score'], name='fact_status_controversy_idx'),
+        ),
+        migrations.RunPython(backfill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0 on 2026-10-18 12:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facts', '0005_fact_ranking_scores'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # New indexes first, so the feed is never left without one while this runs
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['user', '-created_at', '-fact'], name='bookmark_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['-created_at', '-id'], name='fact_live_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['-net_score', '-id'], name='fact_live_net_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['-hot_score', '-id'], name='fact_live_hot_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['-controversy_score', '-id'], name='fact_live_controversy_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['-upvotes_count', '-id'], name='fact_live_upvotes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(condition=models.Q(('status', 'APPROVED')), fields=['category', '-created_at', '-id'], name='fact_live_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['created_at', 'id'], name='fact_pending_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fact',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='fact_author_created_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='fact',
+            name='facts_fact_status_d78442_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='fact',
+            name='fact_status_net_score_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='fact',
+            name='fact_status_hot_score_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='fact',
+            name='fact_status_controversy_idx',
+        ),
+        migrations.AlterField(
+            model_name='fact',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='facts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='fact',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'Draft'), ('PENDING', 'Pending Approval'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], default='DRAFT', max_length=10),
+        ),
+    ]
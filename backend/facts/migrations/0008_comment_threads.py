@@ -0,0 +1,108 @@
+# Generated by Django 6.0 on 2026-10-18 12:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+SEGMENT_WIDTH = 8
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def path_segment(pk):
+    digits = ''
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        digits = DIGITS[remainder] + digits
+    return digits.rjust(SEGMENT_WIDTH, '0')
+
+
+def backfill_threads(apps, schema_editor):
+    """
+    Paths for existing comments. A parent always has a lower id than its replies,
+    so walking in id order sees every parent first. Like Comment.save, replies below
+    COMMENT_MAX_DEPTH are re-parented to continue the thread at the deepest level,
+    which also keeps paths within max_length.
+    """
+    Comment = apps.get_model('facts', 'Comment')
+    Fact = apps.get_model('facts', 'Fact')
+    max_depth = getattr(settings, 'COMMENT_MAX_DEPTH', 8)
+    threads = {}  # id -> (root_id, path, depth, parent_id)
+    batch = []
+    for comment in Comment.objects.order_by('id').only('id', 'parent_id').iterator(chunk_size=2000):
+        if comment.parent_id in threads:
+            parent_id = comment.parent_id
+            root_id, parent_path, parent_depth, grandparent_id = threads[parent_id]
+            while parent_depth >= max_depth:
+                parent_id = grandparent_id
+                root_id, parent_path, parent_depth, grandparent_id = threads[parent_id]
+            comment.parent_id = parent_id
+            comment.root_id, comment.path, comment.depth = root_id, parent_path + path_segment(comment.pk), parent_depth + 1
+        else:
+            comment.root_id, comment.path, comment.depth = comment.pk, path_segment(comment.pk), 0
+        threads[comment.pk] = (comment.root_id, comment.path, comment.depth, comment.parent_id)
+        batch.append(comment)
+        if len(batch) >= 1000:
+            Comment.objects.bulk_update(batch, ['parent', 'root', 'path', 'depth'])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ['parent', 'root', 'path', 'depth'])
+
+    def count(**filters):
+        return Coalesce(Subquery(
+            Comment.objects.filter(**filters).values(*filters).annotate(total=Count('id')).values('total')
+        ), 0)
+
+    Comment.objects.update(replies_count=count(parent_id=OuterRef('pk')))
+    Fact.objects.update(comments_count=count(fact_id=OuterRef('pk')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facts', '0007_image_derivatives'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='facts.comment'),
+        ),
+        migrations.AddField(
+            model_name='fact',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_threads, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['fact', 'created_at', 'id'], name='comment_fact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['root', 'path'], name='comment_thread_path_idx'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='fact',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='facts.fact'),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.text import slugify
+from FactNode.tracking import TrackedFieldsMixin
 from .choices import FactStatus  # Import the choices from the separate file
+from . import ranking
 
 
 class Category(models.Model):
@@ -33,11 +36,18 @@ class Category(models.Model):
         return self.name
 
 
-class Fact(models.Model):
+# Condition of the partial feed indexes: only approved facts are ever listed publicly
+LIVE = models.Q(status=FactStatus.APPROVED)
+
+
+class Fact(TrackedFieldsMixin, models.Model):
     """
     The core model representing a scientific fact or interesting snippet.
     Includes status management for the moderation workflow.
     """
+    # What the receivers in facts/signals.py compare against (see FactNode/tracking.py)
+    tracked_fields = ('status', 'title', 'content', 'image', 'author', 'category')
+
     title = models.CharField(max_length=200, help_text="A concise and catchy title")
     slug = models.SlugField(max_length=250, unique=True, blank=True)
     content = models.TextField(help_text="Full description of the fact")
@@ -47,12 +57,16 @@ class Fact(models.Model):
         null=True,
         help_text="Optional image to make the fact more engaging."
     )
+    # Resized WebP/JPEG copies of `image`, written off the request path (see FactNode/images.py)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
 
     # Relationships
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='facts'
+        related_name='facts',
+        # Covered by the (author, -created_at) index below
+        db_index=False
     )
     category = models.ForeignKey(
         Category,
@@ -64,8 +78,9 @@ class Fact(models.Model):
     status = models.CharField(
         max_length=10,
         choices=FactStatus.choices,
-        default=FactStatus.DRAFT,
-        db_index=True  # Index for faster filtering by status
+        default=FactStatus.DRAFT
+        # No plain index: the partial indexes below cover APPROVED and PENDING, and a
+        # low-selectivity status index only tempts the planner into sorting the whole feed
     )
     rejection_reason = models.TextField(
         blank=True,
@@ -77,6 +92,12 @@ class Fact(models.Model):
     upvotes_count = models.PositiveIntegerField(default=0)
     downvotes_count = models.PositiveIntegerField(default=0)
     views_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+
+    # Stored ranking scores so each feed tab is an index scan (see facts/ranking.py)
+    net_score = models.IntegerField(default=0)
+    hot_score = models.FloatField(default=0)
+    controversy_score = models.FloatField(default=0)
 
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
@@ -86,14 +107,31 @@ class Fact(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            # Compound index for retrieving the latest approved facts efficiently
-            models.Index(fields=['status', '-created_at']),
+            # Feed tabs. Partial indexes only hold live facts, in the exact (field, id) order
+            # the keyset pagination walks, so a page is an index range scan with no sort.
+            models.Index(fields=['-created_at', '-id'], condition=LIVE, name='fact_live_created_idx'),
+            models.Index(fields=['-net_score', '-id'], condition=LIVE, name='fact_live_net_score_idx'),
+            models.Index(fields=['-hot_score', '-id'], condition=LIVE, name='fact_live_hot_score_idx'),
+            models.Index(fields=['-controversy_score', '-id'], condition=LIVE, name='fact_live_controversy_idx'),
+            models.Index(fields=['-upvotes_count', '-id'], condition=LIVE, name='fact_live_upvotes_idx'),
+            # ?category__slug= (newest first)
+            models.Index(fields=['category', '-created_at', '-id'], condition=LIVE, name='fact_live_category_idx'),
+            # Moderation queue, oldest first
+            models.Index(
+                fields=['created_at', 'id'], condition=models.Q(status=FactStatus.PENDING),
+                name='fact_pending_queue_idx'
+            ),
+            # "My facts", ?author__username= and the per-author counters
+            models.Index(fields=['author', '-created_at', '-id'], name='fact_author_created_idx'),
         ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             # Generate a slug from the title if not provided
             self.slug = slugify(self.title)
+        if self._state.adding and not self.hot_score:
+            # Seed the time term; votes only adjust the vote term from here on
+            self.hot_score = ranking.hot_score(self.upvotes_count, self.downvotes_count, timezone.now())
         super().save(*args, **kwargs)
 
     @property
@@ -133,19 +171,92 @@ class Bookmark(models.Model):
 
     class Meta:
         unique_together = ('user', 'fact')  # Prevent duplicate bookmarks
+        indexes = [
+            # "My bookmarks", newest first; fact is a key column so the listing never reads the table
+            models.Index(fields=['user', '-created_at', '-fact'], name='bookmark_user_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} bookmarked {self.fact}"
+
+# Materialized path: one fixed-width base-36 segment per ancestor (and the comment itself).
+# Ids only grow, so ordering a thread by path gives depth-first order with replies oldest first.
+PATH_SEGMENT_WIDTH = 8
+PATH_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def path_segment(pk):
+    digits = ''
+    while pk:
+        pk, remainder = divmod(pk, 36)
+        digits = PATH_DIGITS[remainder] + digits
+    return digits.rjust(PATH_SEGMENT_WIDTH, '0')
+
+
 class Comment(models.Model):
     """
     Represents a user review or discussion on a fact.
+
+    Threads are stored as a materialized path (see facts/comments.py): `root` and `path`
+    let a whole thread load with one `(root, path)` index range scan, in display order.
     """
-    fact = models.ForeignKey(Fact, on_delete=models.CASCADE, related_name='comments')
+    fact = models.ForeignKey(
+        Fact,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        # Covered by the (fact, created_at) index below
+        db_index=False
+    )
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField(max_length=1000)
     # Allows for nested replies (optional, but good for discussions)
     parent = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='replies')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Thread structure, set once on creation
+    root = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.CASCADE, related_name='+',
+        # Covered by the (root, path) index below
+        db_index=False
+    )
+    path = models.CharField(max_length=255, blank=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    # Denormalized counter (kept by facts/signals.py): direct replies
+    replies_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Comment section: top-level comments of a fact in time order
+            models.Index(fields=['fact', 'created_at', 'id'], name='comment_fact_created_idx'),
+            # A whole thread (or subtree) in display order
+            models.Index(fields=['root', 'path'], name='comment_thread_path_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if adding and self.parent_id:
+            parent = self.parent
+            # Replies below COMMENT_MAX_DEPTH continue the thread at the deepest level: the
+            # ancestor at max_depth - 1, whose id is the last segment of that prefix of the path
+            max_depth = getattr(settings, 'COMMENT_MAX_DEPTH', 8)
+            if parent.depth >= max_depth:
+                segment = parent.path[(max_depth - 1) * PATH_SEGMENT_WIDTH:max_depth * PATH_SEGMENT_WIDTH]
+                parent = Comment.objects.get(pk=int(segment, 36))
+            self.parent = parent
+            self.fact_id = parent.fact_id
+            self.depth = parent.depth + 1
+        super().save(*args, **kwargs)
+
+        if adding:
+            # The path needs the primary key, so it is written right after the INSERT
+            if self.parent_id:
+                self.root_id = self.parent.root_id
+                self.path = self.parent.path + path_segment(self.pk)
+            else:
+                self.root_id = self.pk
+                self.path = path_segment(self.pk)
+            Comment.objects.filter(pk=self.pk).update(root_id=self.root_id, path=self.path)
+
     def __str__(self):
-        return f"Comment by {self.author.username} on {self.fact.title}"
\ No newline at end of file
+        return f"Comment by {self.author.username} on {self.fact.title}"
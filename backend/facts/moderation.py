@@ -0,0 +1,94 @@
+"""
+Bulk moderation service shared by the moderation API and the admin actions.
+
+Status changes are applied with a single UPDATE, so the per-row Fact signals do not
+fire. Their side effects are applied here in aggregate instead:
+- one grouped query computes how much each author's facts_approved_count changes,
+- one UPDATE per affected author applies it,
+- approval notifications are queued with one bulk INSERT into the outbox,
+- the public feed cache is invalidated once.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from accounts.models import Profile
+from notifications.choices import NotificationType
+from notifications.models import NotificationIntent
+from notifications.outbox import enqueue_notifications
+from .cache import bump_generation, FEED_SCOPE
+from .choices import FactStatus
+from .models import Fact
+from FactNode.db import write_transaction
+
+
+def approval_notification(fact_title):
+    """Title/message of the notification sent when a fact goes live."""
+    return {
+        'type': NotificationType.FACT_APPROVED,
+        'title': "Fact Approved!",
+        'message': f"Great job! Your fact '{fact_title}' has been approved and is now live.",
+    }
+
+
+def bulk_moderate(queryset, new_status, reason='', moderator=None):
+    """
+    Moves every fact in the queryset to new_status in one transaction.
+    Facts already in that status are skipped. Returns the number of facts changed.
+    """
+    with write_transaction():
+        # Lock the rows so two moderators cannot apply the same transition twice
+        fact_ids = list(
+            queryset.exclude(status=new_status).select_for_update().values_list('pk', flat=True)
+        )
+        if not fact_ids:
+            return 0
+        facts = Fact.objects.filter(pk__in=fact_ids)
+
+        # 1. Per-author delta for facts_approved_count (single grouped query)
+        per_author = facts.values('author_id').annotate(
+            total=Count('id'),
+            was_approved=Count('id', filter=Q(status=FactStatus.APPROVED)),
+        ).order_by()
+        deltas = {
+            row['author_id']: row['total'] if new_status == FactStatus.APPROVED else -row['was_approved']
+            for row in per_author
+        }
+
+        # 2. Notifications need the titles, so read them before the status changes
+        intents = []
+        if new_status == FactStatus.APPROVED:
+            content_type = ContentType.objects.get_for_model(Fact)
+            intents = [
+                NotificationIntent(
+                    recipient_id=author_id,
+                    actor=moderator,
+                    content_type=content_type,
+                    object_id=fact_id,
+                    **approval_notification(title),
+                )
+                for fact_id, author_id, title in facts.values_list('id', 'author_id', 'title')
+            ]
+
+        # 3. The status change itself
+        changes = {'status': new_status, 'updated_at': timezone.now()}
+        if new_status == FactStatus.APPROVED:
+            changes['approved_at'] = timezone.now()
+        if reason:
+            changes['rejection_reason'] = reason
+        updated = facts.update(**changes)
+
+        # 4. One UPDATE per author whose approved count actually changes
+        for author_id, delta in deltas.items():
+            if delta > 0:
+                value = F('facts_approved_count') + delta
+            elif delta < 0:
+                value = Greatest(F('facts_approved_count') + delta, 0)
+            else:
+                continue
+            Profile.objects.filter(user_id=author_id).update(facts_approved_count=value)
+
+        enqueue_notifications(intents)
+
+    bump_generation(FEED_SCOPE)
+    return updated
@@ -0,0 +1,130 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination for infinite scroll.
+
+    Instead of OFFSET + COUNT(*), every page seeks directly past the last row
+    of the previous page using the pair (ordering field, id). Every feed ordering
+    has a matching partial (field, id) index (see Fact.Meta.indexes), so page 500
+    costs the same as page 1.
+
+    The cursor is opaque to clients: they just follow the 'next' link.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Fetch one extra row to find out if there is a next page (no COUNT needed)
+        rows = list(self.get_page_queryset(queryset, request)[:self.page_size + 1])
+        return self.set_page(rows)
+
+    def set_page(self, rows):
+        """
+        Takes the (up to page_size + 1) rows read at the cursor and returns the page.
+        Async views fetch the rows themselves (see facts/async_views.py).
+        """
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_queryset(self, queryset, request):
+        """
+        The ordered queryset positioned at the requested cursor, not yet sliced or evaluated
+        (conditional GETs read a few narrow columns of it instead of the full rows).
+        """
+        self.request = request
+        self.field_name, self.descending = self.get_ordering(queryset)
+        self.field = self.get_field(queryset, self.field_name)
+
+        # The id acts as a tie-breaker so rows sharing the same timestamp/score are never skipped
+        prefix = '-' if self.descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field_name}', f'{prefix}id')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            value, pk = cursor
+            lookup = 'lt' if self.descending else 'gt'
+            # The redundant `field <= value` bound lets the database seek into the index
+            # at the cursor, instead of scanning from the first row and filtering
+            queryset = queryset.filter(
+                Q(**{f'{self.field_name}__{lookup}e': value}),
+                Q(**{f'{self.field_name}__{lookup}': value}) |
+                Q(**{self.field_name: value, f'id__{lookup}': pk})
+            )
+        return queryset
+
+    def get_ordering(self, queryset):
+        """
+        Returns (field_name, descending) for the primary ordering of the queryset,
+        as set by OrderingFilter or the model's Meta.ordering.
+        """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or ['-id']
+        first = ordering[0]
+        return first.lstrip('-'), first.startswith('-')
+
+    def get_field(self, queryset, name):
+        """
+        The model field (or annotation output field, e.g. a search rank) used to parse cursor values.
+        """
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.field_name)
+        if hasattr(value, 'isoformat'):
+            # Keep full microsecond precision, otherwise rows could be skipped
+            value = value.isoformat()
+        position = [value, obj.pk]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return self.field.to_python(value), int(pk)
+        except (TypeError, ValueError, ValidationError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
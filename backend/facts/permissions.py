@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from accounts.ranks import MODERATOR_MIN_REPUTATION
 
 
 class IsReputationModerator(permissions.BasePermission):
@@ -11,6 +12,16 @@ class IsReputationModerator(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
 
-        # 2. Check reputation score
-        # According to models.py: Researcher starts at 50, Scholar at 200, Professor at 1000.
-        return request.user.profile.reputation_score >= 50
\ No newline at end of file
+        # 2. Check reputation score (rank thresholds: accounts/ranks.py)
+        return request.user.profile.reputation_score >= MODERATOR_MIN_REPUTATION
+
+
+class IsAuthorOrReadOnly(permissions.BasePermission):
+    """
+    Object-level: anyone can read, only the author (or staff) can delete or change.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return obj.author_id == request.user.pk or request.user.is_staff
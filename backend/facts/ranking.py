@@ -0,0 +1,105 @@
+"""
+Stored ranking scores for the "Hot", "Top Rated" and "Controversial" tabs.
+
+- net_score:          upvotes - downvotes
+- hot_score:          log10 of the net score plus a creation-time term (Reddit style).
+                      Newer facts start higher, so older facts decay relative to them
+                      without their rows having to be rewritten as time passes.
+- controversy_score:  (up + down) ** balance, where balance = min/max of the two counts.
+
+Votes update all three in the same UPDATE as the counters (see reputation/signals.py),
+and `manage.py refresh_rankings` recomputes them in bulk.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Abs, Cast, Greatest, Least, Log, Power, Sign
+
+# Fixed reference point for the time term (only differences between facts matter)
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+# Seconds of age that are worth one order of magnitude of net votes (12.5 hours)
+HOT_DECAY_SECONDS = 45000
+
+
+# --- Python versions (new facts, bulk recompute) ---
+
+def vote_term(net_score):
+    return math.copysign(math.log10(max(abs(net_score), 1)), net_score) if net_score else 0.0
+
+
+def time_term(created_at):
+    return (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
+def hot_score(upvotes, downvotes, created_at):
+    return vote_term(upvotes - downvotes) + time_term(created_at)
+
+
+def controversy_score(upvotes, downvotes):
+    if upvotes <= 0 or downvotes <= 0:
+        return 0.0
+    balance = min(upvotes, downvotes) / max(upvotes, downvotes)
+    return (upvotes + downvotes) ** balance
+
+
+# --- SQL versions (incremental updates on vote) ---
+
+def _vote_term_sql(net):
+    return Sign(net) * Log(10, Greatest(Abs(net), 1))
+
+
+def ranking_updates(up_delta, down_delta):
+    """
+    Returns UPDATE kwargs that apply vote deltas to the counters and every ranking column
+    atomically. All right-hand sides read the row's values from *before* the update,
+    so the old vote term can be swapped for the new one inside the same statement.
+    """
+    def counter(field, delta):
+        if delta >= 0:
+            return F(field) + delta
+        # Never below zero, even if the counters have drifted
+        return Greatest(F(field) + delta, 0)
+
+    new_up = counter('upvotes_count', up_delta)
+    new_down = counter('downvotes_count', down_delta)
+    old_net = F('upvotes_count') - F('downvotes_count')
+    new_net = old_net + (up_delta - down_delta)
+
+    return {
+        'upvotes_count': new_up,
+        'downvotes_count': new_down,
+        'net_score': new_net,
+        'hot_score': F('hot_score') - _vote_term_sql(old_net) + _vote_term_sql(new_net),
+        'controversy_score': Case(
+            When(
+                Q(upvotes_count__lte=-up_delta) | Q(downvotes_count__lte=-down_delta),
+                then=Value(0.0),
+            ),
+            default=Power(
+                new_up + new_down,
+                Cast(Least(new_up, new_down), FloatField()) / Cast(Greatest(new_up, new_down), FloatField()),
+            ),
+            output_field=FloatField(),
+        ),
+    }
+
+
+RANKING_FIELDS = ['net_score', 'hot_score', 'controversy_score']
+
+
+def apply_scores(fact):
+    """
+    Recomputes the ranking columns of a Fact instance from its counters (no save).
+    Returns True if anything changed.
+    """
+    scores = (
+        fact.upvotes_count - fact.downvotes_count,
+        hot_score(fact.upvotes_count, fact.downvotes_count, fact.created_at),
+        controversy_score(fact.upvotes_count, fact.downvotes_count),
+    )
+    current = (fact.net_score, fact.hot_score, fact.controversy_score)
+    if current[0] == scores[0] and all(math.isclose(a, b, abs_tol=1e-9) for a, b in zip(current[1:], scores[1:])):
+        return False
+    fact.net_score, fact.hot_score, fact.controversy_score = scores
+    return True
@@ -0,0 +1,151 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, CharField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'facts_fact_fts'
+PG_SEARCH_COLUMN = 'search_vector'
+PG_SEARCH_INDEX = 'facts_fact_search_gin'
+
+SNIPPET_START = '<mark>'
+SNIPPET_STOP = '</mark>'
+
+# Searched columns, in the order they are indexed
+INDEXED_FIELDS = ('title', 'content')
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 virtual table keyed by the Fact id (rowid).
+    Kept in sync row by row from facts/signals.py.
+    """
+
+    @staticmethod
+    def build_match(term):
+        # Quote every word so user input can never be parsed as FTS5 syntax; '*' = prefix match
+        words = re.findall(r'\w+', term)
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def search(self, queryset, term):
+        if not term.strip():
+            return queryset
+        match = self.build_match(term)
+        if not match:
+            # Only punctuation: nothing can match, like an empty tsquery on PostgreSQL
+            return queryset.none()
+
+        # bm25() is "lower is better", negate it so ordering works like every other score
+        rank = RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = facts_fact.id',
+            (match,), output_field=FloatField()
+        )
+        snippet = RawSQL(
+            f"SELECT snippet({FTS_TABLE}, -1, %s, %s, '…', 24) FROM {FTS_TABLE} "
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = facts_fact.id',
+            (SNIPPET_START, SNIPPET_STOP, match), output_field=CharField()
+        )
+        matches = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        return queryset.filter(id__in=matches).annotate(search_rank=rank, search_snippet=snippet)
+
+    def index(self, fact):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [fact.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+                [fact.pk, fact.title, fact.content]
+            )
+
+    def remove(self, fact_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [fact_id])
+
+    def rebuild(self, chunk_size=5000):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            last_id = 0
+            indexed = 0
+            while True:
+                # Keyset-paginated chunks keep memory flat on big tables
+                cursor.execute(
+                    f'INSERT INTO {FTS_TABLE} (rowid, title, content) '
+                    'SELECT id, title, content FROM facts_fact WHERE id > %s ORDER BY id LIMIT %s',
+                    [last_id, chunk_size]
+                )
+                if not cursor.rowcount:
+                    break
+                indexed += cursor.rowcount
+                cursor.execute(f'SELECT MAX(rowid) FROM {FTS_TABLE}')
+                last_id = cursor.fetchone()[0]
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return indexed
+
+
+class PostgresSearchBackend:
+    """
+    Stored, generated tsvector column with a GIN index (see migration 0004).
+    PostgreSQL keeps the column in sync on every INSERT/UPDATE, so index()
+    and remove() have nothing to do.
+    """
+
+    def search(self, queryset, term):
+        if not term.strip():
+            return queryset
+
+        query = "websearch_to_tsquery('english', %s)"
+        matches = RawSQL(f'facts_fact.{PG_SEARCH_COLUMN} @@ {query}', (term,), output_field=BooleanField())
+        rank = RawSQL(
+            f'ts_rank_cd(facts_fact.{PG_SEARCH_COLUMN}, {query})::float8',
+            (term,), output_field=FloatField()
+        )
+        snippet = RawSQL(
+            f"ts_headline('english', facts_fact.content, {query}, %s)",
+            (term, f'StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxWords=35, MinWords=15'),
+            output_field=CharField()
+        )
+        return queryset.filter(matches).annotate(search_rank=rank, search_snippet=snippet)
+
+    def index(self, fact):
+        pass
+
+    def remove(self, fact_id):
+        pass
+
+    def rebuild(self, chunk_size=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f'REINDEX INDEX {PG_SEARCH_INDEX}')
+            cursor.execute('ANALYZE facts_fact')
+            cursor.execute('SELECT COUNT(*) FROM facts_fact')
+            return cursor.fetchone()[0]
+
+
+class BasicSearchBackend:
+    """
+    Fallback for databases without a supported full-text engine: plain icontains, no ranking.
+    """
+
+    def search(self, queryset, term):
+        if not term.strip():
+            return queryset
+        condition = Q()
+        for field in INDEXED_FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition)
+
+    def index(self, fact):
+        pass
+
+    def remove(self, fact_id):
+        pass
+
+    def rebuild(self, chunk_size=None):
+        return 0
+
+
+def get_search_backend():
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return BasicSearchBackend()
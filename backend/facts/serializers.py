@@ -1,7 +1,11 @@
 from rest_framework import serializers
-from .models import Fact, Category, FactSource, Bookmark
+from .models import Fact, Category, FactSource, Bookmark, Comment
+from .choices import FactStatus
+from .export import FORMATS, parse_since
 from accounts.models import CustomUser
 from reputation.models import Vote
+from FactNode.images import ImageDerivativesField
+from FactNode.middleware import ProfiledSerializerMixin
 
 # --- Helper Serializer for Author ---
 class AuthorSerializer(serializers.ModelSerializer):
@@ -16,7 +20,7 @@ class AuthorSerializer(serializers.ModelSerializer):
 
 
 # --- Category Serializer ---
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'icon_name']
@@ -30,7 +34,7 @@ class FactSourceSerializer(serializers.ModelSerializer):
 
 
 # --- Main Fact Serializer ---
-class FactSerializer(serializers.ModelSerializer):
+class FactSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     The main serializer for the News Feed.
     Uses nested serializers for rich data presentation.
@@ -49,19 +53,31 @@ class FactSerializer(serializers.ModelSerializer):
     score = serializers.IntegerField(read_only=True)
 
     image = serializers.ImageField(required=False, allow_null=True)
+    # Resized WebP/JPEG URLs and dimensions; {} until they have been generated
+    image_derivatives = ImageDerivativesField('image')
     user_vote = serializers.SerializerMethodField()
     is_bookmarked = serializers.SerializerMethodField()
 
+    # Only present on ?search= results (annotated by FullTextSearchFilter)
+    search_rank = serializers.FloatField(read_only=True)
+    search_snippet = serializers.CharField(read_only=True)
+
     class Meta:
         model = Fact
         fields = [
-            'id', 'title', 'slug', 'content', 'image',
+            'id', 'title', 'slug', 'content', 'image', 'image_derivatives',
             'category', 'category_id','author', 'sources',
-            'score','user_vote', 'created_at', 'status', "is_bookmarked"
+            'score','user_vote', 'comments_count', 'created_at', 'status', "is_bookmarked",
+            'search_rank', 'search_snippet'
         ]
-        read_only_fields = ['status', 'slug', 'approved_at', 'created_at']
+        read_only_fields = ['status', 'slug', 'approved_at', 'created_at', 'comments_count']
 
     def get_user_vote(self, obj):
+        # Fast path: the view resolved the votes for the whole page up front
+        user_votes = self.context.get('user_votes')
+        if user_votes is not None:
+            return user_votes.get(obj.pk)
+
         user = self.context.get('request').user
         if user.is_authenticated:
             # Efficiently check if THIS user voted on THIS fact
@@ -82,7 +98,81 @@ class FactSerializer(serializers.ModelSerializer):
         return fact
 
     def get_is_bookmarked(self, obj):
+        # Fast path: the view resolved the bookmarks for the whole page up front
+        bookmarked_ids = self.context.get('bookmarked_ids')
+        if bookmarked_ids is not None:
+            return obj.pk in bookmarked_ids
+
         user = self.context.get('request').user
         if user.is_authenticated:
             return Bookmark.objects.filter(user=user, fact=obj).exists()
-        return False
\ No newline at end of file
+        return False
+
+
+# --- Comment Serializer ---
+class CommentSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    """
+    A comment with its replies nested under `replies`, as loaded by facts/comments.py
+    (the whole subtree on detail, the first few replies per thread on lists).
+    `more_replies` is how many replies of the thread were not loaded.
+    """
+    author = AuthorSerializer(read_only=True)
+    # Only live facts can be commented on
+    fact = serializers.PrimaryKeyRelatedField(queryset=Fact.objects.filter(status=FactStatus.APPROVED))
+    parent = serializers.PrimaryKeyRelatedField(queryset=Comment.objects.all(), required=False, allow_null=True)
+    replies = serializers.SerializerMethodField()
+    more_replies = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Comment
+        fields = [
+            'id', 'fact', 'parent', 'author', 'content', 'depth',
+            'replies_count', 'created_at', 'replies', 'more_replies'
+        ]
+        read_only_fields = ['depth', 'replies_count', 'created_at']
+
+    def validate(self, attrs):
+        parent = attrs.get('parent')
+        if parent is not None and parent.fact_id != attrs['fact'].pk:
+            raise serializers.ValidationError({'parent': "The parent comment belongs to another fact."})
+        return attrs
+
+    def create(self, validated_data):
+        return Comment.objects.create(author=self.context['request'].user, **validated_data)
+
+    def get_replies(self, obj):
+        children = getattr(obj, 'thread_children', [])
+        return CommentSerializer(children, many=True, context=self.context).data
+
+    def get_more_replies(self, obj):
+        return getattr(obj, 'more_replies', 0)
+
+
+# --- Bulk Moderation Input ---
+class BulkModerationSerializer(serializers.Serializer):
+    """
+    Input for the bulk approve/reject endpoints.
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500
+    )
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+# --- Export Query ---
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the export endpoint (facts/export.py).
+    `output` and not `format`: DRF reserves ?format= for picking a renderer.
+    """
+    output = serializers.ChoiceField(choices=FORMATS, default='ndjson')
+    since = serializers.CharField(required=False)
+    gzip = serializers.BooleanField(default=False)
+
+    def validate_since(self, value):
+        since = parse_since(value)
+        if since is None:
+            raise serializers.ValidationError("Expected an ISO 8601 date or datetime.")
+        return since
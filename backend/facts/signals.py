@@ -1,11 +1,17 @@
-from django.db.models.signals import post_save, post_delete, pre_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db.models import F
+from django.db.models.functions import Greatest
 from django.contrib.contenttypes.models import ContentType  # <--- Added
-from .models import Fact
+from accounts.models import Profile
+from .models import Fact, Category, Comment
 from .choices import FactStatus
-from notifications.models import Notification  # <--- Added
-from notifications.choices import NotificationType  # <--- Added
+from .cache import bump_generation, FEED_SCOPE, CATEGORY_SCOPE
+from .search import get_search_backend, INDEXED_FIELDS
+from notifications.outbox import enqueue_notification
+from .moderation import approval_notification
+from FactNode.images import derivatives_ready, schedule_derivatives
+from FactNode.tracking import saves_any
 
 
 # --- 1. Update Total Posted Count ---
@@ -16,9 +22,10 @@ def increment_posted_count(sender, instance, created, **kwargs):
     When a user creates a new fact (Draft or otherwise), increment their posted count.
     """
     if created:
-        profile = instance.author.profile
-        profile.facts_posted_count = F('facts_posted_count') + 1
-        profile.save(update_fields=['facts_posted_count'])
+        # One UPDATE; the author and profile rows are never loaded
+        Profile.objects.filter(user_id=instance.author_id).update(
+            facts_posted_count=F('facts_posted_count') + 1
+        )
 
 
 @receiver(post_delete, sender=Fact)
@@ -26,53 +33,136 @@ def decrement_posted_count(sender, instance, **kwargs):
     """
     If a fact is deleted, decrement the count.
     """
-    profile = instance.author.profile
-    # Prevent negative numbers just in case
-    if profile.facts_posted_count > 0:
-        profile.facts_posted_count = F('facts_posted_count') - 1
-        profile.save(update_fields=['facts_posted_count'])
+    # Single atomic UPDATE; never below zero (no read-then-write race)
+    Profile.objects.filter(user_id=instance.author_id).update(
+        facts_posted_count=Greatest(F('facts_posted_count') - 1, 0)
+    )
 
 
 # --- 2. Update Approved Count (Tricky Part) ---
 
-@receiver(pre_save, sender=Fact)
-def track_old_status(sender, instance, **kwargs):
-    """
-    Before saving, we check what the status WAS so we can compare it later.
-    """
-    if instance.pk:
-        try:
-            old_instance = Fact.objects.get(pk=instance.pk)
-            instance._old_status = old_instance.status
-        except Fact.DoesNotExist:
-            instance._old_status = None
-    else:
-        instance._old_status = None
-
 @receiver(post_save, sender=Fact)
-def update_approved_count(sender, instance, created, **kwargs):
+def update_approved_count(sender, instance, created, update_fields=None, **kwargs):
     """
     After saving, check if the status changed to or from APPROVED.
+    The stored status comes from the snapshot taken when the fact was loaded
+    (FactNode/tracking.py), so saves that leave the status alone cost nothing here.
     """
-    old_status = getattr(instance, '_old_status', None)
+    if not saves_any(update_fields, ['status']) or 'status' not in instance.changed_fields:
+        return
+    old_status = instance.previous('status')
     new_status = instance.status
-    profile = instance.author.profile
 
     # Case A: Fact was just APPROVED
     if old_status != FactStatus.APPROVED and new_status == FactStatus.APPROVED:
-        profile.facts_approved_count = F('facts_approved_count') + 1
-        profile.save(update_fields=['facts_approved_count'])
+        Profile.objects.filter(user_id=instance.author_id).update(
+            facts_approved_count=F('facts_approved_count') + 1
+        )
 
-        Notification.objects.create(
+        enqueue_notification(
             recipient=instance.author,
-            type=NotificationType.FACT_APPROVED,
-            title="Fact Approved!",
-            message=f"Great job! Your fact '{instance.title}' has been approved and is now live.",
-            target=instance # Uses the GenericForeignKey automatically
+            target=instance, # Stored as content_type/object_id, delivered after commit
+            **approval_notification(instance.title)
         )
 
     # Case B: Fact was APPROVED but is now REJECTED (or Drafted)
     elif old_status == FactStatus.APPROVED and new_status != FactStatus.APPROVED:
-        if profile.facts_approved_count > 0:
-            profile.facts_approved_count = F('facts_approved_count') - 1
-            profile.save(update_fields=['facts_approved_count'])
\ No newline at end of file
+        Profile.objects.filter(user_id=instance.author_id).update(
+            facts_approved_count=Greatest(F('facts_approved_count') - 1, 0)
+        )
+
+
+# --- 3. Invalidate the Cached Public Feed ---
+
+@receiver(post_save, sender=Fact)
+def invalidate_feed_cache_on_save(sender, instance, created, **kwargs):
+    """
+    The anonymous feed only shows APPROVED facts, so only saves that touch
+    an approved fact (or take one out of the feed) make cached pages stale.
+    """
+    if FactStatus.APPROVED in (instance.previous('status'), instance.status):
+        bump_generation(FEED_SCOPE)
+
+
+@receiver(post_delete, sender=Fact)
+def invalidate_feed_cache_on_delete(sender, instance, **kwargs):
+    if instance.status == FactStatus.APPROVED:
+        bump_generation(FEED_SCOPE)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    # Categories are embedded in every fact, so both scopes go stale
+    bump_generation(CATEGORY_SCOPE)
+    bump_generation(FEED_SCOPE)
+
+
+# --- 4. Keep the Full-Text Search Index in Sync ---
+
+@receiver(post_save, sender=Fact)
+def update_search_index(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Re-indexes the fact, unless the save could not have touched the searched columns
+    (e.g. a counter-only save with update_fields, or a moderation save of the status).
+    """
+    if not saves_any(update_fields, INDEXED_FIELDS):
+        return
+    if not created and instance.changed_fields.isdisjoint(INDEXED_FIELDS):
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Fact)
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+# --- 5. Responsive Image Derivatives ---
+
+@receiver(post_save, sender=Fact)
+def schedule_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    """
+    New or replaced uploads are resized after commit, off the request path.
+    """
+    if saves_any(update_fields, ['image']):
+        schedule_derivatives(instance, 'image')
+
+
+@receiver(derivatives_ready, sender=Fact)
+def invalidate_feed_cache_on_derivatives(sender, instance_id, **kwargs):
+    # Cached anonymous pages still list the fact without its derivative URLs
+    if Fact.objects.filter(pk=instance_id, status=FactStatus.APPROVED).exists():
+        bump_generation(FEED_SCOPE)
+
+
+# --- 6. Comment Counters ---
+
+def _change_comments_count(fact_id, comments_count):
+    """
+    comments_count is in the feed payload, so cached feed pages (and their ETags) are stale
+    when it changes on an approved fact. That common case takes a single UPDATE.
+    """
+    if Fact.objects.filter(pk=fact_id, status=FactStatus.APPROVED).update(comments_count=comments_count):
+        bump_generation(FEED_SCOPE)
+    else:
+        Fact.objects.filter(pk=fact_id).update(comments_count=comments_count)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_counts(sender, instance, created, **kwargs):
+    """
+    Fact.comments_count counts every comment of the fact; Comment.replies_count only direct replies.
+    """
+    if created:
+        _change_comments_count(instance.fact_id, F('comments_count') + 1)
+        if instance.parent_id:
+            Comment.objects.filter(pk=instance.parent_id).update(replies_count=F('replies_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_counts(sender, instance, **kwargs):
+    # Sent for every comment of a deleted subtree, so each one takes itself off the counts
+    _change_comments_count(instance.fact_id, Greatest(F('comments_count') - 1, 0))
+    if instance.parent_id:
+        Comment.objects.filter(pk=instance.parent_id).update(replies_count=Greatest(F('replies_count') - 1, 0))
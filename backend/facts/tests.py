@@ -1,7 +1,44 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib
+import json
+import random
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from PIL import Image
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.apps import apps as django_apps
+from django.core.management import call_command, CommandError
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
-from facts.models import Fact, Category, FactStatus
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from facts.models import Fact, Category, FactStatus, Bookmark, Comment, FactSource, path_segment
+from facts.cache import get_cache, get_stats
+from facts import ranking
+from facts.view_counter import flush_view_counts, get_buffer
+from facts.moderation import bulk_moderate
+from facts.comments import subtree
+from facts.benchmarks import seed_database, default_cases, run_suite
+from facts.fake_data import FakeDataGenerator, ZipfSampler
+from facts.async_views import FactListView
+from facts.views import FactViewSet
+from facts import export
+from FactNode.images import stale_queryset
+from accounts.models import Profile
+from accounts.serializers import ProfileSerializer
 from notifications.models import Notification
+from notifications.outbox import drain_outbox
+from reputation.models import Vote
+from reputation.choices import VoteType
 
 User = get_user_model()
 
@@ -51,8 +88,1078 @@ class FactModerationTest(TestCase):
         fact.status = FactStatus.APPROVED
         fact.save()
 
-        # Assert: Check Notification
+        # Assert: Check Notification (delivered through the outbox)
+        drain_outbox()
         notification = Notification.objects.filter(recipient=self.user).first()
         self.assertIsNotNone(notification)
         self.assertEqual(notification.type, 'FACT_APPROVED')
-        self.assertIn("Notification Test", notification.message)
\ No newline at end of file
+        self.assertIn("Notification Test", notification.message)
+
+
+class FeedQueryCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', email='reader@test.com', password='password')
+        self.category = Category.objects.create(name="Space")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_facts(self, count):
+        for i in range(count):
+            fact = Fact.objects.create(
+                title=f"Fact {Fact.objects.count()}",
+                content="Content",
+                author=self.user,
+                category=self.category,
+                status=FactStatus.APPROVED
+            )
+            Vote.objects.create(user=self.user, fact=fact, vote_type=VoteType.UPVOTE)
+            Bookmark.objects.create(user=self.user, fact=fact)
+
+    def count_feed_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/facts/feed/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data['results']
+
+    def test_feed_queries_do_not_grow_with_page_size(self):
+        """
+        user_vote / is_bookmarked are resolved for the whole page at once.
+        """
+        self.create_facts(2)
+        small_page_queries, _ = self.count_feed_queries()
+
+        self.create_facts(6)
+        big_page_queries, results = self.count_feed_queries()
+
+        self.assertEqual(small_page_queries, big_page_queries)
+        self.assertTrue(all(item['user_vote'] == VoteType.UPVOTE for item in results))
+        self.assertTrue(all(item['is_bookmarked'] for item in results))
+
+
+class FeedCursorPaginationTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='scroller', email='scroller@test.com', password='password')
+        self.category = Category.objects.create(name="Biology")
+        for i in range(25):
+            Fact.objects.create(
+                title=f"Cell {i}",
+                content="Content",
+                author=self.user,
+                category=self.category,
+                status=FactStatus.APPROVED
+            )
+        # Force timestamp ties so the id tie-breaker is exercised
+        Fact.objects.filter(pk__lte=Fact.objects.order_by('pk')[12].pk).update(created_at=timezone.now())
+
+    def test_cursor_walks_every_fact_once_without_count(self):
+        client = APIClient()
+        url = '/api/facts/feed/'
+        seen = []
+
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(any('COUNT(' in q['sql'] for q in ctx.captured_queries))
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        expected = list(Fact.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = APIClient().get('/api/facts/feed/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+
+class AnonymousFeedCacheTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='writer', email='writer@test.com', password='password')
+        self.category = Category.objects.create(name="Physics")
+        self.fact = Fact.objects.create(
+            title="Light", content="Fast", author=self.user,
+            category=self.category, status=FactStatus.APPROVED
+        )
+
+    def test_cache_hit_and_signal_invalidation(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/facts/feed/')['X-Cache'], 'MISS')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/facts/feed/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(ctx), 0)
+
+        # Approving a fact bumps the generation, so the next request is fresh
+        pending = Fact.objects.create(
+            title="Sound", content="Slow", author=self.user,
+            category=self.category, status=FactStatus.PENDING
+        )
+        pending.status = FactStatus.APPROVED
+        pending.save()
+
+        response = client.get('/api/facts/feed/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+        stats = get_stats()['feed']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+
+class FullTextSearchTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='botanist', email='botanist@test.com', password='password')
+        self.category = Category.objects.create(name="Botany")
+        self.strong = self.create_fact("Photosynthesis", "Photosynthesis turns light into sugar. Photosynthesis!")
+        self.weak = self.create_fact("Leaves", "Leaves are where photosynthesis happens.")
+        self.other = self.create_fact("Roots", "Roots absorb water.")
+
+    def create_fact(self, title, content):
+        return Fact.objects.create(
+            title=title, content=content, author=self.user,
+            category=self.category, status=FactStatus.APPROVED
+        )
+
+    def search(self, term):
+        response = APIClient().get('/api/facts/feed/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_ranked_results_with_snippets(self):
+        results = self.search('photosynth')
+        self.assertEqual([item['id'] for item in results], [self.strong.pk, self.weak.pk])
+        self.assertIn('<mark>', results[0]['search_snippet'])
+
+        # Plain feed responses do not carry search fields
+        self.assertNotIn('search_rank', APIClient().get('/api/facts/feed/').data['results'][0])
+
+    def test_term_without_words_matches_nothing(self):
+        self.assertEqual(self.search('?!'), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.other.content = "Roots absorb water and help photosynthesis indirectly."
+        self.other.save()
+        self.assertIn(self.other.pk, [item['id'] for item in self.search('photosynthesis')])
+
+        Fact.objects.get(pk=self.strong.pk).delete()
+        self.assertNotIn(self.strong.pk, [item['id'] for item in self.search('photosynthesis')])
+
+    def test_rebuild_command(self):
+        Fact.objects.filter(pk=self.other.pk).update(title="Mycorrhiza")
+        self.assertEqual(self.search('mycorrhiza'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual([item['id'] for item in self.search('mycorrhiza')], [self.other.pk])
+
+
+class RankingScoresTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = User.objects.create_user(username='ranker', email='ranker@test.com', password='password')
+        self.category = Category.objects.create(name="Chemistry")
+        self.voters = [
+            User.objects.create_user(username=f'v{i}', email=f'v{i}@test.com', password='password')
+            for i in range(4)
+        ]
+
+    def create_fact(self, title, votes):
+        fact = Fact.objects.create(
+            title=title, content="Content", author=self.author,
+            category=self.category, status=FactStatus.APPROVED
+        )
+        for voter, vote_type in zip(self.voters, votes):
+            Vote.objects.create(user=voter, fact=fact, vote_type=vote_type)
+        fact.refresh_from_db()
+        return fact
+
+    def test_migration_backfill_matches_the_live_formulas(self):
+        facts = [
+            self.create_fact("Mixed", [VoteType.UPVOTE, VoteType.UPVOTE, VoteType.DOWNVOTE]),
+            self.create_fact("Disliked", [VoteType.DOWNVOTE, VoteType.DOWNVOTE]),
+        ]
+        Fact.objects.update(net_score=0, hot_score=0, controversy_score=0)
+        backfill_rankings = importlib.import_module('facts.migrations.0005_fact_ranking_scores').backfill_rankings
+        # One SELECT with every column it needs (no deferred loads), then one bulk UPDATE
+        with self.assertNumQueries(2):
+            backfill_rankings(django_apps, None)
+
+        for fact in facts:
+            stored = Fact.objects.get(pk=fact.pk)
+            self.assertFalse(ranking.apply_scores(stored))
+
+    def test_votes_keep_stored_scores_in_sync(self):
+        up, down = VoteType.UPVOTE, VoteType.DOWNVOTE
+        loved = self.create_fact("Loved", [up, up, up, up])
+        split = self.create_fact("Split", [up, up, down, down])
+        hated = self.create_fact("Hated", [down, down, down])
+
+        for fact in (loved, split, hated):
+            self.assertFalse(ranking.apply_scores(fact), f"{fact.title} scores drifted")
+
+        def tab(ordering):
+            response = APIClient().get('/api/facts/feed/', {'ordering': ordering})
+            return [item['title'] for item in response.data['results']]
+
+        self.assertEqual(tab('-net_score'), ["Loved", "Split", "Hated"])
+        self.assertEqual(tab('-controversy_score')[0], "Split")
+        self.assertEqual(tab('-hot_score')[-1], "Hated")
+
+    def test_refresh_rankings_repairs_rows(self):
+        fact = self.create_fact("Drifted", [VoteType.UPVOTE, VoteType.UPVOTE])
+        Fact.objects.filter(pk=fact.pk).update(net_score=0, hot_score=0, controversy_score=5)
+
+        call_command('refresh_rankings', stdout=StringIO())
+        fact.refresh_from_db()
+        self.assertEqual(fact.net_score, 2)
+        self.assertFalse(ranking.apply_scores(fact))
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=None)
+class BufferedViewCountTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        get_buffer().drain()
+        self.user = User.objects.create_user(username='viewer', email='viewer@test.com', password='password')
+        self.category = Category.objects.create(name="Geology")
+        self.fact = Fact.objects.create(
+            title="Rocks", content="Old", author=self.user,
+            category=self.category, status=FactStatus.APPROVED
+        )
+
+    def test_views_are_deduplicated_and_flushed_in_bulk(self):
+        anonymous = APIClient()
+        member = APIClient()
+        member.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            anonymous.get(f'/api/facts/feed/{self.fact.pk}/')
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in ctx.captured_queries))
+
+        anonymous.get(f'/api/facts/feed/{self.fact.pk}/')  # Repeat view, ignored
+        member.get(f'/api/facts/feed/{self.fact.pk}/')
+
+        self.fact.refresh_from_db()
+        self.assertEqual(self.fact.views_count, 0)
+
+        with self.assertNumQueries(1):
+            flush_view_counts()
+        self.fact.refresh_from_db()
+        self.assertEqual(self.fact.views_count, 2)
+
+    def test_flush_command_needs_the_shared_buffer(self):
+        # Without Redis the views sit in each server process, out of the command's reach
+        with self.assertRaisesMessage(CommandError, "buffered in each server process"):
+            call_command('flush_view_counts', stdout=StringIO())
+
+
+class BulkModerationTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.moderator = User.objects.create_user(username='mod', email='mod@test.com', password='password')
+        self.moderator.profile.reputation_score = 200
+        self.moderator.profile.save()
+        self.alice = User.objects.create_user(username='alice', email='alice@test.com', password='password')
+        self.bob = User.objects.create_user(username='bob', email='bob@test.com', password='password')
+        self.category = Category.objects.create(name="Oceans")
+        self.client = APIClient()
+        self.client.force_authenticate(self.moderator)
+
+    def create_fact(self, author, status=FactStatus.PENDING):
+        return Fact.objects.create(
+            title=f"Wave {Fact.objects.count()}", content="Wet",
+            author=author, category=self.category, status=status
+        )
+
+    def test_bulk_approve_applies_aggregated_side_effects(self):
+        pending = [self.create_fact(self.alice), self.create_fact(self.alice), self.create_fact(self.bob)]
+        draft = self.create_fact(self.bob, status=FactStatus.DRAFT)
+
+        response = self.client.post(
+            '/api/facts/moderation/bulk_approve/',
+            {'ids': [fact.pk for fact in pending] + [draft.pk]},
+            format='json'
+        )
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(response.data['skipped'], 1)
+
+        self.assertEqual(Fact.objects.filter(status=FactStatus.APPROVED, approved_at__isnull=False).count(), 3)
+        self.assertEqual(Profile.objects.get(user=self.alice).facts_approved_count, 2)
+        self.assertEqual(Profile.objects.get(user=self.bob).facts_approved_count, 1)
+
+        drain_outbox()
+        self.assertEqual(Notification.objects.filter(type='FACT_APPROVED', recipient=self.alice).count(), 2)
+
+    def test_admin_reject_keeps_counters_in_sync(self):
+        fact = self.create_fact(self.alice)
+        fact.status = FactStatus.APPROVED
+        fact.save()
+        self.assertEqual(Profile.objects.get(user=self.alice).facts_approved_count, 1)
+
+        bulk_moderate(Fact.objects.filter(pk=fact.pk), FactStatus.REJECTED, reason="Wrong")
+        fact.refresh_from_db()
+        self.assertEqual((fact.status, fact.rejection_reason), (FactStatus.REJECTED, "Wrong"))
+        self.assertEqual(Profile.objects.get(user=self.alice).facts_approved_count, 0)
+
+
+@override_settings(NOTIFICATION_OUTBOX_DISPATCH='worker', VIEW_COUNT_FLUSH_INTERVAL=0)
+class BenchmarkSuiteTest(TestCase):
+    sizes = {'users': 6, 'categories': 2, 'facts': 30, 'votes': 40, 'bookmarks': 10, 'notifications': 12}
+
+    def test_report_has_latency_queries_and_memory(self):
+        seed_database(self.sizes)
+        report = run_suite(default_cases(), iterations=3, warmup=1, only=['feed_list', 'cast_vote'])
+
+        self.assertEqual(set(report['results']), {'feed_list', 'cast_vote'})
+        row = report['results']['feed_list']
+        self.assertEqual(row['status_codes'], [200])
+        self.assertLessEqual(row['p50_ms'], row['p99_ms'])
+        self.assertGreater(row['queries_per_request'], 0)
+        self.assertGreater(row['peak_memory_kib'], 0)
+
+
+class FakeDataGeneratorTest(TestCase):
+    sizes = {'users': 8, 'categories': 2, 'facts': 60, 'votes': 120, 'bookmarks': 16, 'notifications': 20}
+
+    def test_counters_match_the_generated_rows(self):
+        counts = FakeDataGenerator(self.sizes, seed=3, batch_size=7).run()
+
+        self.assertEqual(counts['facts'], 60)
+        self.assertEqual(counts['votes'], Vote.objects.count())
+        for fact in Fact.objects.all():
+            self.assertEqual(fact.upvotes_count, fact.votes.filter(vote_type=VoteType.UPVOTE).count())
+            self.assertEqual(fact.downvotes_count, fact.votes.filter(vote_type=VoteType.DOWNVOTE).count())
+        for profile in Profile.objects.select_related('user'):
+            user = profile.user
+            self.assertEqual(profile.facts_posted_count, user.facts.count())
+            self.assertEqual(profile.unread_notifications_count, user.notifications.filter(is_read=False).count())
+            self.assertEqual(
+                profile.reputation_score,
+                sum(user.reputation_logs.values_list('score_change', flat=True))
+            )
+
+    def test_zipf_sampler_is_skewed_and_distinct(self):
+        sampler = ZipfSampler(100, 1.2, random.Random(0))
+        draws = [sampler.sample() for _ in range(2000)]
+        self.assertGreater(draws.count(0), draws.count(50) * 10)
+        self.assertEqual(len(sampler.distinct(100)), 100)
+
+
+class PerformanceMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', email='reader@test.com', password='password')
+        category = Category.objects.create(name="Space")
+        Fact.objects.create(
+            title="Profiled", content="Content", author=self.user,
+            category=category, status=FactStatus.APPROVED
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_sampled_request_gets_server_timing_and_log_line(self):
+        with self.assertLogs('factnode.perf', level='INFO') as logs:
+            response = self.client.get('/api/facts/feed/')
+
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", app;dur=')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/api/facts/feed/')
+        self.assertGreater(record['queries'], 0)
+        self.assertEqual(record['response_bytes'], len(response.content))
+        # FactSerializer output is timed apart from the rest of the view
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        self.assertGreater(record['serialize_ms'], 0)
+        # Queries are attributed to project code, not to Django internals
+        origins = [query['origin'] for query in record['slow_queries']]
+        self.assertTrue(any(origin and origin.startswith('facts/') for origin in origins), origins)
+
+    @override_settings(PERF_SAMPLE_RATE=1.0)
+    def test_queries_are_counted_under_asgi(self):
+        # Sync DRF views and the native async views both run their queries on other threads
+        token = f'Bearer {AccessToken.for_user(self.user)}'
+        for urlconf, path in (('FactNode.urls', '/api/facts/feed/'), ('FactNode.urls_asgi', '/api/facts/feed/')):
+            with self.subTest(urlconf=urlconf), override_settings(ROOT_URLCONF=urlconf):
+                with self.assertLogs('factnode.perf', level='INFO') as logs:
+                    response = async_to_sync(self.async_client.get)(path, headers={'Authorization': token})
+                self.assertEqual(response.status_code, 200)
+                record = json.loads(logs.records[0].getMessage())
+                self.assertGreater(record['queries'], 0)
+                self.assertIn(f'desc="{record["queries"]} queries"', response['Server-Timing'])
+
+    @override_settings(PERF_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_untouched(self):
+        response = self.client.get('/api/facts/feed/')
+        self.assertNotIn('Server-Timing', response)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=None)
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.author = User.objects.create_user(username='author', email='author@test.com', password='password')
+        self.reader = User.objects.create_user(username='reader', email='reader@test.com', password='password')
+        self.category = Category.objects.create(name="Oceans")
+        self.fact = Fact.objects.create(
+            title="Tides", content="Moon", author=self.author,
+            category=self.category, status=FactStatus.APPROVED
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def revalidate(self, client, path):
+        etag = client.get(path)['ETag']
+        return client.get(path, HTTP_IF_NONE_MATCH=etag)
+
+    def test_fact_detail_304_until_it_changes(self):
+        path = f'/api/facts/feed/{self.fact.pk}/'
+        response = self.revalidate(self.client, path)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        etag = response['ETag']
+
+        # Votes only change the counters, bookmarks only the per-user state: both change the ETag
+        self.client.post(f'/api/reputation/votes/{self.fact.pk}/cast_vote/', {'vote_type': VoteType.UPVOTE})
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.client.post(f'{path}bookmark/')
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_bookmarked'])
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_feed_304_skips_loading_the_page(self):
+        response = self.client.get('/api/facts/feed/')
+        etag = response['ETag']
+        self.assertIn('Authorization', response['Vary'])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/facts/feed/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Neither the sources prefetch nor the vote/bookmark lookups run
+        self.assertFalse(any('facts_source' in query['sql'] for query in ctx.captured_queries))
+
+        self.fact.title = "Tides and currents"
+        self.fact.save()
+        self.assertEqual(self.client.get('/api/facts/feed/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_anonymous_cached_feed_304_without_queries(self):
+        client = APIClient()
+        etag = client.get('/api/facts/feed/')['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/facts/feed/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['X-Cache'], len(ctx)), (304, 'HIT', 0))
+
+    def test_categories_304_without_queries_until_a_category_changes(self):
+        client = APIClient()
+        etag = client.get('/api/facts/categories/')['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f'/api/facts/categories/{self.category.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, len(ctx)), (304, 0))
+
+        Category.objects.create(name="Rivers")
+        self.assertEqual(client.get('/api/facts/categories/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FeedIndexPlanTest(TestCase):
+    """
+    EXPLAINs the SQL the feed endpoints really run and checks that the planner walks
+    the partial / covering indexes instead of sorting.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader', email='reader@test.com', password='password')
+        cls.moderator = User.objects.create_user(username='mod', email='mod@test.com', password='password')
+        cls.moderator.profile.reputation_score = 100
+        cls.moderator.profile.save()
+        author = User.objects.create_user(username='author', email='author@test.com', password='password')
+        cls.category = Category.objects.create(name="Biology")
+        other = Category.objects.create(name="Physics")
+        for i in range(40):
+            fact = Fact.objects.create(
+                title=f"Indexed {i}", content="Content", author=author,
+                category=cls.category if i % 2 else other,
+                status=FactStatus.PENDING if i % 5 == 0 else FactStatus.APPROVED
+            )
+            if i % 3 == 0 and fact.status == FactStatus.APPROVED:
+                Bookmark.objects.create(user=cls.reader, fact=fact)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def page_sql(self, path):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return next(
+            query['sql'] for query in ctx.captured_queries
+            if 'FROM "facts_fact"' in query['sql'] and 'ORDER BY' in query['sql'] and 'LIMIT' in query['sql']
+        )
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Tiny test tables would otherwise always be sequentially scanned
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+    def assertWalksIndex(self, path, index_name):
+        plan = self.explain(self.page_sql(path))
+        self.assertIn(index_name, plan)
+        self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)  # SQLite sort
+        self.assertNotIn('Sort Key', plan)  # PostgreSQL sort
+        return plan
+
+    def test_every_feed_tab_uses_its_partial_index(self):
+        tabs = {
+            '': 'fact_live_created_idx',
+            '?ordering=-net_score': 'fact_live_net_score_idx',
+            '?ordering=-hot_score': 'fact_live_hot_score_idx',
+            '?ordering=-controversy_score': 'fact_live_controversy_idx',
+            '?ordering=-upvotes_count': 'fact_live_upvotes_idx',
+        }
+        for query, index_name in tabs.items():
+            with self.subTest(query=query):
+                self.assertWalksIndex(f'/api/facts/feed/{query}', index_name)
+
+    def test_next_page_seeks_into_the_index(self):
+        first = self.client.get('/api/facts/feed/?ordering=-hot_score')
+        cursor = first.data['next'].split('cursor=')[1]
+        plan = self.assertWalksIndex(f'/api/facts/feed/?ordering=-hot_score&cursor={cursor}', 'fact_live_hot_score_idx')
+        if connection.vendor == 'sqlite':
+            self.assertIn('hot_score<?', plan)
+
+    def test_category_filter_has_no_join(self):
+        sql = self.page_sql(f'/api/facts/feed/?category__slug={self.category.slug}')
+        self.assertNotIn('JOIN "facts_category"', sql.split('WHERE')[1])
+        self.assertWalksIndex(f'/api/facts/feed/?category__slug={self.category.slug}', 'fact_live_category_idx')
+
+    def test_authenticated_feed_has_no_distinct(self):
+        self.assertNotIn('DISTINCT', self.page_sql('/api/facts/feed/'))
+
+        # Users with unpublished facts still see them in their feed
+        draft = Fact.objects.create(title="My draft", content="Content", author=self.reader, category=self.category)
+        response = self.client.get('/api/facts/feed/')
+        self.assertIn(draft.pk, [row['id'] for row in response.data['results']])
+        self.assertNotIn('DISTINCT', self.page_sql('/api/facts/feed/'))
+
+    def test_moderation_queue_and_bookmarks(self):
+        self.client.force_authenticate(self.moderator)
+        self.assertWalksIndex('/api/facts/moderation/', 'fact_pending_queue_idx')
+
+        self.client.force_authenticate(self.reader)
+        plan = self.explain(self.page_sql('/api/facts/feed/bookmarks/'))
+        self.assertIn('bookmark_user_created_idx', plan)
+
+
+@override_settings(
+    IMAGE_DERIVATIVES_DISPATCH='worker',
+    VIEW_COUNT_FLUSH_INTERVAL=None,
+    IMAGE_DERIVATIVE_SIZES={'image': {'thumb': 40, 'feed': 120, 'full': 400}, 'avatar': {'thumb': 16, 'feed': 32, 'full': 64}},
+)
+class ImageDerivativesTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(username='photographer', email='photo@test.com', password='password')
+        self.fact = Fact.objects.create(
+            title="Aurora", content="Lights", author=self.user, status=FactStatus.APPROVED,
+            category=Category.objects.create(name="Sky"), image=self.upload('aurora.jpg'),
+        )
+
+    def upload(self, name, size=(300, 200)):
+        image = Image.new('RGB', size, (40, 120, 200))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees
+        exif[0x010F] = 'CameraMaker'
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+    def generate(self, *args):
+        out = StringIO()
+        call_command('generate_image_derivatives', *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfill_renders_oriented_exif_free_derivatives(self):
+        self.assertEqual(self.fact.image_derivatives, {})
+        self.assertIn('facts: 1 generated', self.generate())
+        self.assertFalse(stale_queryset(Fact, 'image').exists())
+
+        response = APIClient().get(f'/api/facts/feed/{self.fact.pk}/')
+        derivatives = response.data['image_derivatives']
+        self.assertEqual(list(derivatives), ['thumb', 'feed', 'full'])
+        # Rotated by its EXIF orientation (300x200 -> 200x300) and never upscaled
+        self.assertEqual((derivatives['thumb']['width'], derivatives['thumb']['height']), (40, 60))
+        self.assertEqual((derivatives['full']['width'], derivatives['full']['height']), (200, 300))
+        self.assertTrue(derivatives['feed']['webp'].startswith('http://testserver/media/derivatives/fact_images/'))
+
+        self.fact.refresh_from_db()
+        jpeg = self.fact.image_derivatives['variants']['feed']['jpeg']
+        with Image.open(f'{self.media_root}/{jpeg}') as rendered:
+            self.assertEqual(len(rendered.getexif()), 0)
+
+        # Nothing left to do on a second run
+        self.assertIn('facts: 0 generated', self.generate('--only', 'facts'))
+
+    def test_replaced_image_is_regenerated_and_old_files_removed(self):
+        self.generate()
+        self.fact.refresh_from_db()
+        old_thumb = self.fact.image_derivatives['variants']['thumb']['webp']
+
+        self.fact.image = self.upload('aurora-2.jpg', size=(100, 100))
+        self.fact.save()
+        # Derivatives of the previous upload are never served for the new one
+        response = APIClient().get(f'/api/facts/feed/{self.fact.pk}/')
+        self.assertEqual(response.data['image_derivatives'], {})
+
+        self.generate()
+        self.fact.refresh_from_db()
+        self.assertEqual(self.fact.image_derivatives['source'], self.fact.image.name)
+        self.assertFalse(self.fact.image.storage.exists(old_thumb))
+
+    def test_uploads_with_the_same_stem_keep_their_own_derivatives(self):
+        other = Fact.objects.create(
+            title="Comet", content="Tail", author=self.user, status=FactStatus.APPROVED,
+            category=self.fact.category, image=self.upload('aurora.png', size=(100, 100)),
+        )
+        self.generate()
+        self.fact.refresh_from_db()
+        other.refresh_from_db()
+
+        mine = self.fact.image_derivatives['variants']['thumb']
+        theirs = other.image_derivatives['variants']['thumb']
+        self.assertNotEqual(mine['webp'], theirs['webp'])
+        storage = self.fact.image.storage
+        with storage.open(mine['jpeg']) as f, Image.open(f) as rendered:
+            self.assertEqual(rendered.size, (40, 60))
+        with storage.open(theirs['jpeg']) as f, Image.open(f) as rendered:
+            self.assertEqual(rendered.size, (40, 40))
+
+    def test_unrenderable_uploads_are_marked_failed_and_not_retried(self):
+        corrupt = Fact.objects.create(
+            title="Static", content="Noise", author=self.user, status=FactStatus.APPROVED,
+            category=self.fact.category,
+            image=SimpleUploadedFile('noise.jpg', b'not an image', content_type='image/jpeg'),
+        )
+        self.fact.image.storage.delete(self.fact.image.name)  # Source lost from storage
+
+        with self.assertLogs('FactNode.images', level='WARNING'):
+            self.assertIn('facts: 0 generated, 0 skipped, 2 failed', self.generate('--only', 'facts'))
+        for fact in (self.fact, corrupt):
+            fact.refresh_from_db()
+            self.assertEqual(fact.image_derivatives, {'source': fact.image.name, 'failed': True})
+        self.assertFalse(stale_queryset(Fact, 'image').exists())
+        response = APIClient().get(f'/api/facts/feed/{corrupt.pk}/')
+        self.assertEqual(response.data['image_derivatives'], {})
+
+        # The worker goes back to sleep instead of re-rendering them in a tight loop
+        with patch('facts.management.commands.generate_image_derivatives.time.sleep',
+                   side_effect=KeyboardInterrupt) as sleep:
+            with self.assertRaises(KeyboardInterrupt):
+                self.generate('--loop', '--only', 'facts')
+        sleep.assert_called_once()
+
+    def test_avatars_skip_the_default_image(self):
+        profile = self.user.profile
+        self.assertFalse(stale_queryset(Profile, 'avatar').exists())
+
+        profile.avatar = self.upload('me.jpg')
+        profile.save()
+        self.assertIn('avatars: 1 generated', self.generate('--only', 'avatars'))
+        profile.refresh_from_db()
+        self.assertEqual(profile.avatar_derivatives['variants']['full']['width'], 64)
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=None)
+class CommentThreadTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='talker', email='talker@test.com', password='password')
+        self.fact = Fact.objects.create(
+            title="Octopus", content="Three hearts", author=self.user,
+            category=Category.objects.create(name="Biology"), status=FactStatus.APPROVED
+        )
+        # a -> b -> c, a -> d, and a second thread e
+        self.a = self.comment("a")
+        self.b = self.comment("b", self.a)
+        self.c = self.comment("c", self.b)
+        self.d = self.comment("d", self.a)
+        self.e = self.comment("e")
+
+    def comment(self, content, parent=None):
+        return Comment.objects.create(fact=self.fact, author=self.user, content=content, parent=parent)
+
+    def test_paths_give_thread_order_and_counters(self):
+        self.assertEqual([c.content for c in subtree(self.a)], ['a', 'b', 'c', 'd'])
+        self.assertEqual([c.content for c in subtree(self.b)], ['b', 'c'])
+        self.assertEqual((self.c.root_id, self.c.depth), (self.a.pk, 2))
+
+        self.fact.refresh_from_db()
+        self.a.refresh_from_db()
+        self.assertEqual((self.fact.comments_count, self.a.replies_count), (5, 2))
+
+        # Deleting b removes its subtree from the counts
+        self.b.delete()
+        self.fact.refresh_from_db()
+        self.a.refresh_from_db()
+        self.assertEqual((self.fact.comments_count, self.a.replies_count), (3, 1))
+
+    def test_list_loads_threads_with_reply_previews_in_two_queries(self):
+        client = APIClient()
+        with self.assertNumQueries(2):
+            response = client.get('/api/facts/comments/', {'fact': self.fact.pk, 'replies': 2})
+
+        threads = response.data['results']
+        self.assertEqual([thread['content'] for thread in threads], ['e', 'a'])
+        a = threads[1]
+        # The first two replies in thread order (b, then its reply c), nested
+        self.assertEqual([reply['content'] for reply in a['replies']], ['b'])
+        self.assertEqual([reply['content'] for reply in a['replies'][0]['replies']], ['c'])
+        self.assertEqual(a['more_replies'], 1)
+
+    def test_detail_loads_the_whole_subtree(self):
+        with self.assertNumQueries(2):
+            response = APIClient().get(f'/api/facts/comments/{self.a.pk}/')
+        self.assertEqual([reply['content'] for reply in response.data['replies']], ['b', 'd'])
+        self.assertEqual(response.data['replies'][0]['replies'][0]['content'], 'c')
+
+    @override_settings(COMMENT_MAX_DEPTH=1)
+    def test_replies_beyond_max_depth_continue_at_the_deepest_level(self):
+        reply = self.comment("too deep", self.b)
+        self.assertEqual((reply.parent_id, reply.depth), (self.a.pk, 1))
+
+    def test_clamping_a_deep_reply_is_one_query(self):
+        deepest = self.c
+        for level in range(4):
+            deepest = self.comment(f"level {level}", deepest)
+        self.assertEqual(deepest.depth, 6)
+        deepest = Comment.objects.get(pk=deepest.pk)  # As the API loads it: no cached ancestors
+
+        with override_settings(COMMENT_MAX_DEPTH=3), CaptureQueriesContext(connection) as ctx:
+            reply = self.comment("too deep", deepest)
+        # The ancestor is read from the path instead of walking up one parent at a time
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT') and 'facts_comment' in q['sql']]
+        self.assertEqual(len(selects), 1)
+        self.assertEqual((reply.parent.depth, reply.depth), (2, 3))
+        self.assertEqual(reply.parent_id, self.c.pk)
+        self.assertTrue(reply.path.startswith(reply.parent.path))
+
+    @override_settings(COMMENT_MAX_DEPTH=1)
+    def test_backfill_caps_depth_like_save(self):
+        # Threads written before the cap: a -> b -> c is one level too deep
+        backfill_threads = importlib.import_module('facts.migrations.0008_comment_threads').backfill_threads
+        Comment.objects.update(root=None, path='', depth=0, replies_count=0)
+        backfill_threads(django_apps, None)
+
+        self.c.refresh_from_db()
+        self.assertEqual((self.c.parent_id, self.c.depth, self.c.root_id), (self.a.pk, 1, self.a.pk))
+        self.assertEqual(len(self.c.path), 2 * len(path_segment(self.c.pk)))
+        self.a.refresh_from_db()
+        self.assertEqual(self.a.replies_count, 3)
+
+    def test_comments_invalidate_the_cached_feed(self):
+        get_cache().clear()
+        client = APIClient()
+        self.assertEqual(client.get('/api/facts/feed/')['X-Cache'], 'MISS')
+
+        comment = self.comment("f")
+        response = client.get('/api/facts/feed/')
+        self.assertEqual((response['X-Cache'], response.data['results'][0]['comments_count']), ('MISS', 6))
+
+        comment.delete()
+        response = client.get('/api/facts/feed/')
+        self.assertEqual((response['X-Cache'], response.data['results'][0]['comments_count']), ('MISS', 5))
+
+    def test_create_and_delete_through_the_api(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        other = Fact.objects.create(
+            title="Squid", content="Ink", author=self.user,
+            category=self.fact.category, status=FactStatus.APPROVED
+        )
+        response = client.post('/api/facts/comments/', {'fact': other.pk, 'parent': self.a.pk, 'content': "x"})
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post('/api/facts/comments/', {'fact': self.fact.pk, 'parent': self.e.pk, 'content': "y"})
+        self.assertEqual((response.status_code, response.data['depth']), (201, 1))
+
+        stranger = User.objects.create_user(username='stranger', email='stranger@test.com', password='password')
+        client.force_authenticate(stranger)
+        self.assertEqual(client.delete(f'/api/facts/comments/{self.e.pk}/').status_code, 403)
+
+        # The counter is part of the fact's ETag
+        response = client.get(f'/api/facts/feed/{self.fact.pk}/')
+        self.assertEqual(response.data['comments_count'], 6)
+
+
+class DirtyFieldTrackingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='editor', email='editor@test.com', password='password')
+        Fact.objects.create(
+            title="Draft", content="Text", author=self.user,
+            category=Category.objects.create(name="Chemistry"), status=FactStatus.PENDING
+        )
+        self.fact = Fact.objects.get()
+
+    def test_changes_are_tracked_against_the_loaded_row(self):
+        self.assertEqual(self.fact.changed_fields, set())
+        self.fact.title = "Final"
+        self.assertEqual((self.fact.changed_fields, self.fact.previous('title')), ({'title'}, "Draft"))
+        self.fact.save()
+        self.assertEqual((self.fact.changed_fields, self.fact.previous('title')), (set(), "Final"))
+
+        # Deferred fields are neither changed nor a problem for the receivers
+        partial = Fact.objects.only('id', 'title').get()
+        self.assertEqual(partial.changed_fields, set())
+
+    def test_counter_only_save_is_a_single_update(self):
+        self.fact.upvotes_count = 3
+        with self.assertNumQueries(1):
+            self.fact.save(update_fields=['upvotes_count', 'downvotes_count'])
+
+    def test_edit_without_status_change_leaves_the_profile_alone(self):
+        self.fact.content = "Longer text"
+        with CaptureQueriesContext(connection) as ctx:
+            self.fact.save()
+        self.assertFalse(any('accounts_profile' in query['sql'] for query in ctx.captured_queries))
+
+        self.fact.status = FactStatus.APPROVED
+        self.fact.save()
+        self.assertEqual(Profile.objects.get(user=self.user).facts_approved_count, 1)
+
+    def test_user_save_does_not_touch_an_unchanged_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+        user.profile.bio = "Chemist"
+        user.save()
+        self.assertEqual(Profile.objects.get(user=user).bio, "Chemist")
+
+    def test_profile_edit_keeps_concurrent_counter_changes(self):
+        profile = self.user.profile
+        # Votes and notifications arriving while the edit is in flight
+        Profile.objects.filter(pk=profile.pk).update(reputation_score=42, unread_notifications_count=3)
+
+        serializer = ProfileSerializer(profile, data={'bio': "Botanist"}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        profile.refresh_from_db()
+        self.assertEqual(
+            (profile.bio, profile.reputation_score, profile.unread_notifications_count), ("Botanist", 42, 3)
+        )
+
+
+@override_settings(ROOT_URLCONF='FactNode.urls_asgi', VIEW_COUNT_FLUSH_INTERVAL=None)
+class AsyncReadViewsTest(TestCase):
+    """The async views (FactNode/urls_asgi.py) must answer exactly like the DRF ones."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.author = User.objects.create_user(username='author', email='author@test.com', password='password')
+        self.reader = User.objects.create_user(username='reader', email='reader@test.com', password='password')
+        self.category = Category.objects.create(name="Volcanoes")
+        self.facts = [
+            Fact.objects.create(
+                title=f"Eruption {i}", content="Lava", author=self.author,
+                category=self.category, status=FactStatus.APPROVED,
+            )
+            for i in range(3)
+        ]
+        self.draft = Fact.objects.create(title="Magma", content="Hot", author=self.reader, category=self.category)
+        Vote.objects.create(user=self.reader, fact=self.facts[0], vote_type=VoteType.UPVOTE)
+        Bookmark.objects.create(user=self.reader, fact=self.facts[1])
+        self.token = f'Bearer {AccessToken.for_user(self.reader)}'
+        get_buffer().drain()
+
+    def async_get(self, path, token=None, **headers):
+        if token:
+            headers['Authorization'] = token
+        return async_to_sync(self.async_client.get)(path, headers=headers)
+
+    def sync_get(self, path, token=None, **headers):
+        with override_settings(ROOT_URLCONF='FactNode.urls'):
+            return self.client.get(path, headers={**headers, **({'Authorization': token} if token else {})})
+
+    def assertSameResponse(self, path, token=None):
+        expected, response = self.sync_get(path, token), self.async_get(path, token)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        return response
+
+    def test_routes_use_the_async_views(self):
+        match = resolve('/api/facts/feed/', urlconf=settings.ASGI_ROOT_URLCONF)
+        self.assertIs(match.func.view_class, FactListView)
+        # Everything else still reaches the DRF views
+        match = resolve('/api/facts/feed/1/bookmark/', urlconf=settings.ASGI_ROOT_URLCONF)
+        self.assertIs(match.func.cls, FactViewSet)
+
+    def test_payloads_and_etags_match_the_sync_views(self):
+        for token in (None, self.token):
+            with self.subTest(authenticated=bool(token)):
+                get_cache().clear()
+                self.assertSameResponse('/api/facts/feed/', token)
+                self.assertSameResponse(f'/api/facts/feed/?category__slug={self.category.slug}&ordering=-created_at', token)
+                self.assertSameResponse(f'/api/facts/feed/{self.facts[0].pk}/', token)
+                self.assertSameResponse('/api/facts/categories/', token)
+
+        response = self.assertSameResponse('/api/facts/feed/', self.token)
+        results = {item['id']: item for item in response.json()['results']}
+        self.assertEqual(results[self.facts[0].pk]['user_vote'], VoteType.UPVOTE)
+        self.assertTrue(results[self.facts[1].pk]['is_bookmarked'])
+        # Own drafts are listed for their author, like in FactViewSet
+        self.assertIn(self.draft.pk, results)
+
+    def test_next_page_link(self):
+        for i in range(10):
+            Fact.objects.create(
+                title=f"Ash {i}", content="Grey", author=self.author,
+                category=self.category, status=FactStatus.APPROVED,
+            )
+        first = self.assertSameResponse('/api/facts/feed/', self.token).json()
+        self.assertIsNotNone(first['next'])
+        second = self.assertSameResponse(first['next'], self.token).json()
+        self.assertIsNone(second['next'])
+
+    def test_304_and_404(self):
+        path = f'/api/facts/feed/{self.facts[0].pk}/'
+        etag = self.async_get(path, self.token)['ETag']
+        response = self.async_get(path, self.token, If_None_Match=etag)
+        self.assertEqual((response.status_code, response.content), (304, b''))
+        # Counted once: the second view is deduplicated, but it went through record_view
+        self.assertEqual(get_buffer().drain(), {self.facts[0].pk: 1})
+
+        etag = self.async_get('/api/facts/feed/', self.token)['ETag']
+        self.assertEqual(self.async_get('/api/facts/feed/', self.token, If_None_Match=etag).status_code, 304)
+
+        # Drafts are only visible to their author
+        self.assertSameResponse(f'/api/facts/feed/{self.draft.pk}/')
+        self.assertEqual(self.async_get(f'/api/facts/feed/{self.draft.pk}/').status_code, 404)
+        self.assertEqual(self.async_get(f'/api/facts/feed/{self.draft.pk}/', self.token).status_code, 200)
+
+    def test_anonymous_cache_is_shared_with_the_sync_views(self):
+        self.assertEqual(self.sync_get('/api/facts/feed/')['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.async_get('/api/facts/feed/')
+        self.assertEqual((response['X-Cache'], len(ctx)), ('HIT', 0))
+
+    def test_bad_token_is_rejected_like_drf(self):
+        response = self.async_get('/api/facts/feed/', 'Bearer nonsense')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+    def test_other_methods_and_browsable_api_are_delegated(self):
+        path = f'/api/facts/feed/{self.facts[2].pk}/'
+        author_token = f'Bearer {AccessToken.for_user(self.author)}'
+        response = async_to_sync(self.async_client.patch)(
+            path, {'title': "Renamed"}, content_type='application/json', headers={'Authorization': author_token},
+        )
+        # Served by FactViewSet.partial_update
+        self.assertEqual(response.status_code, 200)
+        self.facts[2].refresh_from_db()
+        self.assertEqual(self.facts[2].title, "Renamed")
+        response = self.async_get(path, Accept='text/html')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('text/html', response['Content-Type'])
+
+
+class StreamingExportTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@test.com', password='password')
+        self.staff = User.objects.create_user(username='staff', email='staff@test.com', password='password', is_staff=True)
+        self.category = Category.objects.create(name="Deserts")
+        self.old, self.new = [
+            Fact.objects.create(
+                title=title, content="Dry, \"very\"\ndry", author=self.author,
+                category=self.category, status=FactStatus.APPROVED,
+            )
+            for title in ("Sahara", "Atacama")
+        ]
+        FactSource.objects.create(fact=self.old, url='https://example.com/sahara')
+        FactSource.objects.create(fact=self.new, url='https://example.com/atacama')
+        Vote.objects.create(user=self.staff, fact=self.new, vote_type=VoteType.UPVOTE)
+        # Back-date the first fact, past the --since cut-off below
+        Fact.objects.filter(pk=self.old.pk).update(updated_at=timezone.now() - timezone.timedelta(days=30))
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def read(self, name, compressed=False):
+        path = f'{self.output_dir}/{name}'
+        if compressed:
+            with gzip.open(path, 'rt') as f:
+                return f.read()
+        with open(path) as f:
+            return f.read()
+
+    def test_command_writes_every_dataset(self):
+        call_command('export_data', output_dir=self.output_dir, stdout=StringIO())
+        facts = [json.loads(line) for line in self.read('facts.ndjson').splitlines()]
+        self.assertEqual([fact['title'] for fact in facts], ["Sahara", "Atacama"])
+        self.assertEqual(facts[0]['content'], "Dry, \"very\"\ndry")
+        self.assertEqual(len(self.read('sources.ndjson').splitlines()), 2)
+        self.assertEqual(json.loads(self.read('votes.ndjson'))['vote_type'], VoteType.UPVOTE)
+        logs = [json.loads(line) for line in self.read('reputation_logs.ndjson').splitlines()]
+        self.assertEqual(sum(log['score_change'] for log in logs), Profile.objects.get(user=self.author).reputation_score)
+
+    def test_csv_gzip_and_since(self):
+        since = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+        call_command('export_data', 'facts', 'sources', format='csv', gzip=True, since=since,
+                     output_dir=self.output_dir, stdout=StringIO())
+        rows = list(csv.DictReader(StringIO(self.read('facts.csv.gz', compressed=True))))
+        self.assertEqual([row['title'] for row in rows], ["Atacama"])
+        self.assertEqual(rows[0]['content'], "Dry, \"very\"\ndry")
+        sources = list(csv.DictReader(StringIO(self.read('sources.csv.gz', compressed=True))))
+        self.assertEqual([int(row['fact_id']) for row in sources], [self.new.pk])
+
+    def test_rows_are_read_in_chunks(self):
+        with CaptureQueriesContext(connection) as ctx:
+            lines = b''.join(export.stream('facts', chunk_size=1)).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(len(ctx), 1)  # One cursor, fetched chunk by chunk
+
+    def test_endpoint_is_staff_only_and_streams(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        self.assertEqual(client.get('/api/facts/export/facts/').status_code, 403)
+
+        client.force_authenticate(self.staff)
+        response = client.get('/api/facts/export/votes/?output=csv&gzip=1')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="votes.csv.gz"')
+        rows = list(csv.DictReader(StringIO(gzip.decompress(response.getvalue()).decode())))
+        self.assertEqual([int(row['fact_id']) for row in rows], [self.new.pk])
+
+        self.assertEqual(client.get('/api/facts/export/users/').status_code, 404)
+        self.assertEqual(client.get('/api/facts/export/facts/?since=yesterday').status_code, 400)
+        self.assertEqual(client.get('/api/facts/export/facts/?since=2025-02-30').status_code, 400)
+        self.assertEqual(client.get('/api/facts/export/facts/?since=2025-02-30T10:00:00').status_code, 400)
+
+    @override_settings(ROOT_URLCONF='FactNode.urls_asgi')
+    def test_endpoint_streams_asynchronously_under_asgi(self):
+        async def download():
+            response = await self.async_client.get(
+                '/api/facts/export/facts/', headers={'Authorization': f'Bearer {AccessToken.for_user(self.staff)}'}
+            )
+            # An async iterator: Django would otherwise list() the whole export before sending it
+            self.assertTrue(response.is_async)
+            return b''.join([block async for block in response.streaming_content])
+
+        lines = async_to_sync(download)().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ["Sahara", "Atacama"])
+
+    def test_command_rejects_a_date_that_does_not_exist(self):
+        with self.assertRaisesMessage(CommandError, "Invalid --since '2025-02-30'"):
+            call_command('export_data', 'facts', since='2025-02-30', output_dir=self.output_dir, stdout=StringIO())
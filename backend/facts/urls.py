@@ -1,14 +1,17 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import FactViewSet, CategoryViewSet, ModerationViewSet
+from .views import FactViewSet, CategoryViewSet, CommentViewSet, ModerationViewSet, FeedCacheStatsView, ExportView
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
 router.register(r'feed', FactViewSet, basename='fact')
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'moderation', ModerationViewSet, basename='moderation')
+router.register(r'comments', CommentViewSet, basename='comment')
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
+    path('cache-stats/', FeedCacheStatsView.as_view(), name='feed-cache-stats'),
+    path('export/<str:dataset>/', ExportView.as_view(), name='export'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Write-coalescing view counter for Fact.views_count.
+
+Viewing a fact never writes to the database. Views are:
+1. De-duplicated per viewer (user, session or client fingerprint) within a window, via the cache.
+2. Added to a buffer: in-process for development, a Redis hash when the cache is Redis
+   (shared by every worker).
+3. Flushed every VIEW_COUNT_FLUSH_INTERVAL seconds by a background thread, as ONE
+   `UPDATE ... SET views_count = views_count + CASE id WHEN ... END` for all buffered facts.
+
+`manage.py flush_view_counts` forces a flush of the shared buffer. The in-process buffer
+can only be flushed by its own process (by the flusher thread), so the command refuses it.
+"""
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, IntegerField, Value, When
+from .cache import get_cache
+from .models import Fact
+
+logger = logging.getLogger(__name__)
+
+
+class LocalViewBuffer:
+    """Per-process buffer. Only the process that recorded the views can flush them."""
+    shared = False
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, fact_id, count=1):
+        with self._lock:
+            self._counts[fact_id] += count
+
+    def drain(self):
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        return dict(counts)
+
+
+class RedisViewBuffer:
+    """
+    Buffer shared by all workers. drain() atomically renames the hash first,
+    so concurrent flushers never count the same view twice.
+    """
+    key = 'factnode:views:pending'
+    shared = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, fact_id, count=1):
+        self.client.hincrby(self.key, fact_id, count)
+
+    def drain(self):
+        flushing_key = f'{self.key}:{uuid.uuid4().hex}'
+        try:
+            self.client.rename(self.key, flushing_key)
+        except Exception:
+            # Nothing buffered (RENAME fails when the key does not exist)
+            return {}
+        counts = self.client.hgetall(flushing_key)
+        self.client.delete(flushing_key)
+        return {int(fact_id): int(count) for fact_id, count in counts.items()}
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_flusher = None
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                client = _redis_client()
+                _buffer = RedisViewBuffer(client) if client is not None else LocalViewBuffer()
+    return _buffer
+
+
+def _redis_client():
+    """
+    A Redis client for the server behind the feed cache, or None if that cache is not Redis.
+    Built from the cache's configuration: the cache API has no hashes or RENAME.
+    """
+    alias = getattr(settings, 'FEED_CACHE_ALIAS', 'default')
+    config = settings.CACHES[alias]
+    if config['BACKEND'] == 'django_redis.cache.RedisCache':
+        from django_redis import get_redis_connection
+        return get_redis_connection(alias, write=True)
+    if config['BACKEND'] == 'django.core.cache.backends.redis.RedisCache':
+        import redis
+        location = config['LOCATION']
+        servers = location.split(',') if isinstance(location, str) else location
+        # Like Django's backend: the first server takes the writes
+        return redis.Redis.from_url(servers[0].strip())
+    return None
+
+
+def get_viewer_id(request):
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f's{session.session_key}'
+    # Anonymous API clients: fingerprint of address + user agent
+    raw = f"{request.META.get('REMOTE_ADDR', '')}|{request.META.get('HTTP_USER_AGENT', '')}"
+    return 'a' + hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def record_view(request, fact_id):
+    """
+    Counts a view of the fact unless this viewer already saw it within the dedup window.
+    Touches only the cache/buffer, never the database.
+    """
+    window = getattr(settings, 'VIEW_COUNT_DEDUP_WINDOW', 30 * 60)
+    if not get_cache().add(f'factnode:viewed:{fact_id}:{get_viewer_id(request)}', 1, timeout=window):
+        return False
+
+    get_buffer().add(fact_id)
+    _ensure_flusher()
+    return True
+
+
+def flush_view_counts():
+    """
+    Writes every buffered view count in a single UPDATE. Returns the number of facts updated.
+    """
+    buffer = get_buffer()
+    counts = buffer.drain()
+    if not counts:
+        return 0
+
+    increment = Case(
+        *[When(pk=fact_id, then=Value(count)) for fact_id, count in counts.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    try:
+        return Fact.objects.filter(pk__in=counts.keys()).update(views_count=F('views_count') + increment)
+    except Exception:
+        # Put the views back so the next flush retries them
+        for fact_id, count in counts.items():
+            buffer.add(fact_id, count)
+        raise
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_view_counts()
+        except Exception:
+            logger.exception("Flushing buffered view counts failed")
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    global _flusher
+    interval = getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10)
+    if not interval or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _buffer_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, args=(interval,), name='view-count-flusher', daemon=True)
+            _flusher.start()
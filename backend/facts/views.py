@@ -1,25 +1,91 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, mixins, permissions, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.db.models import F, Q
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Fact, Category, Bookmark
-from .serializers import FactSerializer, CategorySerializer
+from .models import Fact, Category, Bookmark, Comment
+from .serializers import (
+    FactSerializer, CategorySerializer, CommentSerializer, BulkModerationSerializer, ExportQuerySerializer,
+)
 from .choices import FactStatus
-from .permissions import IsReputationModerator
+from .permissions import IsReputationModerator, IsAuthorOrReadOnly
+from .pagination import KeysetPagination
+from .cache import AnonymousListCacheMixin, CATEGORY_SCOPE, get_stats
+from .conditional import ConditionalFactMixin, GenerationETagMixin
+from .filters import FactFilter, FullTextSearchFilter
+from .moderation import bulk_moderate
+from .comments import attach_reply_previews, build_tree, subtree
+from . import export
+from reputation.models import Vote
 
 
-class FactViewSet(viewsets.ModelViewSet):
+def unpublished_facts(user):
+    """The user's own facts that are not in the public feed (drafts, pending, rejected)."""
+    return Fact.objects.filter(author=user).exclude(status=FactStatus.APPROVED)
+
+
+def visible_facts(user, include_own):
+    """
+    Regular users see only APPROVED facts; with include_own, authors also see their own
+    Pending/Draft facts.
+    """
+    # Public feed (Approved only)
+    visible = Q(status=FactStatus.APPROVED)
+    if include_own:
+        # A single-table OR cannot produce duplicates, so no DISTINCT is needed
+        visible |= Q(author=user)
+    return Fact.objects.filter(visible).select_related('author', 'category').prefetch_related('sources')
+
+
+class UserFactStateMixin:
+    """
+    Resolves the current user's votes and bookmarks for a whole page of facts
+    in two IN queries, instead of two queries per fact inside the serializer.
+    """
+
+    def get_user_state_context(self, facts):
+        user = self.request.user
+        if not user.is_authenticated:
+            return {}
+
+        fact_ids = [fact.pk for fact in facts]
+        user_votes = dict(
+            Vote.objects.filter(user=user, fact_id__in=fact_ids).values_list('fact_id', 'vote_type')
+        )
+        bookmarked_ids = set(
+            Bookmark.objects.filter(user=user, fact_id__in=fact_ids).values_list('fact_id', flat=True)
+        )
+        return {'user_votes': user_votes, 'bookmarked_ids': bookmarked_ids}
+
+    def get_serializer(self, *args, **kwargs):
+        # Only lists benefit from batching; single objects keep the per-object lookup
+        if kwargs.get('many') and args:
+            facts = list(args[0])
+            context = self.get_serializer_context()
+            context.update(self.get_user_state_context(facts))
+            kwargs.setdefault('context', context)
+            args = (facts,) + args[1:]
+        return super().get_serializer(*args, **kwargs)
+
+
+class FactViewSet(AnonymousListCacheMixin, ConditionalFactMixin, UserFactStateMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows facts to be viewed or created.
     """
     serializer_class = FactSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
 
     # Professional Filtering & Searching
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category__slug', 'author__username']
-    search_fields = ['title', 'content']
-    ordering_fields = ['created_at', 'upvotes_count']
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter]
+    filterset_class = FactFilter
+    # Tabs: Newest (-created_at), Top Rated (-net_score), Hot (-hot_score), Controversial (-controversy_score)
+    ordering_fields = ['created_at', 'upvotes_count', 'net_score', 'hot_score', 'controversy_score']
 
     def get_queryset(self):
         """
@@ -29,16 +95,13 @@ class FactViewSet(viewsets.ModelViewSet):
         """
         user = self.request.user
 
-        # Public feed (Approved only)
-        queryset = Fact.objects.filter(status=FactStatus.APPROVED)
-
-        # If user is logged in, include their own drafts/pending facts
-        if user.is_authenticated:
-            my_facts = Fact.objects.filter(author=user)
-            # Combine the two querysets (Distinct to avoid duplicates)
-            queryset = (queryset | my_facts).distinct()
-
-        return queryset.select_related('author', 'category').prefetch_related('sources')
+        # If user is logged in, include their own drafts/pending facts. On list pages the OR
+        # is only added when the user actually has unpublished facts: the plain APPROVED
+        # filter can walk a partial feed index, the OR has to sort.
+        include_own = user.is_authenticated and (
+            self.action != 'list' or unpublished_facts(user).exists()
+        )
+        return visible_facts(user, include_own)
 
     # --- MOVED OUTSIDE OF get_queryset ---
 
@@ -57,8 +120,12 @@ class FactViewSet(viewsets.ModelViewSet):
     # 2. Action to List My Bookmarks (GET /api/facts/feed/bookmarks/)
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def bookmarks(self, request):
-        # Note: We query Bookmark objects, then fetch the related facts
-        bookmarked_facts = Fact.objects.filter(bookmarked_by__user=request.user, status=FactStatus.APPROVED)
+        # Most recently bookmarked first: walks bookmark_user_created_idx, then fetches the facts
+        bookmarked_facts = Fact.objects.filter(
+            bookmarked_by__user=request.user, status=FactStatus.APPROVED
+        ).annotate(
+            bookmarked_at=F('bookmarked_by__created_at')
+        ).order_by('-bookmarked_at').select_related('author', 'category').prefetch_related('sources')
 
         page = self.paginate_queryset(bookmarked_facts)
         if page is not None:
@@ -69,40 +136,146 @@ class FactViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(GenerationETagMixin, AnonymousListCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only endpoint for categories (used for filters in frontend).
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     pagination_class = None
+    cache_scope = CATEGORY_SCOPE
 
 
-class ModerationViewSet(viewsets.ReadOnlyModelViewSet):
+class CommentViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.CreateModelMixin,
+                     mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    Threaded comments on live facts.
+    GET  /api/facts/comments/?fact=<id>&replies=<n>  top-level comments, newest first, each with its
+                                                     first n replies (COMMENT_REPLY_PREVIEW); 2 queries
+    GET  /api/facts/comments/<id>/                   the comment and its whole subtree; 2 queries
+    POST /api/facts/comments/                        {"fact": 1, "parent": 7, "content": "..."}
+    """
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    pagination_class = KeysetPagination
+    max_reply_preview = 20
+
+    def get_queryset(self):
+        return Comment.objects.filter(fact__status=FactStatus.APPROVED).select_related('author')
+
+    def list(self, request, *args, **kwargs):
+        fact_id = request.query_params.get('fact')
+        if not fact_id or not fact_id.isdigit():
+            raise ValidationError({'fact': "A fact id is required."})
+        try:
+            limit = int(request.query_params.get('replies', getattr(settings, 'COMMENT_REPLY_PREVIEW', 3)))
+        except ValueError:
+            raise ValidationError({'replies': "Must be a number."})
+        limit = min(max(limit, 0), self.max_reply_preview)
+
+        # Walks comment_fact_created_idx; replies of the page's threads come in one more query
+        roots = self.get_queryset().filter(fact_id=fact_id, parent__isnull=True).order_by('-created_at')
+        page = attach_reply_previews(self.paginate_queryset(roots), limit)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        comment = self.get_object()
+        tree = build_tree(subtree(comment))
+        return Response(self.get_serializer(tree[0]).data)
+
+
+class FeedCacheStatsView(APIView):
+    """
+    Hit/miss counters of the anonymous response cache (staff only).
+    GET /api/facts/cache-stats/
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats())
+
+
+class ExportView(APIView):
+    """
+    Streams a whole table (staff only), see facts/export.py.
+    GET /api/facts/export/<facts|sources|votes|reputation_logs>/?output=ndjson|csv&since=2025-01-01&gzip=1
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, dataset):
+        if dataset not in export.DATASETS:
+            raise Http404
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        fmt, compress = query.validated_data['output'], query.validated_data['gzip']
+
+        stream = export.astream if isinstance(request._request, ASGIRequest) else export.stream
+        response = StreamingHttpResponse(
+            stream(dataset, fmt, query.validated_data.get('since'), compress),
+            content_type='application/gzip' if compress else export.CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export.file_name(dataset, fmt, compress)}"'
+        return response
+
+
+class ModerationViewSet(UserFactStateMixin, viewsets.ReadOnlyModelViewSet):
     """
     Special Interface for High-Rank Users (Researchers+).
     Shows a queue of facts waiting for approval.
     """
     serializer_class = FactSerializer
     permission_classes = [IsReputationModerator]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Fact.objects.filter(status=FactStatus.PENDING).order_by('created_at')
+        return (
+            Fact.objects.filter(status=FactStatus.PENDING)
+            .select_related('author', 'category')
+            .prefetch_related('sources')
+            .order_by('created_at')
+        )
+
+    # Single and bulk actions share facts.moderation.bulk_moderate,
+    # so counters, approved_at and notifications are handled the same way.
 
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         fact = self.get_object()
-        fact.status = FactStatus.APPROVED
-        fact.approved_by = request.user
-        fact.save()
+        bulk_moderate(Fact.objects.filter(pk=fact.pk), FactStatus.APPROVED, moderator=request.user)
         return Response({'status': 'Fact approved successfully'})
 
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         fact = self.get_object()
-        fact.status = FactStatus.REJECTED
         reason = request.data.get('reason', '')
-        if reason:
-            fact.rejection_reason = reason
-        fact.save()
-        return Response({'status': 'Fact rejected'})
\ No newline at end of file
+        bulk_moderate(Fact.objects.filter(pk=fact.pk), FactStatus.REJECTED, reason=reason, moderator=request.user)
+        return Response({'status': 'Fact rejected'})
+
+    @action(detail=False, methods=['post'])
+    def bulk_approve(self, request):
+        """
+        POST /api/facts/moderation/bulk_approve/  {"ids": [1, 2, 3]}
+        Only facts still in the queue are changed; the rest are reported as skipped.
+        """
+        return self._bulk(request, FactStatus.APPROVED)
+
+    @action(detail=False, methods=['post'])
+    def bulk_reject(self, request):
+        """
+        POST /api/facts/moderation/bulk_reject/  {"ids": [1, 2, 3], "reason": "..."}
+        """
+        return self._bulk(request, FactStatus.REJECTED)
+
+    def _bulk(self, request, new_status):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data['ids'])
+
+        updated = bulk_moderate(
+            Fact.objects.filter(status=FactStatus.PENDING, pk__in=ids),
+            new_status,
+            reason=serializer.validated_data['reason'],
+            moderator=request.user
+        )
+        return Response({'status': new_status, 'updated': updated, 'skipped': len(ids) - updated})
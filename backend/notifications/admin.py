@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Notification
+from .counters import mark_read
 
 
 @admin.register(Notification)
@@ -12,4 +13,4 @@ class NotificationAdmin(admin.ModelAdmin):
 
     @admin.action(description='Mark selected notifications as read')
     def mark_as_read(self, request, queryset):
-        queryset.update(is_read=True)
\ No newline at end of file
+        mark_read(queryset)
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Async version of GET /api/notifications/ (NotificationViewSet.list), served under ASGI
+(see FactNode/async_api.py). The COUNT for the page links and the page itself are
+independent queries, so they are started together.
+"""
+import asyncio
+
+from django.core.paginator import InvalidPage, Paginator
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from FactNode.async_api import AsyncReadView, fetch, render
+from .models import Notification
+from .serializers import NotificationSerializer
+from .views import with_targets
+
+
+class NotificationListView(AsyncReadView):
+    """Same ?page= pagination and payload as the DRF default PageNumberPagination."""
+    requires_authentication = True
+    pagination = PageNumberPagination
+
+    async def read(self, request):
+        pagination = self.pagination()
+        size = pagination.page_size
+        queryset = with_targets(Notification.objects.filter(recipient=request.user))
+
+        requested = request.query_params.get(pagination.page_query_param) or 1
+        if requested in pagination.last_page_strings:
+            # The last page depends on the count
+            count = await fetch(queryset.count)
+            number = max((count + size - 1) // size, 1)
+            rows = await fetch(list, queryset[(number - 1) * size:number * size])
+        else:
+            try:
+                number = int(requested)
+            except (TypeError, ValueError):
+                raise NotFound(pagination.invalid_page_message)
+            if number < 1:
+                raise NotFound(pagination.invalid_page_message)
+            count, rows = await asyncio.gather(
+                fetch(queryset.count),
+                fetch(list, queryset[(number - 1) * size:number * size]),
+            )
+
+        # Validates the number against the count exactly like DRF (without querying again)
+        paginator = Paginator(rows, size)
+        paginator.count = count
+        try:
+            paginator.validate_number(number)
+        except InvalidPage:
+            raise NotFound(pagination.invalid_page_message)
+
+        url = request.build_absolute_uri()
+        next_link = replace_query_param(url, pagination.page_query_param, number + 1) if number < paginator.num_pages else None
+        if number <= 1:
+            previous_link = None
+        elif number == 2:
+            previous_link = remove_query_param(url, pagination.page_query_param)
+        else:
+            previous_link = replace_query_param(url, pagination.page_query_param, number - 1)
+
+        return render({
+            'count': count,
+            'next': next_link,
+            'previous': previous_link,
+            'results': NotificationSerializer(rows, many=True, context={'request': request}).data,
+        })
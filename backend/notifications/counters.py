@@ -0,0 +1,80 @@
+"""
+Denormalized unread-notification counter (Profile.unread_notifications_count).
+
+Every path that creates or reads notifications goes through here, so the counter
+stays exact without COUNT queries. The value is also cached per user, which lets
+the unread_count endpoint answer polling clients without touching the database.
+
+Changes invalidate the cached value, but only in the cache of the process making them.
+With the default per-process cache (no REDIS_URL), another process (a second app worker,
+or `process_notification_outbox` in 'worker' mode) keeps serving its cached value until
+NOTIFICATION_UNREAD_CACHE_TIMEOUT expires; with a shared cache the badge is always current.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from accounts.models import Profile
+from facts.cache import get_cache
+from FactNode.db import write_transaction
+
+
+def _cache_key(user_id):
+    return f'factnode:unread:{user_id}'
+
+
+def _invalidate(user_ids):
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    get_cache().delete_many(keys)
+    # Again after commit, in case a concurrent reader cached the pre-commit value
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def adjust_unread(deltas):
+    """
+    Applies {user_id: delta} to the counters, one UPDATE per user.
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    for user_id, delta in deltas.items():
+        if delta > 0:
+            value = F('unread_notifications_count') + delta
+        else:
+            value = Greatest(F('unread_notifications_count') + delta, 0)
+        Profile.objects.filter(user_id=user_id).update(unread_notifications_count=value)
+    if deltas:
+        _invalidate(deltas.keys())
+
+
+def notifications_created(notifications):
+    """Call after (bulk) creating notifications."""
+    adjust_unread(Counter(n.recipient_id for n in notifications if not n.is_read))
+
+
+def mark_read(queryset):
+    """
+    Marks the notifications in the queryset as read and decrements the owners' counters
+    by exactly the number of rows that flipped. Returns that number.
+    """
+    with write_transaction():
+        # Lock the unread rows so concurrent mark_read calls cannot both count them
+        rows = list(queryset.filter(is_read=False).select_for_update().values_list('id', 'recipient_id'))
+        if not rows:
+            return 0
+        queryset.model.objects.filter(pk__in=[pk for pk, _ in rows]).update(is_read=True)
+        adjust_unread({user_id: -count for user_id, count in Counter(r for _, r in rows).items()})
+    return len(rows)
+
+
+def get_unread_count(user_id):
+    cache = get_cache()
+    count = cache.get(_cache_key(user_id))
+    if count is None:
+        count = (
+            Profile.objects.filter(user_id=user_id)
+            .values_list('unread_notifications_count', flat=True)
+            .first()
+        ) or 0
+        cache.set(_cache_key(user_id), count, timeout=getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 30))
+    return count
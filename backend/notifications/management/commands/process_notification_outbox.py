@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from notifications.outbox import drain_outbox, outbox_stats
+
+
+class Command(BaseCommand):
+    """
+    Delivers pending notifications from the outbox.
+    Run once (cron) or with --loop as a long-lived worker.
+    """
+    help = 'Materialize queued notification intents into notifications.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox.')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls with --loop.')
+        parser.add_argument('--stats', action='store_true', help='Only report outbox depth and lag.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            stats = outbox_stats()
+            self.stdout.write(f"Outbox depth: {stats['depth']}, lag: {stats['lag_seconds']}s")
+            return
+
+        while True:
+            stats = outbox_stats()
+            delivered = drain_outbox(batch_size=options['batch_size'])
+            if delivered or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Delivered {delivered} notifications (depth was {stats['depth']}, lag {stats['lag_seconds']}s)."
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
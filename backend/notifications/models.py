@@ -57,4 +57,47 @@ class Notification(models.Model):
         ]
 
     def __str__(self):
-        return f"Notification for {self.recipient}: {self.title}"
\ No newline at end of file
+        return f"Notification for {self.recipient}: {self.title}"
+
+
+class NotificationIntent(models.Model):
+    """
+    Transactional outbox row: a notification that still has to be delivered.
+    Signals write these inside the request's transaction (cheap, no GFK resolution),
+    and notifications.outbox turns them into Notification rows in batches.
+    """
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    type = models.CharField(max_length=20, choices=NotificationType.choices)
+    title = models.CharField(max_length=255)
+    message = models.TextField(blank=True)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']  # FIFO delivery
+
+    def to_notification(self):
+        return Notification(
+            recipient_id=self.recipient_id,
+            actor_id=self.actor_id,
+            type=self.type,
+            title=self.title,
+            message=self.message,
+            content_type_id=self.content_type_id,
+            object_id=self.object_id,
+        )
+
+    def __str__(self):
+        return f"Pending notification for {self.recipient_id}: {self.title}"
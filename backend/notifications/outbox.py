@@ -0,0 +1,136 @@
+"""
+Transactional outbox for notifications.
+
+Signal receivers call `enqueue_notification()` instead of creating Notification rows.
+That writes one small NotificationIntent row in the caller's transaction, so the
+notification is recorded if (and only if) the approval/vote commits.
+
+Delivery happens off the request path, either:
+- in-process: after commit, a small thread pool drains the outbox
+  (NOTIFICATION_OUTBOX_DISPATCH = 'thread'), or
+- by a worker: `manage.py process_notification_outbox` (NOTIFICATION_OUTBOX_DISPATCH = 'worker').
+
+Draining materializes intents with bulk_create in batches and deletes them in the
+same transaction. On PostgreSQL, SKIP LOCKED lets several workers drain in parallel.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, close_old_connections, transaction
+from django.db.models import Min, Count
+from django.utils import timezone
+from .models import Notification, NotificationIntent
+from .counters import notifications_created
+from FactNode.db import write_transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+_drain_lock = threading.Lock()
+_drain_pending = threading.Event()
+
+
+def enqueue_notification(recipient, type, title, message='', target=None, actor=None):
+    """
+    Records a notification to be delivered once the current transaction commits.
+    """
+    intent = NotificationIntent(
+        recipient=recipient,
+        actor=actor,
+        type=type,
+        title=title,
+        message=message,
+    )
+    if target is not None:
+        # get_for_model is served from ContentType's own cache after the first call
+        intent.content_type = ContentType.objects.get_for_model(target)
+        intent.object_id = target.pk
+    intent.save()
+
+    if getattr(settings, 'NOTIFICATION_OUTBOX_DISPATCH', 'thread') == 'thread':
+        transaction.on_commit(schedule_drain)
+    return intent
+
+
+def enqueue_notifications(intents):
+    """
+    Bulk version of enqueue_notification() for unsaved NotificationIntent objects.
+    """
+    NotificationIntent.objects.bulk_create(intents)
+    if intents and getattr(settings, 'NOTIFICATION_OUTBOX_DISPATCH', 'thread') == 'thread':
+        transaction.on_commit(schedule_drain)
+    return intents
+
+
+def drain_outbox(batch_size=None, max_batches=None):
+    """
+    Delivers pending intents in FIFO batches. Returns the number of notifications created.
+    """
+    batch_size = batch_size or getattr(settings, 'NOTIFICATION_OUTBOX_BATCH_SIZE', 500)
+    delivered = 0
+    batches = 0
+
+    # One drainer per process; across processes SKIP LOCKED (where supported) splits the work
+    with _drain_lock:
+        while max_batches is None or batches < max_batches:
+            with write_transaction():
+                pending = NotificationIntent.objects.order_by('id')
+                if connection.features.has_select_for_update_skip_locked:
+                    pending = pending.select_for_update(skip_locked=True)
+                intents = list(pending[:batch_size])
+                if not intents:
+                    break
+
+                notifications = Notification.objects.bulk_create([intent.to_notification() for intent in intents])
+                notifications_created(notifications)
+                NotificationIntent.objects.filter(pk__in=[intent.pk for intent in intents]).delete()
+
+            delivered += len(intents)
+            batches += 1
+    return delivered
+
+
+def outbox_stats():
+    """
+    Depth = intents waiting; lag = age in seconds of the oldest one.
+    """
+    stats = NotificationIntent.objects.aggregate(depth=Count('id'), oldest=Min('created_at'))
+    oldest = stats.pop('oldest')
+    stats['lag_seconds'] = round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0
+    return stats
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'NOTIFICATION_OUTBOX_WORKERS', 2),
+                    thread_name_prefix='notification-outbox',
+                )
+    return _executor
+
+
+def _drain_in_background():
+    _drain_pending.clear()
+    try:
+        drain_outbox()
+    except Exception:
+        logger.exception("Draining the notification outbox failed")
+    finally:
+        close_old_connections()
+
+
+def schedule_drain():
+    """
+    Coalesces drain requests: many commits in a burst trigger a single background drain.
+    """
+    if _drain_pending.is_set():
+        return
+    _drain_pending.set()
+    _get_executor().submit(_drain_in_background)
@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from FactNode.middleware import ProfiledSerializerMixin
 from .models import Notification
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     """
     Serializer to display notifications to the user.
     """
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Notification
+from .counters import adjust_unread
+
+
+# Notifications delivered through the outbox use bulk_create (no signals) and
+# update the unread counter themselves. These receivers cover everything else,
+# e.g. notifications created or deleted one by one from the admin.
+
+@receiver(post_save, sender=Notification)
+def count_created_notification(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        adjust_unread({instance.recipient_id: 1})
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread({instance.recipient_id: -1})
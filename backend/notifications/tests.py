@@ -1,3 +1,159 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import Profile
+from facts.cache import get_cache
+from facts.models import Fact, Category
+from notifications.choices import NotificationType
+from notifications.models import Notification, NotificationIntent
+from notifications.outbox import enqueue_notification, drain_outbox, outbox_stats
+from notifications.counters import get_unread_count
 
-# Create your tests here.
+User = get_user_model()
+
+
+class NotificationOutboxTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', email='reader@test.com', password='password')
+
+    def enqueue(self, title):
+        return enqueue_notification(
+            recipient=self.user,
+            type=NotificationType.SYSTEM,
+            title=title,
+            target=self.user.profile
+        )
+
+    def test_intents_are_delivered_in_batches(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for i in range(5):
+                self.enqueue(f"Message {i}")
+        self.assertEqual(len(callbacks), 5)  # One (coalesced) drain trigger per enqueue
+
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertEqual(outbox_stats()['depth'], 5)
+
+        delivered = drain_outbox(batch_size=2)
+
+        self.assertEqual(delivered, 5)
+        self.assertEqual(outbox_stats(), {'depth': 0, 'lag_seconds': 0.0})
+        notification = Notification.objects.order_by('id').first()
+        self.assertEqual(notification.title, "Message 0")
+        self.assertEqual(notification.target, self.user.profile)
+
+    def test_rolled_back_transaction_leaves_no_intent(self):
+        try:
+            with transaction.atomic():
+                self.enqueue("Never sent")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(NotificationIntent.objects.exists())
+
+
+class UnreadCountTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='badge', email='badge@test.com', password='password')
+        for i in range(3):
+            enqueue_notification(recipient=self.user, type=NotificationType.SYSTEM, title=f"Hello {i}")
+        drain_outbox()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def test_counter_tracks_reads(self):
+        self.assertEqual(get_unread_count(self.user.pk), 3)
+
+        first = Notification.objects.filter(recipient=self.user).first()
+        self.client.post(f'/api/notifications/{first.pk}/mark_read/')
+        self.client.post(f'/api/notifications/{first.pk}/mark_read/')  # Already read: no double decrement
+        self.assertEqual(get_unread_count(self.user.pk), 2)
+
+        self.client.post('/api/notifications/mark_all_read/')
+        self.assertEqual(get_unread_count(self.user.pk), 0)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.unread_notifications_count, 0)
+
+    @override_settings(NOTIFICATION_UNREAD_CACHE_TIMEOUT=0)
+    def test_cached_count_expires(self):
+        self.assertEqual(get_unread_count(self.user.pk), 3)
+        # Changed by another process, whose invalidation never reached this cache
+        Profile.objects.filter(user=self.user).update(unread_notifications_count=5)
+        self.assertEqual(get_unread_count(self.user.pk), 5)
+
+    def test_conditional_get_skips_database(self):
+        response = self.client.get('/api/notifications/unread_count/')
+        self.assertEqual(response.data, {'unread_count': 3})
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/notifications/unread_count/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class NotificationListQueryTest(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='inbox', email='inbox@test.com', password='password')
+        self.category = Category.objects.create(name="Astronomy")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_notifications(self, count):
+        for i in range(count):
+            fact = Fact.objects.create(title=f"Star {Fact.objects.count()}", content="Hot", author=self.user, category=self.category)
+            enqueue_notification(recipient=self.user, type=NotificationType.FACT_APPROVED, title="Fact", target=fact)
+            enqueue_notification(recipient=self.user, type=NotificationType.RANK_UP, title="Rank", target=self.user.profile)
+        drain_outbox()
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data['results']
+
+    def test_target_preview_queries_are_constant(self):
+        self.add_notifications(1)
+        few, _ = self.count_list_queries()
+
+        self.add_notifications(4)
+        many, results = self.count_list_queries()
+
+        self.assertEqual(few, many)
+        previews = {item['target_preview'] for item in results}
+        self.assertIn("inbox's Profile (0 rep)", previews)
+        self.assertIn("Star 0 (Draft)", previews)
+
+
+@override_settings(ROOT_URLCONF='FactNode.urls_asgi')
+class AsyncNotificationListTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='inbox', email='inbox@test.com', password='password')
+        self.category = Category.objects.create(name="Astronomy")
+        for i in range(12):
+            fact = Fact.objects.create(title=f"Star {i}", content="Hot", author=self.user, category=self.category)
+            enqueue_notification(recipient=self.user, type=NotificationType.FACT_APPROVED, title="Fact", target=fact)
+        drain_outbox()
+        self.token = f'Bearer {AccessToken.for_user(self.user)}'
+
+    def get(self, path, asynchronous=True):
+        headers = {'Authorization': self.token}
+        if asynchronous:
+            return async_to_sync(self.async_client.get)(path, headers=headers)
+        with override_settings(ROOT_URLCONF='FactNode.urls'):
+            return self.client.get(path, headers=headers)
+
+    def test_pages_match_the_sync_view(self):
+        for path in ('/api/notifications/', '/api/notifications/?page=2', '/api/notifications/?page=last',
+                     '/api/notifications/?page=3', '/api/notifications/?page=x'):
+            with self.subTest(path=path):
+                expected, response = self.get(path, asynchronous=False), self.get(path)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.json(), expected.json())
+
+    def test_requires_authentication(self):
+        response = async_to_sync(self.async_client.get)('/api/notifications/')
+        self.assertEqual(response.status_code, 401)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import NotificationViewSet
+from .views import NotificationViewSet, OutboxStatsView
 
 router = DefaultRouter()
 router.register(r'', NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    path('outbox-stats/', OutboxStatsView.as_view(), name='notification-outbox-stats'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
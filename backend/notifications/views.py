@@ -1,8 +1,28 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from django.utils.http import parse_etags, quote_etag
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from .models import Notification
+from accounts.models import Profile
+from facts.models import Fact
 from .serializers import NotificationSerializer
+from .outbox import outbox_stats
+from .counters import mark_read, get_unread_count
+
+
+def with_targets(queryset):
+    """
+    Resolves targets with one query per content type instead of one per notification.
+    Profile.__str__ needs the user, so it is joined in.
+    """
+    return queryset.prefetch_related(GenericPrefetch('target', [
+        Fact.objects.all(),
+        Profile.objects.select_related('user'),
+    ]))
+
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -14,7 +34,11 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         # IMPORTANT: Only show notifications for the logged-in user!
-        return Notification.objects.filter(recipient=self.request.user)
+        queryset = Notification.objects.filter(recipient=self.request.user)
+
+        if self.action in ('list', 'retrieve'):
+            queryset = with_targets(queryset)
+        return queryset
 
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
@@ -22,8 +46,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         Custom endpoint: POST /api/notifications/{id}/mark_read/
         """
         notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        mark_read(self.get_queryset().filter(pk=notification.pk))
         return Response({'status': 'marked as read'})
 
     @action(detail=False, methods=['post'])
@@ -31,5 +54,32 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Custom endpoint: POST /api/notifications/mark_all_read/
         """
-        self.get_queryset().update(is_read=True)
-        return Response({'status': 'all marked as read'})
\ No newline at end of file
+        mark_read(self.get_queryset())
+        return Response({'status': 'all marked as read'})
+
+    @action(detail=False, methods=['get'], authentication_classes=[JWTStatelessUserAuthentication])
+    def unread_count(self, request):
+        """
+        Custom endpoint: GET /api/notifications/unread_count/
+        Served from the cached counter. The token is validated without loading the user,
+        so a poll with a matching If-None-Match gets a 304 without any database query.
+        """
+        count = get_unread_count(request.user.pk)
+        etag = quote_etag(f'unread-{count}')
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response({'unread_count': count}, headers=headers)
+
+
+class OutboxStatsView(APIView):
+    """
+    Depth and lag of the notification outbox (staff only).
+    GET /api/notifications/outbox-stats/
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(outbox_stats())
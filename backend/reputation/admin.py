@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vote, ReputationLog
+from .models import Vote, ReputationLog, LeaderboardEntry
 
 
 @admin.register(Vote)
@@ -20,4 +20,16 @@ class ReputationLogAdmin(admin.ModelAdmin):
     search_fields = ('user__username',)
 
     # Usually, logs should be immutable (read-only)
-    readonly_fields = ('user', 'action', 'score_change', 'related_fact', 'created_at')
\ No newline at end of file
+    readonly_fields = ('user', 'action', 'score_change', 'related_fact', 'created_at')
+
+
+@admin.register(LeaderboardEntry)
+class LeaderboardEntryAdmin(admin.ModelAdmin):
+    """
+    Precomputed scores (reputation/leaderboards.py).
+    Derived from ReputationLog: fix the log and run `rebuild_leaderboards` instead of editing.
+    """
+    list_display = ('board', 'period', 'period_start', 'user', 'score')
+    list_filter = ('period', 'period_start')
+    search_fields = ('user__username', 'board')
+    readonly_fields = ('board', 'period', 'period_start', 'user', 'score')
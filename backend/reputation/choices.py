@@ -16,5 +16,17 @@ class ReputationAction(models.TextChoices):
     FACT_APPROVED = 'FACT_APPROVED', _('Fact Approved')
     FACT_REJECTED = 'FACT_REJECTED', _('Fact Rejected')
     VOTE_RECEIVED = 'VOTE_RECEIVED', _('Received Vote on Fact')
+    VOTE_CHANGED = 'VOTE_CHANGED', _('Vote on Fact Changed')
+    VOTE_REMOVED = 'VOTE_REMOVED', _('Vote on Fact Removed')
     VOTE_GIVEN = 'VOTE_GIVEN', _('Voted on Fact')
-    BONUS = 'BONUS', _('Admin Bonus')
\ No newline at end of file
+    BONUS = 'BONUS', _('Admin Bonus')
+
+
+class LeaderboardPeriod(models.TextChoices):
+    """
+    The window a leaderboard sums reputation over.
+    Weekly boards start on Monday, monthly boards on the 1st (local time).
+    """
+    ALL_TIME = 'ALL', _('All Time')
+    WEEK = 'WEEK', _('This Week')
+    MONTH = 'MONTH', _('This Month')
@@ -0,0 +1,258 @@
+"""
+Precomputed leaderboards.
+
+A board is either 'global' (all reputation) or 'category:<id>' (reputation earned with the
+facts of one category, i.e. the votes received on them: reputation/services.py only
+accepts votes on approved facts, and approvals themselves give no reputation), each summed
+over three periods: all time, the current week and the current month. Scores live in
+LeaderboardEntry, one row per board/period/user, and LeaderboardScore counts the users
+holding each score, zero included.
+
+Nothing is computed at read time:
+- a top-N page is `ORDER BY score DESC, user_id LIMIT N` on leaderboard_rank_idx, an index
+  range scan that stops after N rows; ranks on the page follow from the order,
+- "my rank" is one unique-index lookup for the user's score, then 1 + SUM(users_count) of
+  the LeaderboardScore rows above it: the work grows with the number of distinct higher
+  scores (logarithmic-ish in practice, scores cluster), never with the number of users.
+
+Both tables are updated incrementally by reputation/ledger.py whenever ReputationLog entries
+are inserted (record()), with a fixed number of statements per call. Logs written in bulk
+elsewhere (fake data, imports) are picked up by `manage.py rebuild_leaderboards`, which
+recomputes everything from ReputationLog. Ties share a rank (1, 2, 2, 4).
+"""
+import datetime
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from facts.models import Fact
+from .choices import LeaderboardPeriod
+from .models import LeaderboardEntry, LeaderboardScore, ReputationLog
+
+GLOBAL_BOARD = 'global'
+# period_start of the ALL_TIME boards
+ALL_TIME_START = datetime.date(1970, 1, 1)
+
+TRUNCATE = {
+    LeaderboardPeriod.WEEK: TruncWeek,
+    LeaderboardPeriod.MONTH: TruncMonth,
+}
+
+
+def category_board(category_id):
+    return f'category:{category_id}'
+
+
+def period_start(period, day=None):
+    """First day of the period containing `day` (today by default)."""
+    day = day or timezone.localdate()
+    if period == LeaderboardPeriod.WEEK:
+        return day - datetime.timedelta(days=day.weekday())
+    if period == LeaderboardPeriod.MONTH:
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _board_filter(board, period, start):
+    return {'board': board, 'period': period, 'period_start': start}
+
+
+# --- Incremental updates ---
+
+def record(entries, day=None):
+    """
+    Adds freshly inserted ReputationLog entries to every board and period they count for.
+    """
+    fact_ids = {entry.related_fact_id for entry in entries if entry.related_fact_id}
+    categories = dict(
+        Fact.objects.filter(pk__in=fact_ids, category__isnull=False).values_list('id', 'category_id')
+    ) if fact_ids else {}
+
+    starts = {period: period_start(period, day) for period in LeaderboardPeriod}
+    deltas = Counter()
+    for entry in entries:
+        boards = [GLOBAL_BOARD]
+        if entry.related_fact_id in categories:
+            boards.append(category_board(categories[entry.related_fact_id]))
+        for board in boards:
+            for period, start in starts.items():
+                deltas[(board, period, start, entry.user_id)] += entry.score_change
+    apply_deltas({key: delta for key, delta in deltas.items() if delta})
+
+
+def _entry_key(entry):
+    return entry.board, entry.period, entry.period_start, entry.user_id
+
+
+def _lock_or_create(deltas):
+    """
+    Locks the existing entries of these keys and inserts the missing ones with their delta
+    as score. Returns the locked entries; the inserted ones are done.
+    """
+    entries = [
+        entry for entry in LeaderboardEntry.objects.select_for_update().filter(
+            board__in={key[0] for key in deltas},
+            period_start__in={key[2] for key in deltas},
+            user_id__in={key[3] for key in deltas},
+        ).order_by('pk')
+        # The IN lists also match other combinations of these values
+        if _entry_key(entry) in deltas
+    ]
+    found = {_entry_key(entry) for entry in entries}
+    # In key order, so concurrent inserts of the same new keys queue instead of deadlocking
+    LeaderboardEntry.objects.bulk_create([
+        LeaderboardEntry(board=key[0], period=key[1], period_start=key[2], user_id=key[3], score=delta)
+        for key, delta in sorted(deltas.items()) if key not in found
+    ])
+    return entries
+
+
+def apply_deltas(deltas):
+    """
+    Applies {(board, period, period_start, user_id): score change}. Statements do not
+    grow with the number of keys: one locking SELECT, one INSERT for users new to a board,
+    one UPDATE, then three for the score histogram.
+
+    The histogram must know which rows this call created (they have no previous score to
+    move out of), so missing rows are inserted without ignoring conflicts. If a concurrent first entry for
+    the same user wins the insert, the savepoint is rolled back and the now committed row
+    is locked and incremented like any other.
+    """
+    if not deltas:
+        return
+    with transaction.atomic():
+        for attempt in range(len(deltas) + 1):
+            try:
+                with transaction.atomic():
+                    entries = _lock_or_create(deltas)
+                break
+            except IntegrityError:
+                # The row that won is committed by now, so every retry finds at least one
+                # more; past that many retries, the error is something else
+                if attempt == len(deltas):
+                    raise
+
+        created = set(deltas) - {_entry_key(entry) for entry in entries}
+        histogram = Counter()
+        for board, period, start, user_id in created:
+            histogram[(board, period, start, deltas[(board, period, start, user_id)])] += 1
+        changes = {}
+        for entry in entries:
+            delta = deltas[_entry_key(entry)]
+            changes[entry.pk] = delta
+            histogram[(entry.board, entry.period, entry.period_start, entry.score)] -= 1
+            histogram[(entry.board, entry.period, entry.period_start, entry.score + delta)] += 1
+
+        if changes:
+            LeaderboardEntry.objects.filter(pk__in=changes).update(score=F('score') + Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in changes.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ))
+        _apply_histogram({key: change for key, change in histogram.items() if change})
+
+
+def _score_q(board, period, start, score):
+    return Q(board=board, period=period, period_start=start, score=score)
+
+
+def _apply_histogram(changes):
+    if not changes:
+        return
+    # Make sure every touched score has a row, then move the counts in one UPDATE
+    LeaderboardScore.objects.bulk_create(
+        [LeaderboardScore(board=board, period=period, period_start=start, score=score)
+         for board, period, start, score in changes],
+        ignore_conflicts=True,
+    )
+    touched = reduce(or_, (_score_q(*key) for key in changes))
+    LeaderboardScore.objects.filter(touched).update(users_count=F('users_count') + Case(
+        *[When(_score_q(*key), then=Value(change)) for key, change in changes.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    ))
+    LeaderboardScore.objects.filter(touched, users_count=0).delete()
+
+
+# --- Reads ---
+
+def top(board, period, start, limit):
+    """The first `limit` entries, each with a `rank` attribute."""
+    entries = list(
+        LeaderboardEntry.objects.filter(**_board_filter(board, period, start))
+        .select_related('user')
+        .only('score', 'user_id', 'user__username')
+        .order_by('-score', 'user_id')[:limit]
+    )
+    previous = None
+    for position, entry in enumerate(entries, start=1):
+        # Every row above is ranked higher, unless it has the same score
+        entry.rank = previous.rank if previous and previous.score == entry.score else position
+        previous = entry
+    return entries
+
+
+def rank_of(user_id, board, period, start):
+    """{'rank', 'score'} of one user, or None if they are not on the board."""
+    board_filter = _board_filter(board, period, start)
+    score = (
+        LeaderboardEntry.objects.filter(user_id=user_id, **board_filter)
+        .values_list('score', flat=True)
+        .first()
+    )
+    if score is None:
+        return None
+    higher = LeaderboardScore.objects.filter(score__gt=score, **board_filter).aggregate(
+        total=Sum('users_count')
+    )['total'] or 0
+    return {'rank': higher + 1, 'score': score}
+
+
+# --- Full rebuild ---
+
+def _log_totals(period, by_category):
+    """(board, period_start, user_id, total) for every period of ReputationLog."""
+    fields = ['user_id']
+    queryset = ReputationLog.objects.all()
+    if by_category:
+        queryset = queryset.filter(related_fact__category__isnull=False)
+        fields.append('related_fact__category_id')
+    if period in TRUNCATE:
+        queryset = queryset.annotate(start=TRUNCATE[period]('created_at'))
+        fields.append('start')
+
+    for row in queryset.values(*fields).annotate(total=Sum('score_change')).order_by().iterator():
+        board = category_board(row['related_fact__category_id']) if by_category else GLOBAL_BOARD
+        start = row.get('start', ALL_TIME_START)
+        if isinstance(start, datetime.datetime):
+            start = start.date()
+        yield board, start, row['user_id'], row['total']
+
+
+def rebuild(batch_size=2000):
+    """Recomputes every board from ReputationLog. Returns the number of entries written."""
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardScore.objects.all().delete()
+
+        written = 0
+        for period in LeaderboardPeriod:
+            for by_category in (False, True):
+                entries = []
+                histogram = Counter()
+                for board, start, user_id, total in _log_totals(period, by_category):
+                    entries.append(LeaderboardEntry(
+                        board=board, period=period, period_start=start, user_id=user_id, score=total,
+                    ))
+                    histogram[(board, start, total)] += 1
+                LeaderboardEntry.objects.bulk_create(entries, batch_size=batch_size)
+                LeaderboardScore.objects.bulk_create([
+                    LeaderboardScore(board=board, period=period, period_start=start, score=score, users_count=count)
+                    for (board, start, score), count in histogram.items()
+                ], batch_size=batch_size)
+                written += len(entries)
+    return written
@@ -0,0 +1,148 @@
+"""
+Reputation changes: every write to Profile.reputation_score from votes goes through
+change_reputation().
+
+One call, however many authors it touches, is:
+1. ONE `UPDATE accounts_profile SET reputation_score = reputation_score + CASE ... END
+   WHERE user_id IN (...) RETURNING user_id, id, reputation_score`. The increment happens in
+   the database, so concurrent votes never lose an update, and the new scores come back
+   from the same statement: no locking SELECT before it, no re-fetch after it.
+   The old score is new - change, so rank-ups (accounts/ranks.py) are detected in Python.
+2. ONE bulk INSERT into ReputationLog (reconcile_counters recomputes scores from it, so a
+   change without its log entry would be undone by the next reconcile).
+3. ONE bulk INSERT into the notification outbox, only if someone ranked up.
+4. the incremental leaderboard update for the new entries (reputation/leaderboards.py).
+
+Backends without UPDATE ... RETURNING (MySQL, SQLite < 3.35) lock the rows with
+SELECT ... FOR UPDATE and run the same UPDATE instead.
+"""
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.sql import UpdateQuery
+from accounts.models import Profile
+from accounts.ranks import rank_index, rank_title
+from notifications.choices import NotificationType
+from notifications.models import NotificationIntent
+from notifications.outbox import enqueue_notifications
+from . import leaderboards
+from .choices import VoteType, ReputationAction
+from .models import ReputationLog
+
+# Reputation the author receives for a vote on their fact
+VOTE_REPUTATION = {
+    VoteType.UPVOTE: 10,
+    VoteType.DOWNVOTE: -2,
+}
+
+
+def vote_entry(author_id, fact_id, old_type, new_type):
+    """
+    The unsaved ReputationLog for a vote being cast (old_type None), flipped or removed
+    (new_type None), or None if the author's reputation does not change.
+    A flip or removal compensates what the earlier vote gave, so the author's score
+    always equals the sum over the votes that currently exist.
+    """
+    score_change = VOTE_REPUTATION.get(new_type, 0) - VOTE_REPUTATION.get(old_type, 0)
+    if not score_change:
+        return None
+    if old_type is None:
+        action = ReputationAction.VOTE_RECEIVED
+    elif new_type is None:
+        action = ReputationAction.VOTE_REMOVED
+    else:
+        action = ReputationAction.VOTE_CHANGED
+    return ReputationLog(
+        user_id=author_id,
+        action=action,
+        score_change=score_change,
+        related_fact_id=fact_id,
+    )
+
+
+def supports_update_returning(connection):
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def _update_returning(queryset, values, returning):
+    """queryset.update(**values), returning the `returning` columns of every updated row."""
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    compiler = query.get_compiler(queryset.db)
+    sql, params = compiler.as_sql()
+    columns = ', '.join(
+        compiler.quote_name_unless_alias(queryset.model._meta.get_field(name).column)
+        for name in returning
+    )
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {columns}', params)
+        return cursor.fetchall()
+
+
+def _increment_scores(changes):
+    """Applies {user_id: change}; returns {user_id: (profile id, new score)}."""
+    queryset = Profile.objects.filter(user_id__in=changes)
+    increment = F('reputation_score') + Case(
+        *[When(user_id=user_id, then=Value(change)) for user_id, change in changes.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    if supports_update_returning(connections[queryset.db]):
+        rows = _update_returning(queryset, {'reputation_score': increment}, ['user_id', 'id', 'reputation_score'])
+        return {user_id: (profile_id, score) for user_id, profile_id, score in rows}
+
+    # Locked, so old score + change is exactly what the UPDATE writes
+    rows = list(
+        queryset.select_for_update().order_by('pk').values_list('user_id', 'id', 'reputation_score')
+    )
+    queryset.update(reputation_score=increment)
+    return {user_id: (profile_id, score + changes[user_id]) for user_id, profile_id, score in rows}
+
+
+def change_reputation(entries):
+    """
+    Applies unsaved ReputationLog entries (several per user are summed) and logs them.
+    Returns {user_id: new score} for every user whose score changed.
+    """
+    entries = [entry for entry in entries if entry is not None]
+    changes = Counter()
+    for entry in entries:
+        changes[entry.user_id] += entry.score_change
+    changes = {user_id: change for user_id, change in changes.items() if change}
+    if not entries:
+        return {}
+
+    with transaction.atomic():
+        profiles = _increment_scores(changes) if changes else {}
+        ReputationLog.objects.bulk_create(entries)
+        leaderboards.record(entries)
+
+        promotions = [
+            (user_id, profile_id, score) for user_id, (profile_id, score) in profiles.items()
+            # Only notify on promotion (score went up), not demotion
+            if rank_index(score) > rank_index(score - changes[user_id])
+        ]
+        if promotions:
+            _notify_rank_up(promotions)
+    return {user_id: score for user_id, (_, score) in profiles.items()}
+
+
+def _notify_rank_up(promotions):
+    profile_type = ContentType.objects.get_for_model(Profile)
+    enqueue_notifications([
+        NotificationIntent(
+            recipient_id=user_id,
+            type=NotificationType.RANK_UP,
+            title="Rank Up!",
+            message=f"Congratulations! You have reached the rank of {rank_title(score)}.",
+            content_type=profile_type,
+            object_id=profile_id,  # Links to their own profile
+        )
+        for user_id, profile_id, score in promotions
+    ])
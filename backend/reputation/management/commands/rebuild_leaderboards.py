@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from reputation.leaderboards import rebuild
+
+
+class Command(BaseCommand):
+    """
+    Recomputes every leaderboard (global and per category, all periods) from ReputationLog.
+    Needed after bulk loads that insert ReputationLog rows directly (e.g. fake data);
+    votes keep the boards up to date incrementally.
+    """
+    help = 'Rebuild the precomputed leaderboards from the reputation log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        written = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Leaderboards rebuilt: {written} entries."))
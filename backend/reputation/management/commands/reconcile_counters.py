@@ -0,0 +1,198 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, Min, Q, Sum
+from accounts.models import Profile
+from facts.choices import FactStatus
+from facts.models import Fact, Comment
+from facts.ranking import RANKING_FIELDS, apply_scores
+from reputation.models import Vote, ReputationLog
+from reputation.choices import VoteType
+from FactNode.db import write_transaction
+from FactNode.processes import process_pool
+
+
+# --- Chunk workers (module level so a process pool can pickle them) ---
+
+def reconcile_fact_chunk(low, high, dry_run):
+    """
+    Recounts Fact.upvotes_count / downvotes_count / comments_count for ids in (low, high].
+    Returns a list of (kind, id, field, stored, actual) diffs.
+    """
+    diffs = []
+    with write_transaction():
+        # Row locks keep the chunk consistent while concurrent votes wait a few milliseconds
+        facts = list(
+            Fact.objects.filter(pk__gt=low, pk__lte=high)
+            .select_for_update()
+            .order_by('pk')
+            .only('id', 'created_at', 'upvotes_count', 'downvotes_count', 'comments_count', *RANKING_FIELDS)
+        )
+        if not facts:
+            return diffs
+
+        counts = {
+            row['fact_id']: row
+            for row in Vote.objects.filter(fact_id__gt=low, fact_id__lte=high)
+            .values('fact_id')
+            .annotate(
+                up=Count('id', filter=Q(vote_type=VoteType.UPVOTE)),
+                down=Count('id', filter=Q(vote_type=VoteType.DOWNVOTE)),
+            )
+            .order_by()
+        }
+        comments = dict(
+            Comment.objects.filter(fact_id__gt=low, fact_id__lte=high)
+            .values('fact_id')
+            .annotate(total=Count('id'))
+            .order_by()
+            .values_list('fact_id', 'total')
+        )
+
+        changed = []
+        for fact in facts:
+            row = counts.get(fact.pk, {'up': 0, 'down': 0})
+            actual = {
+                'upvotes_count': row['up'],
+                'downvotes_count': row['down'],
+                'comments_count': comments.get(fact.pk, 0),
+            }
+            fact_diffs = [
+                ('fact', fact.pk, field, getattr(fact, field), value)
+                for field, value in actual.items() if getattr(fact, field) != value
+            ]
+            if fact_diffs:
+                diffs.extend(fact_diffs)
+                for field, value in actual.items():
+                    setattr(fact, field, value)
+                apply_scores(fact)
+                changed.append(fact)
+
+        if changed and not dry_run:
+            Fact.objects.bulk_update(changed, ['upvotes_count', 'downvotes_count', 'comments_count', *RANKING_FIELDS])
+    return diffs
+
+
+def reconcile_profile_chunk(low, high, dry_run):
+    """
+    Recomputes facts_posted_count, facts_approved_count and reputation_score
+    for profiles with ids in (low, high].
+    """
+    diffs = []
+    with write_transaction():
+        profiles = list(
+            Profile.objects.filter(pk__gt=low, pk__lte=high)
+            .select_for_update()
+            .order_by('pk')
+            .only('id', 'user_id', 'facts_posted_count', 'facts_approved_count', 'reputation_score')
+        )
+        if not profiles:
+            return diffs
+        user_ids = [profile.user_id for profile in profiles]
+
+        fact_counts = {
+            row['author_id']: row
+            for row in Fact.objects.filter(author_id__in=user_ids)
+            .values('author_id')
+            .annotate(posted=Count('id'), approved=Count('id', filter=Q(status=FactStatus.APPROVED)))
+            .order_by()
+        }
+        reputation = dict(
+            ReputationLog.objects.filter(user_id__in=user_ids)
+            .values('user_id')
+            .annotate(total=Sum('score_change'))
+            .order_by()
+            .values_list('user_id', 'total')
+        )
+
+        changed = []
+        for profile in profiles:
+            row = fact_counts.get(profile.user_id, {'posted': 0, 'approved': 0})
+            actual = {
+                'facts_posted_count': row['posted'],
+                'facts_approved_count': row['approved'],
+                'reputation_score': reputation.get(profile.user_id) or 0,
+            }
+            profile_diffs = [
+                ('profile', profile.user_id, field, getattr(profile, field), value)
+                for field, value in actual.items() if getattr(profile, field) != value
+            ]
+            if profile_diffs:
+                diffs.extend(profile_diffs)
+                for field, value in actual.items():
+                    setattr(profile, field, value)
+                changed.append(profile)
+
+        if changed and not dry_run:
+            # bulk_update skips auto_now, so updated_at keeps meaning "edited by the user"
+            Profile.objects.bulk_update(changed, ['facts_posted_count', 'facts_approved_count', 'reputation_score'])
+    return diffs
+
+
+def _id_ranges(model, chunk_size):
+    """Splits the primary key space into (low, high] ranges: index range scans, no OFFSET."""
+    bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    return [
+        (start, start + chunk_size)
+        for start in range(bounds['low'] - 1, bounds['high'], chunk_size)
+    ]
+
+
+def _run_chunk(job):
+    worker, low, high, dry_run = job
+    return worker(low, high, dry_run)
+
+
+class Command(BaseCommand):
+    """
+    Recomputes denormalized counters from their source tables:
+
+    - Fact.upvotes_count / downvotes_count (and the ranking scores) from Vote
+    - Fact.comments_count from Comment
+    - Profile.facts_posted_count / facts_approved_count from Fact
+    - Profile.reputation_score from ReputationLog
+
+    Rows are processed in primary-key ranges with one grouped aggregate per chunk,
+    and only rows that differ are written (bulk_update). Each chunk is its own short
+    transaction with row locks, so it can run against a live database and can be
+    re-run at any time. Use --workers to spread chunks over a process pool and
+    --dry-run to only print the differences.
+    """
+    help = 'Recount denormalized fact and profile counters from their source tables.'
+
+    targets = {
+        'facts': (Fact, reconcile_fact_chunk),
+        'profiles': (Profile, reconcile_profile_chunk),
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes to spread chunks over.')
+        parser.add_argument('--dry-run', action='store_true', help='Report differences without writing.')
+        parser.add_argument('--only', choices=sorted(self.targets), help='Reconcile a single target.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        names = [options['only']] if options['only'] else list(self.targets)
+
+        for name in names:
+            model, worker = self.targets[name]
+            jobs = [(worker, low, high, dry_run) for low, high in _id_ranges(model, options['chunk_size'])]
+            diffs = self.run_jobs(jobs, options['workers'])
+
+            if dry_run or options['verbosity'] > 1:
+                for kind, pk, field, stored, actual in diffs:
+                    self.stdout.write(f"{kind} {pk} {field}: {stored} -> {actual}")
+
+            rows = len({(kind, pk) for kind, pk, *_ in diffs})
+            verb = 'would be corrected' if dry_run else 'corrected'
+            self.stdout.write(self.style.SUCCESS(
+                f"Reconciled {name}: {rows} rows {verb} ({len(diffs)} fields) across {len(jobs)} chunks."
+            ))
+
+    def run_jobs(self, jobs, workers):
+        if workers <= 1 or len(jobs) <= 1:
+            return [diff for job in jobs for diff in _run_chunk(job)]
+
+        with process_pool(workers) as pool:
+            return [diff for chunk_diffs in pool.map(_run_chunk, jobs) for diff in chunk_diffs]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 12:31
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reputation', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vote',
+            name='reputation__user_id_2f3b9e_idx',
+        ),
+    ]
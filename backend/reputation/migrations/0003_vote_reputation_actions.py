@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reputation', '0002_remove_vote_user_fact_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reputationlog',
+            name='action',
+            field=models.CharField(choices=[('FACT_APPROVED', 'Fact Approved'), ('FACT_REJECTED', 'Fact Rejected'), ('VOTE_RECEIVED', 'Received Vote on Fact'), ('VOTE_CHANGED', 'Vote on Fact Changed'), ('VOTE_REMOVED', 'Vote on Fact Removed'), ('VOTE_GIVEN', 'Voted on Fact'), ('BONUS', 'Admin Bonus')], max_length=50),
+        ),
+    ]
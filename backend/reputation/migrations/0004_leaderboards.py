@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 13:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reputation', '0003_vote_reputation_actions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=32)),
+                ('period', models.CharField(choices=[('ALL', 'All Time'), ('WEEK', 'This Week'), ('MONTH', 'This Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('score', models.IntegerField()),
+                ('users_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('board', 'period', 'period_start', 'score'), name='leaderboard_score_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=32)),
+                ('period', models.CharField(choices=[('ALL', 'All Time'), ('WEEK', 'This Week'), ('MONTH', 'This Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('score', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'leaderboard entries',
+                'indexes': [models.Index(fields=['board', 'period', 'period_start', '-score', 'user'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('board', 'period', 'period_start', 'user'), name='leaderboard_entry_unique')],
+            },
+        ),
+    ]
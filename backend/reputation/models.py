@@ -1,13 +1,17 @@
 from django.db import models
 from django.conf import settings
 from facts.models import Fact
-from .choices import VoteType, ReputationAction
+from FactNode.tracking import TrackedFieldsMixin
+from .choices import VoteType, ReputationAction, LeaderboardPeriod
 
 
-class Vote(models.Model):
+class Vote(TrackedFieldsMixin, models.Model):
     """
     Represents a user's vote on a specific fact.
     """
+    # The stored direction lets signals apply counter deltas (UP -> DOWN flips)
+    tracked_fields = ('vote_type',)
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -27,14 +31,17 @@ class Vote(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        # Ensures a user can only have ONE vote per fact
+        # Ensures a user can only have ONE vote per fact.
+        # Its index also serves every (user, fact) lookup, so no separate index is needed.
         unique_together = ('user', 'fact')
-        indexes = [
-            models.Index(fields=['user', 'fact']),
-        ]
+
+    @property
+    def previous_vote_type(self):
+        """The vote type currently stored in the database (None for a new vote)."""
+        return self.previous('vote_type')
 
     def __str__(self):
-        return f"{self.user} voted {self.vote_type} on {self.fact.id}"
+        return f"{self.user} voted {self.vote_type} on {self.fact_id}"
 
 
 class ReputationLog(models.Model):
@@ -71,4 +78,66 @@ class ReputationLog(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f"{self.user}: {self.score_change} ({self.action})"
\ No newline at end of file
+        return f"{self.user}: {self.score_change} ({self.action})"
+
+
+class LeaderboardEntry(models.Model):
+    """
+    One user's score on one leaderboard (see reputation/leaderboards.py).
+    Precomputed from ReputationLog and kept up to date incrementally, so a top-N page is
+    a range scan of leaderboard_rank_idx instead of a sort over every profile.
+    """
+    # 'global', or 'category:<id>' for reputation earned with the facts of one category
+    board = models.CharField(max_length=32)
+    period = models.CharField(max_length=10, choices=LeaderboardPeriod.choices)
+    # First day of the week/month; a fixed date for ALL_TIME
+    period_start = models.DateField()
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries'
+    )
+    score = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'period', 'period_start', 'user'],
+                name='leaderboard_entry_unique',
+            ),
+        ]
+        indexes = [
+            # Top-N in rank order; the user id breaks ties deterministically
+            models.Index(
+                fields=['board', 'period', 'period_start', '-score', 'user'],
+                name='leaderboard_rank_idx',
+            ),
+        ]
+        verbose_name_plural = 'leaderboard entries'
+
+    def __str__(self):
+        return f"{self.board} {self.period} {self.period_start}: {self.user_id} = {self.score}"
+
+
+class LeaderboardScore(models.Model):
+    """
+    How many users of a leaderboard hold each score.
+    A user's rank is 1 + the users with a higher score, summed from these rows: one index
+    seek plus a range over the distinct scores above, never over the users themselves.
+    """
+    board = models.CharField(max_length=32)
+    period = models.CharField(max_length=10, choices=LeaderboardPeriod.choices)
+    period_start = models.DateField()
+    score = models.IntegerField()
+    users_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'period', 'period_start', 'score'],
+                name='leaderboard_score_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.board} {self.period} {self.period_start}: {self.users_count} at {self.score}"
@@ -1,8 +1,33 @@
 from rest_framework import serializers
+from .choices import VoteType, LeaderboardPeriod
 from .models import Vote
 
 class VoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Vote
         fields = ['id', 'vote_type', 'fact', 'created_at']
-        read_only_fields = ['user', 'fact']
\ No newline at end of file
+        read_only_fields = ['user', 'fact']
+
+
+class CastVoteSerializer(serializers.Serializer):
+    """Body of cast_vote: {"vote_type": "UP" | "DOWN"}."""
+    vote_type = serializers.ChoiceField(choices=VoteType.choices)
+
+
+class BatchVoteItemSerializer(CastVoteSerializer):
+    fact_id = serializers.IntegerField(min_value=1)
+
+
+class BatchVoteSerializer(serializers.Serializer):
+    """
+    Body of the batch endpoint, for clients that queue votes offline:
+    {"votes": [{"fact_id": 1, "vote_type": "UP"}, ...]}
+    """
+    votes = BatchVoteItemSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    """Query parameters of the leaderboard endpoint."""
+    period = serializers.ChoiceField(choices=LeaderboardPeriod.choices, default=LeaderboardPeriod.ALL_TIME)
+    category = serializers.IntegerField(min_value=1, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
@@ -0,0 +1,135 @@
+"""
+Vote service used by the voting API (single and batch votes).
+
+A batch of votes is applied in one transaction with a fixed number of statements,
+however many votes it contains:
+1. one SELECT for the facts (and their authors); only approved facts can be voted on,
+2. one SELECT ... FOR UPDATE for the user's existing votes on them,
+3. one bulk INSERT for new votes and at most two UPDATEs for flipped ones,
+4. at most four counter UPDATEs on Fact (one per kind of delta: new up, new down, flips),
+5. for reputation: one UPDATE ... RETURNING (CASE per author), one bulk INSERT into
+   ReputationLog and, on a rank-up, one into the notification outbox (reputation/ledger.py).
+
+Votes are written with bulk operations, so the Vote post_save/post_delete receivers in
+reputation/signals.py do not fire; their effects are applied here in aggregate instead.
+The receivers still cover votes created through the ORM or the admin.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from facts.cache import bump_generation, FEED_SCOPE
+from facts.choices import FactStatus
+from facts.models import Fact
+from facts.ranking import ranking_updates
+from .ledger import change_reputation, vote_entry
+from .models import Vote
+from .signals import COUNTER_FIELDS
+from FactNode.db import write_transaction
+
+# Outcome of each vote in a batch
+CREATED = 'created'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+
+
+def cast_vote(user, fact_id, vote_type):
+    """
+    Casts (or changes) one vote. Returns CREATED, UPDATED, UNCHANGED or NOT_FOUND.
+    """
+    return cast_votes(user, [(fact_id, vote_type)])[0]['status']
+
+
+def retract_vote(user, fact_id):
+    """
+    Removes the user's vote on a fact. Returns False if there was none.
+    The row is deleted through the ORM, so the Vote post_delete receivers take it back out
+    of the Fact counters and the author's reputation (a compensating VOTE_REMOVED entry).
+    """
+    with transaction.atomic():
+        deleted, _ = Vote.objects.filter(user=user, fact_id=fact_id).delete()
+    return bool(deleted)
+
+
+def cast_votes(user, votes):
+    """
+    Applies [(fact_id, vote_type), ...] for one user. If a fact appears more than once,
+    the last vote wins (clients replaying an offline queue send them in order).
+    Returns one {'fact_id', 'vote_type', 'status'} dict per distinct fact, in input order.
+    """
+    wanted = {}
+    for fact_id, vote_type in votes:
+        wanted.pop(fact_id, None)
+        wanted[fact_id] = vote_type
+    if not wanted:
+        return []
+
+    try:
+        statuses = _apply_votes(user, wanted)
+    except IntegrityError:
+        # A concurrent request inserted one of these votes first; retry, now as an update
+        statuses = _apply_votes(user, wanted)
+
+    return [
+        {'fact_id': fact_id, 'vote_type': vote_type, 'status': statuses[fact_id]}
+        for fact_id, vote_type in wanted.items()
+    ]
+
+
+def _apply_votes(user, wanted):
+    with write_transaction():
+        # Pending and rejected facts are NOT_FOUND, as they are for everyone but their author
+        authors = dict(
+            Fact.objects.filter(pk__in=wanted, status=FactStatus.APPROVED).values_list('id', 'author_id')
+        )
+        existing = dict(
+            Vote.objects.select_for_update()
+            .filter(user=user, fact_id__in=authors)
+            .values_list('fact_id', 'vote_type')
+        )
+
+        statuses = {fact_id: NOT_FOUND for fact_id in wanted if fact_id not in authors}
+        new_votes = []
+        flips = defaultdict(list)           # new vote_type -> [fact_id]
+        deltas = defaultdict(list)          # (up_delta, down_delta) -> [fact_id]
+        reputation = []
+
+        for fact_id in sorted(authors):
+            vote_type = wanted[fact_id]
+            old_type = existing.get(fact_id)
+            if old_type == vote_type:
+                statuses[fact_id] = UNCHANGED
+                continue
+
+            delta = Counter({COUNTER_FIELDS[vote_type]: 1})
+            if old_type is None:
+                statuses[fact_id] = CREATED
+                new_votes.append(Vote(user=user, fact_id=fact_id, vote_type=vote_type))
+            else:
+                statuses[fact_id] = UPDATED
+                flips[vote_type].append(fact_id)
+                delta[COUNTER_FIELDS[old_type]] -= 1
+            deltas[(delta['upvotes_count'], delta['downvotes_count'])].append(fact_id)
+            # Never for voting on your own fact; a flip compensates the earlier vote
+            if authors[fact_id] != user.pk:
+                reputation.append(vote_entry(authors[fact_id], fact_id, old_type, vote_type))
+
+        if not new_votes and not flips:
+            return statuses
+
+        # --- 1. Votes ---
+        Vote.objects.bulk_create(new_votes)
+        now = timezone.now()
+        for vote_type, fact_ids in flips.items():
+            Vote.objects.filter(user=user, fact_id__in=fact_ids).update(vote_type=vote_type, updated_at=now)
+
+        # --- 2. Fact counters and ranking scores ---
+        for (up_delta, down_delta), fact_ids in deltas.items():
+            Fact.objects.filter(pk__in=fact_ids).update(**ranking_updates(up_delta, down_delta))
+
+        # --- 3. Author reputation ---
+        change_reputation(reputation)
+
+        bump_generation(FEED_SCOPE)
+    return statuses
@@ -1,86 +1,109 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import F
-from .models import Vote, ReputationLog
-from .choices import VoteType, ReputationAction
-from notifications.models import Notification
-from notifications.choices import NotificationType
+from django.db.models import QuerySet
+from facts.models import Fact
+from facts.ranking import ranking_updates
+from .ledger import change_reputation, vote_entry
+from .models import Vote
+from .choices import VoteType
+from facts.cache import bump_generation, FEED_SCOPE
 
 # --- SIGNAL 1: Update Fact Counts ---
+
+COUNTER_FIELDS = {
+    VoteType.UPVOTE: 'upvotes_count',
+    VoteType.DOWNVOTE: 'downvotes_count',
+}
+
+
+def apply_vote_deltas(fact_id, deltas):
+    """
+    Applies {'upvotes_count': +1, 'downvotes_count': -1} style deltas in one atomic UPDATE,
+    together with the ranking columns derived from them (see facts/ranking.py).
+    Decrements never go below zero, even if the counters have drifted.
+    """
+    if any(deltas.values()):
+        Fact.objects.filter(pk=fact_id).update(**ranking_updates(
+            deltas.get('upvotes_count', 0),
+            deltas.get('downvotes_count', 0),
+        ))
+
+
 @receiver(post_save, sender=Vote)
-@receiver(post_delete, sender=Vote)
-def update_fact_score(sender, instance, **kwargs):
+def update_fact_score(sender, instance, created, **kwargs):
     """
-    Triggers whenever a Vote is Saved or Deleted.
-    It forces the Fact to recount its total upvotes and downvotes.
+    Triggers whenever a Vote is Saved.
+    Applies only the difference (new vote, or a flip UP <-> DOWN) to the Fact counters,
+    so the cost does not depend on how many votes the fact already has.
+    Use `manage.py reconcile_counters` to recount if drift is suspected.
     """
-    fact = instance.fact
+    old_type = None if created else instance.previous_vote_type
+    new_type = instance.vote_type
+
+    if old_type == new_type:
+        return
 
-    # Recalculate counts directly from the database to ensure accuracy
-    fact.upvotes_count = fact.votes.filter(vote_type=VoteType.UPVOTE).count()
-    fact.downvotes_count = fact.votes.filter(vote_type=VoteType.DOWNVOTE).count()
+    deltas = {}
+    if old_type in COUNTER_FIELDS:
+        deltas[COUNTER_FIELDS[old_type]] = -1
+    if new_type in COUNTER_FIELDS:
+        deltas[COUNTER_FIELDS[new_type]] = deltas.get(COUNTER_FIELDS[new_type], 0) + 1
+    apply_vote_deltas(instance.fact_id, deltas)
 
-    # Save only these specific fields to optimize performance
-    fact.save(update_fields=['upvotes_count', 'downvotes_count'])
+    # Scores are part of the public feed (and its Hot / Top / Controversial orderings)
+    bump_generation(FEED_SCOPE)
+
+
+@receiver(post_delete, sender=Vote)
+def remove_fact_score(sender, instance, **kwargs):
+    """
+    Triggers whenever a Vote is Deleted: takes the vote back out of the Fact counters.
+    """
+    vote_type = instance.previous_vote_type or instance.vote_type
+    if vote_type in COUNTER_FIELDS:
+        apply_vote_deltas(instance.fact_id, {COUNTER_FIELDS[vote_type]: -1})
+        bump_generation(FEED_SCOPE)
 
 # --- SIGNAL 2: Update Author Reputation ---
 @receiver(post_save, sender=Vote)
 def update_author_reputation(sender, instance, created, **kwargs):
     """
-    Triggers when a NEW vote is cast.
-    It adds or removes points from the author of the Fact.
+    Triggers when a vote is cast or flipped (UP <-> DOWN).
+    Adds the difference to the reputation of the Fact's author in one atomic UPDATE,
+    which also returns the new score (see reputation/ledger.py).
     """
-    # We only want to give reputation for NEW votes (created=True).
-    # (Handling changed votes, like Up->Down, is more complex and we'll skip it for now)
-    if not created:
+    if not created and 'vote_type' not in instance.changed_fields:
         return
-
     fact = instance.fact
-    author = fact.author
-    profile = author.profile  # This fetches the current profile from DB
-
-    if instance.user == author:
+    if instance.user_id == fact.author_id:
         return
 
-    # 1. Calculate Score Change
-    score_change = 0
-    if instance.vote_type == VoteType.UPVOTE:
-        score_change = 10
-    elif instance.vote_type == VoteType.DOWNVOTE:
-        score_change = -2
+    old_type = None if created else instance.previous_vote_type
+    scores = change_reputation([vote_entry(fact.author_id, fact.pk, old_type, instance.vote_type)])
+    _sync_cached_score(fact, scores)
+
 
-    if score_change == 0:
+@receiver(post_delete, sender=Vote)
+def retract_author_reputation(sender, instance, origin=None, **kwargs):
+    """
+    Triggers whenever a Vote is Deleted: takes back the reputation it gave the author.
+    Not when the vote goes because its Fact or its voter is deleted (origin): the
+    author then keeps the reputation earned so far.
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is not Vote:
+        return
+    author_id = Fact.objects.filter(pk=instance.fact_id).values_list('author_id', flat=True).first()
+    if author_id is None or author_id == instance.user_id:
         return
+    vote_type = instance.previous_vote_type or instance.vote_type
+    change_reputation([vote_entry(author_id, instance.fact_id, vote_type, None)])
 
-    # 2. Capture OLD Rank
-    # We use the property 'rank_title' which calculates based on 'reputation_score'
-    old_rank = profile.rank_title
-
-    # 3. Apply Update
-    # We cannot use F() expressions here easily if we want to compare ranks immediately in Python.
-    # We will update manually to check the new rank.
-    profile.reputation_score += score_change
-    profile.save()
-
-    # 4. Check NEW Rank
-    profile.refresh_from_db() # Reload to be safe
-    new_rank = profile.rank_title
-
-    # 5. Trigger Notification if Rank Changed
-    if old_rank != new_rank and score_change > 0:
-        # Only notify on promotion (score went up), not demotion
-        Notification.objects.create(
-            recipient=author,
-            type=NotificationType.RANK_UP,
-            title="Rank Up!",
-            message=f"Congratulations! You have reached the rank of {new_rank}.",
-            target=profile # Links to their own profile
-        )
-
-    # 6. Log the change
-    ReputationLog.objects.create(
-        user=author,
-        action=ReputationAction.VOTE_RECEIVED,
-        score_change=score_change,
-        related_fact=fact
-    )
\ No newline at end of file
+
+def _sync_cached_score(fact, scores):
+    # Keep an author profile already loaded in this request in step, without a query
+    if fact.author_id not in scores or not Fact.author.is_cached(fact):
+        return
+    author = fact.author
+    if type(author).profile.is_cached(author):
+        author.profile.sync_field('reputation_score', scores[fact.author_id])
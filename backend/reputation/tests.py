@@ -1,9 +1,20 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
-from facts.models import Fact, Category
-from reputation.models import Vote
-from reputation.choices import VoteType
+from accounts.models import Profile
+from facts.models import Fact, Category, Comment
+from reputation.models import Vote, ReputationLog, LeaderboardEntry, LeaderboardScore
+from reputation.choices import VoteType, LeaderboardPeriod
+from reputation import leaderboards
 from notifications.models import Notification
+from notifications.outbox import drain_outbox
+from FactNode.db import write_transaction
 
 User = get_user_model()
 
@@ -66,10 +77,418 @@ class ReputationSystemTest(TestCase):
             vote_type=VoteType.UPVOTE
         )
 
-        # Check: Did they get the Notification?
+        # Check: Did they get the Notification? (delivered through the outbox)
+        drain_outbox()
         notifications = Notification.objects.filter(recipient=self.author, type='RANK_UP')
         self.assertTrue(notifications.exists())
         self.assertEqual(notifications.first().title, "Rank Up!")
 
         # Check: Is their rank title updated?
-        self.assertEqual(self.author.profile.rank_title, "Curious Mind")
\ No newline at end of file
+        self.assertEqual(self.author.profile.rank_title, "Curious Mind")
+
+
+class VoteCounterDeltaTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@test.com', password='password')
+        self.voter = User.objects.create_user(username='voter', email='voter@test.com', password='password')
+        self.category = Category.objects.create(name="Science")
+        self.fact = Fact.objects.create(
+            title="Delta Fact", content="Content", author=self.author,
+            category=self.category, status='APPROVED'
+        )
+
+    def assertCounts(self, up, down):
+        self.fact.refresh_from_db()
+        self.assertEqual((self.fact.upvotes_count, self.fact.downvotes_count), (up, down))
+
+    def test_create_flip_and_delete(self):
+        Vote.objects.create(user=self.voter, fact=self.fact, vote_type=VoteType.UPVOTE)
+        self.assertCounts(1, 0)
+
+        # Flip through update_or_create (the path used by cast_vote)
+        vote, _ = Vote.objects.update_or_create(
+            user=self.voter, fact=self.fact, defaults={'vote_type': VoteType.DOWNVOTE}
+        )
+        self.assertCounts(0, 1)
+
+        # Re-saving the same direction is a no-op
+        vote.save()
+        self.assertCounts(0, 1)
+
+        vote.delete()
+        self.assertCounts(0, 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        Vote.objects.create(user=self.voter, fact=self.fact, vote_type=VoteType.UPVOTE)
+        Fact.objects.filter(pk=self.fact.pk).update(upvotes_count=7, downvotes_count=3)
+
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertCounts(1, 0)
+
+    def test_orm_flip_and_delete_compensate_reputation(self):
+        vote = Vote.objects.create(user=self.voter, fact=self.fact, vote_type=VoteType.UPVOTE)
+        vote.vote_type = VoteType.DOWNVOTE
+        vote.save()
+        # The author's cached profile follows the returned score, no refresh needed
+        self.assertEqual(self.author.profile.reputation_score, -2)
+        self.assertEqual(self.author.profile.changed_fields, set())
+
+        vote.delete()
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, 0)
+        self.assertEqual(
+            list(ReputationLog.objects.order_by('pk').values_list('action', flat=True)),
+            ['VOTE_RECEIVED', 'VOTE_CHANGED', 'VOTE_REMOVED']
+        )
+
+    def test_rank_titles_come_from_the_shared_table(self):
+        profile = self.author.profile
+        for score, title in [(-5, 'Novice'), (9, 'Novice'), (10, 'Curious Mind'), (199, 'Researcher'), (1000, 'Professor')]:
+            profile.reputation_score = score
+            self.assertEqual(profile.rank_title, title)
+
+
+class ReconcileCountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@test.com', password='password')
+        self.voter = User.objects.create_user(username='voter', email='voter@test.com', password='password')
+        self.category = Category.objects.create(name="Science")
+        self.fact = Fact.objects.create(
+            title="Counted Fact", content="Content", author=self.author,
+            category=self.category, status='APPROVED'
+        )
+        Vote.objects.create(user=self.voter, fact=self.fact, vote_type=VoteType.UPVOTE)
+
+        # Simulate drift from writes that bypassed the signals
+        Profile.objects.filter(user=self.author).update(
+            facts_posted_count=5, facts_approved_count=0, reputation_score=999
+        )
+
+    def test_dry_run_reports_without_writing(self):
+        out = StringIO()
+        call_command('reconcile_counters', '--dry-run', '--only', 'profiles', stdout=out)
+
+        self.assertIn(f"profile {self.author.pk} reputation_score: 999 -> 10", out.getvalue())
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, 999)
+
+    def test_profiles_are_recomputed_from_source_tables(self):
+        call_command('reconcile_counters', '--chunk-size', '1', stdout=StringIO())
+
+        profile = Profile.objects.get(user=self.author)
+        self.assertEqual(
+            (profile.facts_posted_count, profile.facts_approved_count, profile.reputation_score),
+            (1, 1, 10)
+        )
+
+    def test_fact_comment_counts_are_recomputed(self):
+        Comment.objects.create(fact=self.fact, author=self.voter, content="Nice")
+        Fact.objects.filter(pk=self.fact.pk).update(comments_count=42)
+
+        call_command('reconcile_counters', '--only', 'facts', stdout=StringIO())
+        self.fact.refresh_from_db()
+        self.assertEqual(self.fact.comments_count, 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'BEGIN IMMEDIATE is SQLite-only')
+class WriteTransactionTest(TransactionTestCase):
+    def begins(self, block):
+        with CaptureQueriesContext(connection) as ctx:
+            with block():
+                User.objects.count()
+        return [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('BEGIN')]
+
+    def test_only_write_transactions_take_the_lock_up_front(self):
+        self.assertEqual(self.begins(transaction.atomic), ['BEGIN'])
+        self.assertEqual(self.begins(write_transaction), ['BEGIN IMMEDIATE'])
+        # The connection's mode is restored for the next plain atomic()
+        self.assertEqual(self.begins(transaction.atomic), ['BEGIN'])
+
+
+class VoteServiceTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', email='author@test.com', password='password')
+        self.voter = User.objects.create_user(username='voter', email='voter@test.com', password='password')
+        self.category = Category.objects.create(name="Science")
+        self.facts = [
+            Fact.objects.create(
+                title=f"Fact {i}", content="Content", author=self.author,
+                category=self.category, status='APPROVED'
+            )
+            for i in range(6)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.voter)
+
+    def cast(self, fact_id, vote_type):
+        return self.client.post(f'/api/reputation/votes/{fact_id}/cast_vote/', {'vote_type': vote_type})
+
+    def test_cast_vote_updates_counters_and_reputation(self):
+        fact = self.facts[0]
+        self.assertEqual(self.cast(fact.pk, VoteType.UPVOTE).status_code, 200)
+
+        fact.refresh_from_db()
+        self.assertEqual((fact.upvotes_count, fact.downvotes_count, fact.net_score), (1, 0, 1))
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, 10)
+        self.assertEqual(ReputationLog.objects.filter(user=self.author, related_fact=fact).count(), 1)
+
+        drain_outbox()
+        self.assertTrue(Notification.objects.filter(recipient=self.author, type='RANK_UP').exists())
+
+    def test_flip_moves_the_counter_and_compensates_reputation(self):
+        fact = self.facts[0]
+        self.cast(fact.pk, VoteType.UPVOTE)
+        self.cast(fact.pk, VoteType.DOWNVOTE)
+
+        fact.refresh_from_db()
+        self.assertEqual((fact.upvotes_count, fact.downvotes_count), (0, 1))
+        self.assertEqual(Vote.objects.get(user=self.voter, fact=fact).vote_type, VoteType.DOWNVOTE)
+        # +10 for the upvote, then -12 so the author holds exactly what a downvote gives
+        self.assertEqual(
+            list(ReputationLog.objects.order_by('pk').values_list('action', 'score_change')),
+            [('VOTE_RECEIVED', 10), ('VOTE_CHANGED', -12)]
+        )
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, -2)
+
+    def test_retracting_a_vote_takes_its_reputation_back(self):
+        fact = self.facts[0]
+        self.cast(fact.pk, VoteType.UPVOTE)
+        response = self.client.delete(f'/api/reputation/votes/{fact.pk}/cast_vote/')
+        self.assertEqual(response.status_code, 204)
+
+        fact.refresh_from_db()
+        self.assertEqual((fact.upvotes_count, fact.net_score), (0, 0))
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, 0)
+        self.assertEqual(ReputationLog.objects.filter(action='VOTE_REMOVED').get().score_change, -10)
+        # Nothing left to retract
+        self.assertEqual(self.client.delete(f'/api/reputation/votes/{fact.pk}/cast_vote/').status_code, 404)
+
+    def test_deleting_the_fact_keeps_the_reputation_earned(self):
+        self.cast(self.facts[0].pk, VoteType.UPVOTE)
+        self.facts[0].delete()
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, 10)
+        self.assertFalse(ReputationLog.objects.filter(action='VOTE_REMOVED').exists())
+
+    def test_reputation_is_one_update_returning_the_new_score(self):
+        # The score is incremented in the database and read back by the same statement
+        with CaptureQueriesContext(connection) as ctx:
+            self.cast(self.facts[0].pk, VoteType.UPVOTE)
+        profile_queries = [q['sql'] for q in ctx.captured_queries if 'accounts_profile' in q['sql']]
+        self.assertEqual(len(profile_queries), 1)
+        self.assertIn('RETURNING', profile_queries[0])
+
+        # Rank-up is detected from the returned score: crossing 50 (Researcher) notifies again
+        Profile.objects.filter(user=self.author).update(reputation_score=45)
+        self.cast(self.facts[1].pk, VoteType.UPVOTE)
+        drain_outbox()
+        self.assertEqual(
+            sorted(Notification.objects.filter(recipient=self.author, type='RANK_UP').values_list('message', flat=True)),
+            ['Congratulations! You have reached the rank of Curious Mind.',
+             'Congratulations! You have reached the rank of Researcher.']
+        )
+
+    def test_invalid_vote_type_and_unknown_fact(self):
+        self.assertEqual(self.cast(self.facts[0].pk, 'SIDEWAYS').status_code, 400)
+        self.assertEqual(self.cast(999999, VoteType.UPVOTE).status_code, 404)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_only_approved_facts_can_be_voted_on(self):
+        pending, rejected = self.facts[:2]
+        Fact.objects.filter(pk=pending.pk).update(status='PENDING')
+        Fact.objects.filter(pk=rejected.pk).update(status='REJECTED')
+        self.assertEqual(self.cast(pending.pk, VoteType.UPVOTE).status_code, 404)
+        response = self.client.post('/api/reputation/votes/batch/', {'votes': [
+            {'fact_id': rejected.pk, 'vote_type': VoteType.UPVOTE},
+            {'fact_id': self.facts[2].pk, 'vote_type': VoteType.UPVOTE},
+        ]}, format='json')
+        self.assertEqual([result['status'] for result in response.data['results']], ['not_found', 'created'])
+
+        self.assertEqual(list(Vote.objects.values_list('fact_id', flat=True)), [self.facts[2].pk])
+        # Neither the author's reputation nor the category boards saw the refused votes
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, 10)
+        self.assertEqual(
+            set(LeaderboardEntry.objects.filter(user=self.author).values_list('board', 'score')),
+            {(leaderboards.GLOBAL_BOARD, 10), (leaderboards.category_board(self.category.pk), 10)},
+        )
+
+    def test_batch_statement_count_does_not_grow_with_batch_size(self):
+        def batch(facts):
+            votes = [{'fact_id': fact.pk, 'vote_type': VoteType.UPVOTE} for fact in facts]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post('/api/reputation/votes/batch/', {'votes': votes}, format='json')
+            self.assertEqual(response.status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(batch(self.facts[:1]), batch(self.facts[1:]))
+        self.assertEqual(
+            list(Fact.objects.order_by('pk').values_list('upvotes_count', flat=True)),
+            [1] * len(self.facts)
+        )
+        self.assertEqual(Profile.objects.get(user=self.author).reputation_score, 10 * len(self.facts))
+
+    def test_batch_reports_each_vote(self):
+        self.cast(self.facts[0].pk, VoteType.UPVOTE)
+        votes = [
+            {'fact_id': self.facts[0].pk, 'vote_type': VoteType.UPVOTE},
+            {'fact_id': self.facts[1].pk, 'vote_type': VoteType.UPVOTE},
+            # Last vote for a fact wins
+            {'fact_id': self.facts[1].pk, 'vote_type': VoteType.DOWNVOTE},
+            {'fact_id': 999999, 'vote_type': VoteType.UPVOTE},
+        ]
+        response = self.client.post('/api/reputation/votes/batch/', {'votes': votes}, format='json')
+
+        self.assertEqual(
+            [(row['fact_id'], row['status']) for row in response.data['results']],
+            [(self.facts[0].pk, 'unchanged'), (self.facts[1].pk, 'created'), (999999, 'not_found')]
+        )
+        self.facts[1].refresh_from_db()
+        self.assertEqual((self.facts[1].upvotes_count, self.facts[1].downvotes_count), (0, 1))
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        self.science = Category.objects.create(name="Science")
+        self.history = Category.objects.create(name="History")
+        self.authors = {
+            name: User.objects.create_user(username=name, email=f'{name}@test.com', password='password')
+            for name in ('ada', 'ben', 'cy')
+        }
+        self.facts = {
+            name: Fact.objects.create(
+                title=f"{name}'s fact", content="Content", author=author,
+                category=self.history if name == 'ben' else self.science, status='APPROVED'
+            )
+            for name, author in self.authors.items()
+        }
+        self.voters = [
+            User.objects.create_user(username=f'voter{i}', email=f'voter{i}@test.com', password='password')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def vote(self, voter, author_name, vote_type=VoteType.UPVOTE):
+        self.client.force_authenticate(voter)
+        self.client.post(f'/api/reputation/votes/{self.facts[author_name].pk}/cast_vote/', {'vote_type': vote_type})
+
+    def board(self, **params):
+        response = self.client.get('/api/reputation/leaderboard/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ranking(self, **params):
+        return [(row['username'], row['rank'], row['score']) for row in self.board(**params)['results']]
+
+    def seed(self):
+        self.vote(self.voters[0], 'ada')
+        self.vote(self.voters[1], 'ada')
+        self.vote(self.voters[0], 'ben')
+        self.vote(self.voters[2], 'cy')
+
+    def test_global_and_category_boards_follow_votes(self):
+        self.seed()
+        self.client.force_authenticate(None)
+        self.assertEqual(self.ranking(), [('ada', 1, 20), ('ben', 2, 10), ('cy', 2, 10)])
+        self.assertEqual(self.ranking(period='WEEK'), self.ranking())
+        self.assertEqual(self.ranking(category=self.science.pk), [('ada', 1, 20), ('cy', 2, 10)])
+        self.assertIsNone(self.board()['me'])
+
+        # A flip moves ada below the tie
+        self.vote(self.voters[1], 'ada', VoteType.DOWNVOTE)
+        self.assertEqual(self.ranking(period='MONTH'), [('ben', 1, 10), ('cy', 1, 10), ('ada', 3, 8)])
+        self.client.force_authenticate(self.authors['ada'])
+        self.assertEqual(self.board()['me'], {'rank': 3, 'score': 8})
+        self.assertEqual(self.board(category=self.science.pk)['me'], {'rank': 2, 'score': 8})
+
+    def test_limit_and_unknown_category(self):
+        self.seed()
+        self.assertEqual(len(self.board(limit=1)['results']), 1)
+        self.assertEqual(self.client.get('/api/reputation/leaderboard/', {'category': 999999}).status_code, 404)
+        self.assertEqual(self.client.get('/api/reputation/leaderboard/', {'period': 'YEAR'}).status_code, 400)
+
+    def test_rebuild_matches_the_incremental_tables(self):
+        self.seed()
+        self.vote(self.voters[1], 'ada', VoteType.DOWNVOTE)
+
+        def snapshot():
+            return (
+                sorted(LeaderboardEntry.objects.values_list('board', 'period', 'period_start', 'user_id', 'score')),
+                sorted(LeaderboardScore.objects.values_list('board', 'period', 'period_start', 'score', 'users_count')),
+            )
+
+        incremental = snapshot()
+        call_command('rebuild_leaderboards', stdout=StringIO())
+        self.assertEqual(snapshot(), incremental)
+        self.assertFalse(LeaderboardScore.objects.filter(users_count=0).exists())
+
+    def test_existing_rows_are_incremented_not_inserted_again(self):
+        # What a concurrent first vote for the same author finds: the row already exists
+        key = (leaderboards.GLOBAL_BOARD, LeaderboardPeriod.ALL_TIME, leaderboards.ALL_TIME_START, self.authors['ada'].pk)
+        leaderboards.apply_deltas({key: 10})
+        leaderboards.apply_deltas({key: 10})
+        self.assertEqual(LeaderboardEntry.objects.get().score, 20)
+        self.assertEqual(list(LeaderboardScore.objects.values_list('score', 'users_count')), [(20, 1)])
+
+    def test_losing_the_insert_to_a_concurrent_first_entry(self):
+        key = (leaderboards.GLOBAL_BOARD, LeaderboardPeriod.ALL_TIME, leaderboards.ALL_TIME_START, self.authors['ada'].pk)
+        # The other transaction's row, committed just after our locking SELECT missed it
+        leaderboards.apply_deltas({key: 5})
+        lock_or_create = leaderboards._lock_or_create
+        calls = []
+
+        def concurrent_insert_wins(deltas):
+            calls.append(deltas)
+            if len(calls) > 1:
+                return lock_or_create(deltas)
+            with patch.object(LeaderboardEntry.objects, 'select_for_update', return_value=LeaderboardEntry.objects.none()):
+                return lock_or_create(deltas)
+
+        with patch.object(leaderboards, '_lock_or_create', side_effect=concurrent_insert_wins):
+            leaderboards.apply_deltas({key: 10})
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(LeaderboardEntry.objects.get().score, 15)
+        self.assertEqual(list(LeaderboardScore.objects.values_list('score', 'users_count')), [(15, 1)])
+
+    def test_negative_scores_rank_below_zero(self):
+        self.vote(self.voters[0], 'ben')
+        self.vote(self.voters[0], 'cy')
+        self.client.delete(f'/api/reputation/votes/{self.facts["cy"].pk}/cast_vote/')  # Back to 0
+        self.vote(self.voters[0], 'ada', VoteType.DOWNVOTE)
+
+        board = (leaderboards.GLOBAL_BOARD, LeaderboardPeriod.ALL_TIME, leaderboards.ALL_TIME_START)
+        self.assertEqual(LeaderboardScore.objects.get(board=board[0], period=board[1], score=0).users_count, 1)
+        # Users at zero are read from the histogram, like every other score
+        with CaptureQueriesContext(connection) as ctx:
+            ranks = {name: leaderboards.rank_of(user.pk, *board)['rank'] for name, user in self.authors.items()}
+        self.assertEqual(ranks, {'ben': 1, 'cy': 2, 'ada': 3})
+        self.assertEqual(len(ctx), 2 * len(self.authors))
+
+        # The rebuild agrees, zero bucket included
+        histogram = set(LeaderboardScore.objects.values_list('board', 'period', 'period_start', 'score', 'users_count'))
+        leaderboards.rebuild()
+        self.assertEqual(
+            set(LeaderboardScore.objects.values_list('board', 'period', 'period_start', 'score', 'users_count')), histogram
+        )
+
+    def test_pages_and_ranks_walk_indexes(self):
+        self.seed()
+        self.client.force_authenticate(self.authors['cy'])
+        with CaptureQueriesContext(connection) as ctx:
+            self.board()
+        queries = [query['sql'] for query in ctx.captured_queries if 'reputation_leaderboard' in query['sql']]
+
+        page = next(sql for sql in queries if 'ORDER BY' in sql)
+        plan = self.explain(page)
+        self.assertIn('leaderboard_rank_idx', plan)
+        self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+        self.assertNotIn('Sort Key', plan)
+
+        rank = next(sql for sql in queries if 'SUM(' in sql)
+        # SQLite builds unique constraints as sqlite_autoindex_<table>_N
+        self.assertRegex(self.explain(rank), r'leaderboard_score_unique|sqlite_autoindex_reputation_leaderboardscore')
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}')
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VoteViewSet
+from .views import VoteViewSet, LeaderboardView
 
 # Create a router and register our viewset with it.
 router = DefaultRouter()
@@ -10,5 +10,7 @@ router = DefaultRouter()
 router.register(r'votes', VoteViewSet, basename='vote')
 
 urlpatterns = [
+    # /api/reputation/leaderboard/?period=WEEK&category=3
+    path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,30 +1,88 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from facts.models import Fact
-from .models import Vote
-from .serializers import VoteSerializer
+from rest_framework.views import APIView
+from facts.models import Category
+from . import leaderboards
+from .serializers import VoteSerializer, CastVoteSerializer, BatchVoteSerializer, LeaderboardQuerySerializer
+from .services import cast_vote, cast_votes, retract_vote, NOT_FOUND
 
 
 class VoteViewSet(viewsets.GenericViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = VoteSerializer
+    lookup_value_regex = r'\d+'
 
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post', 'delete'])
     def cast_vote(self, request, pk=None):
         # 'pk' here is the Fact ID
-        fact = get_object_or_404(Fact, pk=pk)
-        user = request.user
-        vote_type = request.data.get('vote_type')
-
-        # Logic to Create or Update the vote
-        vote, created = Vote.objects.update_or_create(
-            user=user,
-            fact=fact,
-            defaults={'vote_type': vote_type}
+        if request.method == 'DELETE':
+            # Retracting takes the vote's reputation back from the author
+            if not retract_vote(request.user, int(pk)):
+                raise NotFound()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = CastVoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        vote_type = serializer.validated_data['vote_type']
+
+        # Upsert + counters + reputation in one transaction (see services.py)
+        result = cast_vote(request.user, int(pk), vote_type)
+        if result == NOT_FOUND:
+            raise NotFound()
+
+        return Response({'status': 'vote recorded', 'type': vote_type})
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        POST /api/reputation/votes/batch/
+        Applies up to 500 queued votes at once; unknown facts are reported, not fatal.
+        """
+        serializer = BatchVoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = cast_votes(
+            request.user,
+            [(vote['fact_id'], vote['vote_type']) for vote in serializer.validated_data['votes']]
         )
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class LeaderboardView(APIView):
+    """
+    GET /api/reputation/leaderboard/?period=ALL|WEEK|MONTH&category=<id>&limit=20
+    The top users of the current period, and the caller's own rank ("me", null for
+    guests and users not on the board). Served from precomputed tables (leaderboards.py).
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = LeaderboardQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        period = query.validated_data['period']
+        category_id = query.validated_data.get('category')
 
-        # TODO: Trigger reputation update signal here
+        if category_id is None:
+            board = leaderboards.GLOBAL_BOARD
+        elif Category.objects.filter(pk=category_id).exists():
+            board = leaderboards.category_board(category_id)
+        else:
+            raise NotFound()
+        start = leaderboards.period_start(period)
 
-        return Response({'status': 'vote recorded', 'type': vote.vote_type})
\ No newline at end of file
+        results = [
+            {'rank': entry.rank, 'user_id': entry.user_id, 'username': entry.user.username, 'score': entry.score}
+            for entry in leaderboards.top(board, period, start, query.validated_data['limit'])
+        ]
+        me = None
+        if request.user.is_authenticated:
+            me = leaderboards.rank_of(request.user.pk, board, period, start)
+        return Response({
+            'board': board,
+            'period': period,
+            'period_start': start,
+            'results': results,
+            'me': me,
+        })